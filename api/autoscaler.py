@@ -0,0 +1,201 @@
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+from api.config import settings
+from api.models import AutoscalerStatus, ScalingDecision
+from api.packing import available_cpus, packed_worker_count, plan_cpu_sets
+from api.repository import repo
+from api.worker import Worker
+
+
+def _load_per_cpu() -> float | None:
+    """1-minute load average divided by the number of usable CPUs."""
+    try:
+        load = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+    return load / max(len(available_cpus()), 1)
+
+
+def _free_memory_mb() -> int | None:
+    """Available memory (MemAvailable) in megabytes, if known."""
+    try:
+        with open("/proc/meminfo") as handle:
+            for line in handle:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+class Autoscaler:
+    """Grow and shrink the number of workers inside this process.
+
+    Every `autoscale_interval_seconds` the expected queue drain time
+    (queue depth x recent task latency / active workers) is compared
+    with `autoscale_target_wait_seconds`. A decision must hold for
+    several consecutive ticks before one worker is added or removed,
+    and the node must have spare load and memory to grow.
+    """
+
+    def __init__(self) -> None:
+        self._workers: list[Worker] = []
+        self._retired: list[Worker] = []
+        self._cpu_sets: list[frozenset[int]] = []
+        self._latencies: deque[float] = deque(maxlen=50)
+        self._decisions: deque[ScalingDecision] = deque(maxlen=10)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._up_ticks = 0
+        self._down_ticks = 0
+        self.min_workers = 1
+        self.max_workers = 1
+
+    def start(self) -> None:
+        """Start the minimum number of workers and the scaling loop."""
+        max_workers = settings.autoscale_max_workers
+        if max_workers <= 0:
+            max_workers = packed_worker_count() if settings.cpu_packing else len(available_cpus())
+        self.max_workers = max(max_workers, 1)
+        self.min_workers = min(max(settings.autoscale_min_workers, 1), self.max_workers)
+        if settings.cpu_packing:
+            self._cpu_sets = plan_cpu_sets(self.max_workers, settings.cpus_per_task)
+
+        for _ in range(self.min_workers):
+            self._add_worker()
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> list[Worker]:
+        """Stop the scaling loop and signal all workers to stop.
+
+        Returns the workers that may still be finishing a task.
+        """
+        self._stop_event.set()
+        with self._lock:
+            workers = list(self._workers)
+            workers += [worker for worker in self._retired if worker.is_alive()]
+            self._workers.clear()
+            self._retired.clear()
+        for worker in workers:
+            worker.stop()
+        return workers
+
+    def record_latency(self, seconds: float) -> None:
+        """Record the duration of a finished task."""
+        self._latencies.append(seconds)
+
+    @property
+    def active_workers(self) -> int:
+        return len(self._workers)
+
+    def status(self) -> AutoscalerStatus:
+        """Current state for the health endpoint."""
+        return AutoscalerStatus(
+            active_workers=self.active_workers,
+            min_workers=self.min_workers,
+            max_workers=self.max_workers,
+            decisions=list(self._decisions),
+        )
+
+    def _loop(self) -> None:
+        while not self._stop_event.wait(settings.autoscale_interval_seconds):
+            try:
+                self._tick()
+            except Exception:
+                pass  # Redis hiccups must not kill the scaling loop
+
+    def _tick(self) -> None:
+        active = self.active_workers
+        queue_depth = repo.queue_depth()
+        latency = (
+            sum(self._latencies) / len(self._latencies)
+            if self._latencies
+            else settings.autoscale_target_wait_seconds
+        )
+        drain_seconds = queue_depth * latency / max(active, 1)
+        load = _load_per_cpu()
+        free_mb = _free_memory_mb()
+
+        overloaded = (load is not None and load > settings.autoscale_max_load) or (
+            free_mb is not None and free_mb < settings.autoscale_min_free_memory_mb
+        )
+        wants_up = drain_seconds > settings.autoscale_target_wait_seconds
+        wants_down = drain_seconds < settings.autoscale_target_wait_seconds * settings.autoscale_down_ratio
+
+        if wants_up and not overloaded and active < self.max_workers:
+            self._up_ticks += 1
+            self._down_ticks = 0
+        elif (wants_down or overloaded) and active > self.min_workers:
+            self._down_ticks += 1
+            self._up_ticks = 0
+        else:
+            self._up_ticks = 0
+            self._down_ticks = 0
+            return
+
+        if self._up_ticks >= settings.autoscale_up_ticks:
+            action, reason = "up", f"queue drains in {drain_seconds:.0f}s"
+            if not self._add_worker():
+                return
+        elif self._down_ticks >= settings.autoscale_down_ticks:
+            action = "down"
+            reason = "node overloaded" if overloaded else f"queue drains in {drain_seconds:.0f}s"
+            self._remove_worker()
+        else:
+            return
+
+        self._up_ticks = 0
+        self._down_ticks = 0
+        self._decisions.append(
+            ScalingDecision(
+                at=datetime.now(timezone.utc).isoformat(),
+                action=action,
+                from_workers=active,
+                to_workers=self.active_workers,
+                reason=reason,
+                queue_depth=queue_depth,
+                avg_latency_seconds=round(latency, 2),
+                load_per_cpu=round(load, 2) if load is not None else None,
+                free_memory_mb=free_mb,
+            )
+        )
+
+    def _free_cpu_set(self) -> frozenset[int] | None:
+        """A CPU set not used by any live worker (stopping ones included)."""
+        if not self._cpu_sets:
+            return None
+        taken = {worker.cpu_set for worker in self._workers}
+        taken |= {worker.cpu_set for worker in self._retired if worker.is_alive()}
+        for cpu_set in self._cpu_sets:
+            if cpu_set not in taken:
+                return cpu_set
+        return None
+
+    def _add_worker(self) -> bool:
+        """Start one more worker; with packing only if a CPU set is free."""
+        with self._lock:
+            self._retired = [worker for worker in self._retired if worker.is_alive()]
+            cpu_set = self._free_cpu_set()
+            if self._cpu_sets and cpu_set is None:
+                return False
+            worker = Worker(cpu_set, on_task_done=self.record_latency)
+            worker.start()
+            self._workers.append(worker)
+            return True
+
+    def _remove_worker(self) -> None:
+        """Retire the newest worker; it finishes its current task first."""
+        with self._lock:
+            worker = self._workers.pop()
+            worker.stop()
+            self._retired.append(worker)
+
+
+autoscaler = Autoscaler()
@@ -0,0 +1,77 @@
+"""Adaptive binarisation of preprocessed pages into 1-bit images.
+
+Audiveris binarises every page in its first step anyway (BINARY), but it
+has to read, decode and keep in memory the full 8-bit RGB image we hand
+it. With `image_binarize` pages are thresholded here, with NumPy, and
+written as 1-bit PNG or CCITT G4 TIFF: files many times smaller to write,
+copy and load.
+
+The threshold is Sauvola's, computed per pixel over a square window:
+
+    T = mean * (1 + k * (std / 128 - 1))
+
+Window sums come from integral images, so the cost does not depend on
+the window size. The page is processed in bands of rows to bound memory.
+Requires the optional `numpy` package.
+"""
+
+from PIL import Image
+
+from api.config import settings
+
+BAND_ROWS = 512  # Rows thresholded at once; an int64 integral image per band
+SAUVOLA_RANGE = 128.0  # Dynamic range of the standard deviation (R)
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise RuntimeError("Binarisation requires numpy: pip install numpy") from exc
+    return numpy
+
+
+def sauvola_ink(gray, window: int, k: float):
+    """Ink mask (True = black) of an 8-bit grayscale page array."""
+    np = _numpy()
+    window |= 1  # Odd, so the window is centred on its pixel
+    half = window // 2
+    height, width = gray.shape
+    padded = np.pad(gray, half, mode="reflect")
+    area = float(window * window)
+    ink = np.empty((height, width), dtype=bool)
+
+    def window_sums(block):
+        table = np.zeros((block.shape[0] + 1, block.shape[1] + 1), dtype=np.int64)
+        np.cumsum(block, axis=0, out=table[1:, 1:])
+        np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+        return (
+            table[window:, window:] - table[:-window, window:]
+            - table[window:, :-window] + table[:-window, :-window]
+        )
+
+    for top in range(0, height, BAND_ROWS):
+        bottom = min(top + BAND_ROWS, height)
+        block = padded[top:bottom + 2 * half].astype(np.int64)
+        mean = window_sums(block) / area
+        variance = window_sums(block * block) / area - mean * mean
+        std = np.sqrt(np.maximum(variance, 0.0))
+        threshold = mean * (1.0 + k * (std / SAUVOLA_RANGE - 1.0))
+        ink[top:bottom] = gray[top:bottom] < threshold
+    return ink
+
+
+def binarize_image(image: Image.Image) -> Image.Image:
+    """1-bit copy of a page (mode "1": white paper, black ink)."""
+    np = _numpy()
+    gray = np.asarray(image.convert("L"))
+    ink = sauvola_ink(gray, settings.image_binarize_window, settings.image_binarize_k)
+    return Image.fromarray(~ink)
+
+
+def save_binary(image: Image.Image, path) -> None:
+    """Write a 1-bit image as PNG, or as CCITT G4 TIFF for .tif paths."""
+    if path.suffix.lower() in {".tif", ".tiff"}:
+        image.save(path, compression="group4")
+    else:
+        image.save(path, optimize=True)
@@ -0,0 +1,150 @@
+"""Cache of Audiveris .omr books keyed by input hash.
+
+A retry of the same input with another preset only changes a few
+`-constant` values. Those never affect the LOAD and BINARY steps, so
+the cached book (which keeps the binarized sheets) is re-run with
+`-step PAGE -force`: Audiveris resets every transcribed sheet to BINARY
+and redoes the later steps only. (`-force` is ignored without `-step`,
+and `-transcribe` leaves transcribed sheets as they are.) With
+identical constants the book is just exported again.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from api.config import settings
+from api.profile import OMR_STEPS
+from api.repository import repo
+
+_SWITCHES = "org.audiveris.omr.sheet.ProcessingSwitches"
+
+# First OMR step that depends on a constant
+CONSTANT_STEPS: dict[str, str] = {
+    "org.audiveris.omr.sheet.ScaleBuilder.minInterline": "SCALE",
+    f"{_SWITCHES}.oneLineStaves": "GRID",
+    f"{_SWITCHES}.fiveLineStaves": "GRID",
+    f"{_SWITCHES}.fourStringTablatures": "GRID",
+    f"{_SWITCHES}.sixStringTablatures": "GRID",
+    f"{_SWITCHES}.indentations": "GRID",
+    f"{_SWITCHES}.drumNotation": "HEADERS",
+    f"{_SWITCHES}.smallBeams": "BEAMS",
+    "org.audiveris.omr.ui.symbol.MusicFont.defaultMusicFamily": "HEADS",
+    f"{_SWITCHES}.crossHeads": "HEADS",
+    f"{_SWITCHES}.smallHeads": "HEADS",
+    "org.audiveris.omr.text.tesseract.TesseractOCR.useOCR": "TEXTS",
+    f"{_SWITCHES}.lyrics": "TEXTS",
+    f"{_SWITCHES}.lyricsAboveStaff": "TEXTS",
+    f"{_SWITCHES}.chordNames": "TEXTS",
+    f"{_SWITCHES}.bothSharedHeadDots": "CHORDS",
+    f"{_SWITCHES}.multiWholeHeadChords": "CHORDS",
+    f"{_SWITCHES}.tremolos": "SYMBOLS",
+    f"{_SWITCHES}.fingerings": "SYMBOLS",
+    f"{_SWITCHES}.frets": "SYMBOLS",
+    f"{_SWITCHES}.pluckings": "SYMBOLS",
+    f"{_SWITCHES}.articulations": "SYMBOLS",
+    f"{_SWITCHES}.partialWholeRests": "RHYTHMS",
+    f"{_SWITCHES}.implicitTuplets": "RHYTHMS",
+}
+
+# Settings that change the pages Audiveris binarizes (or how an input becomes pages)
+PREPROCESSING_SETTINGS = (
+    "image_min_dimension",
+    "image_upscale_factor",
+    "image_contrast_factor",
+    "image_sharpness_factor",
+    "image_binarize",
+    "image_binarize_window",
+    "image_binarize_k",
+    "image_binarize_format",
+    "image_split_tall",
+    "image_split_min_aspect",
+    "image_split_strip_aspect",
+    "pdf_extract_images",
+)
+
+
+def _as_dict(constants: list[str]) -> dict[str, str]:
+    return dict(const.split("=", 1) for const in constants)
+
+
+def first_affected_step(old: list[str], new: list[str]) -> str | None:
+    """First OMR step whose result may differ between two constant sets.
+
+    Returns None when the constants are equivalent, and "LOAD" when a
+    changed constant is unknown (nothing can be reused safely).
+    """
+    old_values, new_values = _as_dict(old), _as_dict(new)
+    changed = {
+        key for key in old_values.keys() | new_values.keys()
+        if old_values.get(key) != new_values.get(key)
+    }
+    if not changed:
+        return None
+    steps = [CONSTANT_STEPS.get(key, OMR_STEPS[0]) for key in changed]
+    return min(steps, key=OMR_STEPS.index)
+
+
+class BookCache:
+    """Books from previous runs, one directory per input."""
+
+    META_NAME = "meta.json"
+
+    def __init__(self, root: Path) -> None:
+        self._root = root
+
+    def _entry_dir(self, input_hash: str) -> Path:
+        fingerprint = "|".join([
+            input_hash,
+            *(f"{name}={getattr(settings, name)}" for name in PREPROCESSING_SETTINGS),
+        ])
+        return self._root / hashlib.sha256(fingerprint.encode()).hexdigest()
+
+    def lookup(self, input_hash: str) -> tuple[Path, list[str]] | None:
+        """Cached book and the constants it was built with, if any."""
+        entry = self._entry_dir(input_hash)
+        try:
+            meta = json.loads((entry / self.META_NAME).read_text())
+        except (OSError, json.JSONDecodeError):
+            return None
+        book_path = entry / meta["book"]
+        if not book_path.is_file():
+            return None
+        self._keep(entry)
+        return book_path, meta["constants"]
+
+    def restore(self, book_path: Path, output_dir: Path, radix: str) -> Path:
+        """Copy a cached book into the output dir under the task's radix."""
+        target = output_dir / f"{radix}.omr"
+        shutil.copyfile(book_path, target)
+        return target
+
+    def store(self, input_hash: str, book_path: Path, constants: list[str]) -> None:
+        """Keep a book built with `constants` for later retries."""
+        entry = self._entry_dir(input_hash)
+        entry.mkdir(parents=True, exist_ok=True)
+        suffix = uuid.uuid4().hex
+        tmp_book = entry / f".{book_path.name}.{suffix}"
+        shutil.copyfile(book_path, tmp_book)
+        os.replace(tmp_book, entry / book_path.name)
+        tmp_meta = entry / f".{self.META_NAME}.{suffix}"
+        tmp_meta.write_text(json.dumps({"book": book_path.name, "constants": constants}))
+        os.replace(tmp_meta, entry / self.META_NAME)
+        self._keep(entry)
+
+    def _keep(self, entry: Path) -> None:
+        """Push the entry's expiry back: books in use stay cached."""
+        if settings.task_ttl_seconds > 0:
+            expires_at = datetime.now(timezone.utc).timestamp() + settings.task_ttl_seconds
+            repo.schedule_expiry([str(entry)], expires_at)
+
+    def evict(self, input_hash: str) -> None:
+        """Drop the cached book of an input."""
+        shutil.rmtree(self._entry_dir(input_hash), ignore_errors=True)
+
+
+book_cache = BookCache(Path(settings.book_cache_dir))
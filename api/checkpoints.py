@@ -0,0 +1,41 @@
+"""Stage checkpoints of a task, kept in the task record.
+
+A task interrupted by a redeploy or a worker shutdown is requeued with
+its checkpoints and resumes after the last completed stage instead of
+starting over.
+"""
+
+from typing import Any
+
+from api.repository import repo
+
+EXTRACTED = "extracted"  # Page images of a scanned PDF ([] = PDF is processed whole)
+SPLIT = "split"  # Strips of a very tall image ([] = image is processed whole)
+PREPROCESSED = "preprocessed"  # Names of the preprocessed input files
+BOOK_BUILT = "book_built"  # Compound playlist book exists: {"force": bool}
+TRANSCRIBED = "transcribed"  # Audiveris finished, only outputs are left to collect
+
+
+class TaskCheckpoints:
+    """Checkpoints of one task; each mark is saved to Redis right away.
+
+    Without a task (e.g. in benchmarks) checkpoints are kept in memory only.
+    """
+
+    def __init__(self, task: dict[str, Any] | None = None) -> None:
+        self._task = task
+        self._checkpoints: dict[str, Any] = (
+            task.setdefault("checkpoints", {}) if task is not None else {}
+        )
+
+    def get(self, name: str) -> Any:
+        return self._checkpoints.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._checkpoints
+
+    def mark(self, name: str, value: Any = True) -> None:
+        """Record a completed stage."""
+        self._checkpoints[name] = value
+        if self._task is not None:
+            repo.save(self._task)
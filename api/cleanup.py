@@ -1,14 +1,19 @@
 import shutil
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 from api.config import settings
+from api.repository import repo
 
 
 def _cleanup_root(root: Path, cutoff_ts: float) -> None:
+    """Remove stale directories under `root` that are not in the expiry index."""
     if not root.exists():
         return
+    stale = []
     for child in root.iterdir():
         if not child.is_dir():
             continue
@@ -17,24 +22,63 @@ def _cleanup_root(root: Path, cutoff_ts: float) -> None:
         except FileNotFoundError:
             continue
         if mtime < cutoff_ts:
+            stale.append(child)
+    for child, indexed in zip(stale, repo.expiry_scheduled([str(path) for path in stale])):
+        if not indexed:
             shutil.rmtree(child, ignore_errors=True)
 
 
-def cleanup_storage() -> None:
-    """Remove stale task directories from input/output roots."""
-    if settings.task_ttl_seconds <= 0:
-        return
+def reconcile_storage() -> None:
+    """Walk the storage roots for orphaned directories (slow, runs rarely).
+
+    Directories missing from the expiry index (created before it existed,
+    or whose entry was lost) are removed once older than the task TTL.
+    """
     cutoff_ts = datetime.now(timezone.utc).timestamp() - settings.task_ttl_seconds
     _cleanup_root(Path(settings.input_dir), cutoff_ts)
     _cleanup_root(Path(settings.output_dir), cutoff_ts)
+    if settings.book_cache:
+        _cleanup_root(Path(settings.book_cache_dir), cutoff_ts)
+
+
+def cleanup_expired(stop_event: threading.Event | None = None) -> int:
+    """Remove directories whose expiry has passed; returns how many were removed.
+
+    Deletions run in parallel and are paced to `cleanup_deletes_per_second`
+    so a large backlog does not saturate the storage volume.
+    """
+    interval = 1 / settings.cleanup_deletes_per_second if settings.cleanup_deletes_per_second > 0 else 0
+    removed = 0
+    with ThreadPoolExecutor(max_workers=max(settings.cleanup_workers, 1)) as pool:
+        while not (stop_event and stop_event.is_set()):
+            now = datetime.now(timezone.utc).timestamp()
+            paths = repo.pop_expired(now, settings.cleanup_batch_size)
+            if not paths:
+                break
+            for path in paths:
+                pool.submit(shutil.rmtree, path, ignore_errors=True)
+                repo.forget_output(path)
+                removed += 1
+                if interval:
+                    time.sleep(interval)
+    return removed
+
+
+def cleanup_storage(stop_event: threading.Event | None = None) -> None:
+    """Remove expired task directories, and reconcile orphans when due."""
+    if settings.task_ttl_seconds <= 0:
+        return
+    cleanup_expired(stop_event)
+    if repo.claim_reconcile(settings.cleanup_reconcile_interval_seconds):
+        reconcile_storage()
 
 
 def start_cleanup_loop(stop_event: threading.Event) -> threading.Thread:
     """Run periodic cleanup in a background thread."""
     def _loop() -> None:
-        cleanup_storage()
+        cleanup_storage(stop_event)
         while not stop_event.wait(settings.cleanup_interval_seconds):
-            cleanup_storage()
+            cleanup_storage(stop_event)
 
     thread = threading.Thread(target=_loop, daemon=True)
     thread.start()
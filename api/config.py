@@ -6,8 +6,11 @@ class Settings(BaseSettings):
     audiveris_args: str = "-batch -transcribe -export"
     input_dir: str = "/storage/in"
     output_dir: str = "/storage/out"
+    scratch_dir: str = ""  # Node-local dir (tmpfs / local SSD) for Audiveris runs; empty = run on the shared volume
     max_error_len: int = 4000
     max_listed_files: int = 25
+    max_status_ids: int = 500  # Task ids per POST /tasks/status request
+    status_poll_margin_seconds: float = 5.0  # checkedAt lag: saves in flight and clock skew between nodes
     min_interline: int = 9
     task_workers: int = 1
     media_root: str = "/storage"
@@ -15,17 +18,80 @@ class Settings(BaseSettings):
     media_path_prefix: str = ""
     redis_url: str = "redis://redis:6379/0"
     task_queue_key: str = "audiveris:queue"
+    deadline_queue_key: str = "audiveris:queue:deadline"  # Tasks with a deadline, by deadline
+    deadline_priority_seconds: int = 600  # Tasks with a deadline go before the FIFO queue this close to it
+    max_wait_limit_seconds: int = 7 * 86400  # Upper bound of max_wait_seconds
     task_key_prefix: str = "audiveris:task:"
+    profile_key_prefix: str = "audiveris:profile:"
+    attempts_key: str = "audiveris:attempts"
+    quarantine_key: str = "audiveris:quarantine"
+    max_attempts: int = 3  # Runs of a task, or crashed/hung runs of an input, before it is quarantined
+    worker_heartbeat_seconds: int = 30  # Liveness of a process; its input runs count as crashed after 3 missed beats
+    audiveris_timeout_seconds: float = 0  # Kill a hung Audiveris run (0 = no limit)
+    playlist_single_pass: bool = True  # Build, transcribe and export a playlist in one Audiveris run
+    sheet_results: bool = False  # Export MusicXML of each sheet of a multi-sheet book as soon as it is done (a JVM per sheet)
+    book_cache: bool = True  # Keep .omr books to re-run preset retries from BINARY
+    book_cache_dir: str = "/storage/books"
     requeue_running: bool = True
+    worker_shutdown_grace_seconds: float = 30.0  # Wait for in-flight tasks before interrupting them
     api_token: str = '123'
     task_ttl_seconds: int = 86400
     cleanup_interval_seconds: int = 3600
+    expiry_key: str = "audiveris:expiry"  # Storage directories by expiry timestamp
+    cleanup_workers: int = 4  # Parallel directory deletions
+    cleanup_deletes_per_second: float = 50.0  # 0 = unlimited
+    cleanup_batch_size: int = 500
+    cleanup_reconcile_interval_seconds: int = 86400  # Full directory walk for orphans
+    # Output retention and disk quota
+    retain_artifacts: str = "mxl,log"  # Output file types kept after a run ("" = whole Audiveris project)
+    compress_logs: bool = True  # Gzip retained logs
+    log_max_bytes: int = 4 * 1024 * 1024  # Command log cap: first and last half are kept
+    storage_quota_mb: int = 0  # Size of retained outputs before LRU eviction (0 = no quota)
+    min_free_disk_mb: int = 0  # Evict, then pause dequeueing below this free space (0 = off)
+    usage_key: str = "audiveris:usage"  # Output dir sizes
+    lru_key: str = "audiveris:lru"  # Output dirs by last use
     max_pdf_pages: int = 5
+    # Direct uploads to S3-compatible storage (requires boto3)
+    s3_bucket: str = ""  # Empty = POST /uploads disabled
+    s3_endpoint_url: str = ""  # e.g. http://minio:9000 (empty = AWS)
+    s3_public_endpoint_url: str = ""  # Endpoint in pre-signed URLs, if clients reach it differently
+    s3_region: str = "us-east-1"
+    s3_access_key: str = ""
+    s3_secret_key: str = ""
+    upload_url_ttl_seconds: int = 900
     # Image preprocessing
     image_min_dimension: int = 1800  # Minimum width/height to skip upscale
     image_upscale_factor: float = 2.0  # Upscale multiplier
     image_contrast_factor: float = 1.2  # Contrast enhancement
     image_sharpness_factor: float = 1.5  # Sharpness enhancement
+    image_binarize: bool = False  # Threshold pages to 1-bit images before Audiveris (requires numpy)
+    image_binarize_window: int = 41  # Sauvola window, px of the (upscaled) page
+    image_binarize_k: float = 0.2  # Sauvola sensitivity: higher = less ink
+    image_binarize_format: str = "png"  # png, or tiff (CCITT G4)
+    image_split_tall: bool = False  # Cut very tall images into page-sized strips at system gaps
+    image_split_min_aspect: float = 2.0  # Height/width ratio from which an image is split
+    image_split_strip_aspect: float = 1.414  # Max height/width of a strip (A4 portrait)
+    pdf_extract_images: bool = True  # Process scanned PDFs as their embedded page images
+    # CPU packing
+    cpu_packing: bool = False  # Pin each Audiveris process to its own CPU set
+    cpus_per_task: int = 0  # CPUs per Audiveris process (0 = split cores across task_workers)
+    # JVM startup tuning for cold Audiveris launches
+    jvm_startup_tuning: bool = False  # Shared AppCDS archive + startup flags per job size
+    jvm_cds_dir: str = "/storage/jvm"  # AppCDS archives, one per Audiveris build
+    jvm_startup_opts: str = "-XX:-UsePerfData"  # Added for every job
+    jvm_small_job_pages: int = 1  # Jobs up to this many pages are small
+    jvm_small_job_opts: str = "-XX:TieredStopAtLevel=1 -XX:+UseSerialGC"  # Startup over peak speed
+    # Worker autoscaling
+    autoscale: bool = False
+    autoscale_min_workers: int = 1
+    autoscale_max_workers: int = 0  # 0 = number of CPUs (or packed worker count)
+    autoscale_interval_seconds: float = 5.0
+    autoscale_target_wait_seconds: float = 60.0  # Queue drain time to keep below
+    autoscale_down_ratio: float = 0.25  # Shrink when drain time < target * ratio
+    autoscale_up_ticks: int = 2  # Consecutive ticks before adding a worker
+    autoscale_down_ticks: int = 6  # Consecutive ticks before removing a worker
+    autoscale_max_load: float = 1.5  # Load average per CPU above which we do not grow
+    autoscale_min_free_memory_mb: int = 1024  # Free memory needed for another JVM
 
 
     class Config:
@@ -0,0 +1,251 @@
+"""Responses for downloading task files.
+
+Files are sent with ETag / If-None-Match and single-range `Range`
+support. When the ASGI server offers the zero-copy extensions
+(`http.response.zerocopysend`, `http.response.pathsend`) the file is
+handed to the server (sendfile); otherwise it is streamed with `pread`
+from a worker thread.
+"""
+
+import gzip
+import os
+import re
+import zipfile
+from email.utils import formatdate
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import quote
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+CHUNK_SIZE = 256 * 1024
+
+# Already compressed files are stored as-is in bundles
+_STORED_SUFFIXES = {".mxl", ".gz", ".zip", ".png", ".jpg", ".jpeg", ".pdf"}
+
+# `first-last` or `-suffix` of a `bytes=` range
+_RANGE_SPEC = re.compile(r"\s*(\d*)\s*-\s*(\d*)\s*", re.ASCII)
+
+
+def _etag(stat_result: os.stat_result, variant: str = "") -> str:
+    base = f"{stat_result.st_ino:x}-{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"
+    return f'"{base}{variant}"'
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single `bytes=` range into inclusive (start, end).
+
+    Raises ValueError for unsatisfiable ranges; returns None when the
+    header should be ignored (invalid syntax, multiple ranges, other units),
+    so the whole file is served.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    match = _RANGE_SPEC.fullmatch(spec)
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError(header)
+    return start, min(end, size - 1)
+
+
+class FileRangeResponse(Response):
+    """A file response with conditional and partial requests support."""
+
+    def __init__(
+        self,
+        request: Request,
+        path: Path,
+        media_type: str,
+        filename: str | None = None,
+        content_encoding: str | None = None,
+    ) -> None:
+        self.path = path
+        self.media_type = media_type
+        self.background = None
+        self.init_headers({})
+        self._range: tuple[int, int] | None = None
+
+        stat_result = os.stat(path)
+        size = stat_result.st_size
+        etag = _etag(stat_result, f"-{content_encoding}" if content_encoding else "")
+        self.headers["etag"] = etag
+        self.headers["last-modified"] = formatdate(stat_result.st_mtime, usegmt=True)
+        self.headers["accept-ranges"] = "bytes"
+        if content_encoding:
+            self.headers["content-encoding"] = content_encoding
+            self.headers["vary"] = "Accept-Encoding"
+        if filename:
+            self.headers["content-disposition"] = _content_disposition(filename)
+
+        if _not_modified(request, etag):
+            self.status_code = 304
+            return
+
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if range_header and (not if_range or if_range == etag):
+            try:
+                self._range = _parse_range(range_header, size)
+            except ValueError:
+                self.status_code = 416
+                self.headers["content-range"] = f"bytes */{size}"
+                self.headers["content-length"] = "0"
+                return
+
+        if self._range:
+            start, end = self._range
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self.headers["content-length"] = str(end - start + 1)
+        else:
+            self.status_code = 200
+            self.headers["content-length"] = str(size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.status_code not in (200, 206) or scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        start, end = self._range or (0, int(self.headers["content-length"]) - 1)
+        count = end - start + 1
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as handle:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": handle,
+                    "offset": start,
+                    "count": count,
+                    "more_body": False,
+                })
+        elif "http.response.pathsend" in extensions and self._range is None:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+        else:
+            await self._send_chunks(send, start, count)
+
+    async def _send_chunks(self, send: Send, offset: int, count: int) -> None:
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            while count > 0:
+                chunk = await anyio.to_thread.run_sync(os.pread, fd, min(CHUNK_SIZE, count), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                count -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": count > 0})
+            if count > 0:  # The file shrank while sending
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
+
+
+def _gunzip_chunks(path: Path) -> Iterator[bytes]:
+    with gzip.open(path, "rb") as handle:
+        while chunk := handle.read(CHUNK_SIZE):
+            yield chunk
+
+
+def log_response(request: Request, path: Path) -> Response:
+    """Serve a log; gzipped logs are sent as-is to clients that accept gzip."""
+    filename = path.name.removesuffix(".gz")
+    if path.suffix != ".gz":
+        return FileRangeResponse(request, path, "text/plain; charset=utf-8", filename)
+    if "gzip" in request.headers.get("accept-encoding", "").lower():
+        return FileRangeResponse(request, path, "text/plain; charset=utf-8", filename, "gzip")
+
+    etag = _etag(os.stat(path))
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"etag": etag})
+    return StreamingResponse(
+        _gunzip_chunks(path),
+        media_type="text/plain; charset=utf-8",
+        headers={
+            "etag": etag,
+            "vary": "Accept-Encoding",
+            "content-disposition": _content_disposition(filename),
+        },
+    )
+
+
+class _ChunkSink:
+    """Write-only stream collecting what ZipFile writes, drained between files."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _zip_chunks(files: list[tuple[Path, str]]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for path, arcname in files:
+            compression = (
+                zipfile.ZIP_STORED if path.suffix.lower() in _STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+            )
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            info.compress_type = compression
+            with path.open("rb") as source, archive.open(info, "w", force_zip64=True) as target:
+                while chunk := source.read(CHUNK_SIZE):
+                    target.write(chunk)
+                    if data := sink.drain():
+                        yield data
+            if data := sink.drain():
+                yield data
+    if data := sink.drain():
+        yield data
+
+
+def zip_response(files: list[tuple[Path, str]], filename: str) -> StreamingResponse:
+    """Stream a ZIP of `(path, name in archive)` pairs, built on the fly."""
+    return StreamingResponse(
+        _zip_chunks(files),
+        media_type="application/zip",
+        headers={"content-disposition": _content_disposition(filename)},
+    )
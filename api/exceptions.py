@@ -12,3 +12,15 @@ class LowInterlineError(ProcessingError):
     def __init__(self, interline: int, message: str, log_path: Path) -> None:
         super().__init__(message, log_path=log_path)
         self.interline = interline
+
+
+class AudiverisTimeout(ProcessingError):
+    pass
+
+
+class TaskExpired(Exception):
+    """The task deadline passed before Audiveris could be (re)started."""
+
+
+class TaskInterrupted(Exception):
+    """Audiveris was stopped because the worker is shutting down."""
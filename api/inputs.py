@@ -0,0 +1,213 @@
+"""Проверка входных файлов задач (общая для API и воркеров)."""
+
+from pathlib import Path
+
+from pypdf import PageObject, PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject
+
+# Magic bytes для поддерживаемых форматов
+MAGIC_PDF = b"%PDF"
+MAGIC_PNG = b"\x89PNG"
+MAGIC_JPEG = b"\xff\xd8\xff"
+MAGIC_WEBP_RIFF = b"RIFF"
+MAGIC_WEBP_WEBP = b"WEBP"
+
+HEADER_SIZE = 12
+
+# Операторы отрисовки контуров: страница с ними — векторная, а не скан
+PATH_PAINTING_OPERATORS = {b"S", b"s", b"f", b"F", b"f*", b"B", b"B*", b"b", b"b*", b"sh"}
+# Отсечение: изображение видно не целиком
+CLIPPING_OPERATORS = {b"W", b"W*"}
+# Допуск совпадения изображения с видимой областью страницы (доля размера, не меньше 1 pt)
+PAGE_FIT_TOLERANCE = 0.01
+# Маркеры SOF в JPEG (кроме DHT, JPG и DAC)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Форматы страниц, которые читают и предобработка, и Audiveris
+PAGE_IMAGE_SUFFIXES = {".jpg", ".png", ".tif", ".tiff"}
+
+
+def file_type_of(header: bytes) -> str | None:
+    """Определить тип файла по первым байтам."""
+    if header.startswith(MAGIC_PDF):
+        return "pdf"
+    if header.startswith(MAGIC_PNG):
+        return "png"
+    if header.startswith(MAGIC_JPEG):
+        return "jpeg"
+    if header.startswith(MAGIC_WEBP_RIFF) and header[8:12] == MAGIC_WEBP_WEBP:
+        return "webp"
+    return None
+
+
+def detect_file_type(path: Path) -> str | None:
+    """Определить тип файла по magic bytes."""
+    with path.open("rb") as f:
+        return file_type_of(f.read(HEADER_SIZE))
+
+
+def pdf_page_count(path: Path) -> int:
+    """Получить количество страниц в PDF файле."""
+    reader = PdfReader(path)
+    return len(reader.pages)
+
+
+def _multiply(m: list[float], n: list[float]) -> list[float]:
+    """Произведение матриц преобразования PDF `[a b c d e f]` (сначала m, затем n)."""
+    return [
+        m[0] * n[0] + m[1] * n[2],
+        m[0] * n[1] + m[1] * n[3],
+        m[2] * n[0] + m[3] * n[2],
+        m[2] * n[1] + m[3] * n[3],
+        m[4] * n[0] + m[5] * n[2] + n[4],
+        m[4] * n[1] + m[5] * n[3] + n[5],
+    ]
+
+
+def _image_matrix(operations: list, name: str) -> list[float] | None:
+    """CTM, с которой страница рисует изображение `name` (None — не ровно один раз)."""
+    ctm = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+    stack = []
+    placed = None
+    for operands, op in operations:
+        if op == b"q":
+            stack.append(ctm)
+        elif op == b"Q":
+            ctm = stack.pop() if stack else ctm
+        elif op == b"cm":
+            ctm = _multiply([float(value) for value in operands], ctm)
+        elif op == b"Do":
+            if placed is not None or operands[0] != name:
+                return None
+            placed = ctm
+    return placed
+
+
+def _fills_page(page: PageObject, matrix: list[float]) -> bool:
+    """Изображение без поворота и отражения закрывает ровно видимую область страницы."""
+    a, b, c, d, e, f = matrix
+    if page.rotation % 360 != 0 or b != 0 or c != 0 or a <= 0 or d <= 0:
+        return False
+    media, crop = page.mediabox, page.cropbox
+    visible = (
+        max(float(media.left), float(crop.left)),
+        max(float(media.bottom), float(crop.bottom)),
+        min(float(media.right), float(crop.right)),
+        min(float(media.top), float(crop.top)),
+    )
+    width, height = visible[2] - visible[0], visible[3] - visible[1]
+    placed = (e, f, e + a, f + d)
+    return all(
+        abs(edge - bound) <= max(size * PAGE_FIT_TOLERANCE, 1.0)
+        for edge, bound, size in zip(placed, visible, (width, height, width, height))
+    )
+
+
+def _scanned_page_image(page: PageObject) -> DictionaryObject | None:
+    """Единственное изображение страницы скана (None — страница не скан).
+
+    Страница скана рисует одно изображение и ничего больше: без других
+    XObject, без контуров и отсечения. Невидимый текстовый слой OCR
+    допускается. Изображение должно закрывать видимую область страницы
+    (CropBox внутри MediaBox) без поворота и отражения, а у страницы не
+    должно быть /Rotate: иначе извлечённая картинка выглядела бы не так,
+    как страница, и PDF отдаётся Audiveris целиком.
+    """
+    resources = page.get("/Resources")
+    xobjects = resources.get_object().get("/XObject") if resources else None
+    if not xobjects or len(xobjects.get_object()) != 1:
+        return None
+    name, image = next(iter(xobjects.get_object().items()))
+    image = image.get_object()
+    if image.get("/Subtype") != "/Image":
+        return None
+    contents = page.get_contents()
+    if contents is None:
+        return None
+    operations = contents.operations
+    if any(op in PATH_PAINTING_OPERATORS or op in CLIPPING_OPERATORS for _, op in operations):
+        return None
+    matrix = _image_matrix(operations, name)
+    if matrix is None or not _fills_page(page, matrix):
+        return None
+    return image
+
+
+def _is_cmyk(image: DictionaryObject) -> bool:
+    """Изображение в CMYK: /DeviceCMYK или ICC-профиль с четырьмя компонентами."""
+    color_space = image.get("/ColorSpace")
+    color_space = color_space.get_object() if color_space is not None else None
+    if isinstance(color_space, ArrayObject) and color_space and color_space[0] == "/ICCBased":
+        return color_space[1].get_object().get("/N") == 4
+    return color_space == "/DeviceCMYK"
+
+
+def _jpeg_components(data: bytes) -> int | None:
+    """Число компонент JPEG по заголовку кадра (SOF); 4 — CMYK/YCCK, в т.ч. инвертированный Adobe."""
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1  # Заполняющий байт
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            return data[pos + 9] if pos + 9 < len(data) else None
+        pos += 2 + int.from_bytes(data[pos + 2:pos + 4], "big")
+    return None
+
+
+def _page_image_bytes(page: PageObject, image: DictionaryObject) -> tuple[bytes, str] | None:
+    """Байты и расширение изображения страницы.
+
+    JPEG без маски и инверсии отдаётся как есть, без перекодирования.
+    Остальное (CCITT, Flate) pypdf декодирует и сохраняет без потерь в
+    PNG/TIFF. None — изображение, которое не извлечь верно: CMYK (в том
+    числе ICC и инвертированные Adobe JPEG) и форматы, которые не читает
+    Audiveris (JPEG 2000).
+    """
+    if _is_cmyk(image):
+        return None
+    filters = image.get("/Filter")
+    if isinstance(filters, list) and len(filters) == 1:
+        filters = filters[0]
+    if filters == "/DCTDecode":
+        data = image.get_data()
+        if _jpeg_components(data) == 4:
+            return None
+        if "/SMask" not in image and "/Decode" not in image:
+            return data, ".jpg"
+    extracted = page.images[0]
+    suffix = Path(extracted.name).suffix.lower()
+    if suffix not in PAGE_IMAGE_SUFFIXES:
+        return None
+    return extracted.data, suffix
+
+
+def extract_page_images(path: Path, target_dir: Path) -> list[Path] | None:
+    """Извлечь изображения страниц отсканированного PDF в `target_dir`.
+
+    Файлы называются `<имя>-page<N>`, а у одностраничного PDF — как сам
+    PDF, чтобы имя результата не менялось. Если хоть одна страница не
+    скан (векторная графика, несколько изображений), возвращает None:
+    такой PDF отдаётся Audiveris целиком.
+    """
+    reader = PdfReader(path)
+    images = [_scanned_page_image(page) for page in reader.pages]
+    if not images or any(image is None for image in images):
+        return None
+
+    extracted = []
+    for page, image in zip(reader.pages, images):
+        native = _page_image_bytes(page, image)
+        if native is None:
+            return None
+        extracted.append(native)
+
+    pages = []
+    for number, (data, suffix) in enumerate(extracted, 1):
+        name = path.stem if len(extracted) == 1 else f"{path.stem}-page{number}"
+        page_path = target_dir / f"{name}{suffix}"
+        page_path.write_bytes(data)
+        pages.append(page_path)
+    return pages
@@ -0,0 +1,92 @@
+"""JVM startup tuning for cold Audiveris launches.
+
+Every job starts a fresh JVM that loads and verifies thousands of
+Audiveris classes from the jars. With `jvm_startup_tuning` on:
+
+- the first job dumps the classes it loaded into an AppCDS archive
+  (`-XX:ArchiveClassesAtExit`), later jobs map the archive
+  (`-XX:SharedArchiveFile`) instead of loading those classes again;
+- every job gets `jvm_startup_opts`, small jobs (up to
+  `jvm_small_job_pages` pages) also `jvm_small_job_opts`, which favour
+  startup over peak speed.
+
+Archives are keyed by the Audiveris distribution (its jars) and the JDK,
+so an image rebuild trains a new archive instead of reusing a stale one.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+
+from api.config import settings
+
+
+class JvmLauncher:
+    """JVM options for Audiveris jobs and the AppCDS archive they share."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._training = False
+        self._archive: Path | None = None
+
+    def _distribution_key(self) -> str:
+        """Fingerprint of the jars started by `audiveris_cmd` and the JDK."""
+        launcher = shutil.which(settings.audiveris_cmd) or settings.audiveris_cmd
+        root = Path(os.path.realpath(launcher)).parent.parent
+        digest = hashlib.sha256(os.environ.get("JAVA_HOME", "").encode())
+        jars = sorted((root / "lib").glob("*.jar")) or [Path(launcher)]
+        for jar in jars:
+            try:
+                stat_result = jar.stat()
+            except OSError:
+                continue
+            digest.update(f"{jar}:{stat_result.st_size}:{stat_result.st_mtime_ns}".encode())
+        return digest.hexdigest()[:16]
+
+    def archive_path(self) -> Path:
+        if self._archive is None:
+            self._archive = Path(settings.jvm_cds_dir) / f"audiveris-{self._distribution_key()}.jsa"
+        return self._archive
+
+    def options(self, pages: int) -> tuple[list[str], Path | None]:
+        """JVM options for a job of `pages` pages.
+
+        Returns the options and, for the job that trains the archive, the
+        temporary archive to pass to `finish_training` once it exited.
+        """
+        if not settings.jvm_startup_tuning:
+            return [], None
+        opts = settings.jvm_startup_opts.split()
+        if pages <= settings.jvm_small_job_pages:
+            opts += settings.jvm_small_job_opts.split()
+
+        archive = self.archive_path()
+        if archive.exists():
+            return [*opts, f"-XX:SharedArchiveFile={archive}"], None
+        try:
+            archive.parent.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            return opts, None  # The archive is an optimisation only
+        with self._lock:
+            if self._training:
+                return opts, None  # Another job is training the archive
+            self._training = True
+        training = archive.with_name(f".{archive.name}.{uuid.uuid4().hex}")
+        return [*opts, f"-XX:ArchiveClassesAtExit={training}"], training
+
+    def finish_training(self, training: Path) -> None:
+        """Publish the archive dumped by a training job (if the JVM wrote one)."""
+        try:
+            if training.exists() and training.stat().st_size > 0:
+                os.replace(training, self.archive_path())
+            else:
+                training.unlink(missing_ok=True)
+        finally:
+            with self._lock:
+                self._training = False
+
+
+jvm_launcher = JvmLauncher()
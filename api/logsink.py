@@ -0,0 +1,124 @@
+"""Streaming capture of Audiveris output into one bounded log per task.
+
+Both pipes of every Audiveris run of a task are written to a single
+(gzipped) command log as lines arrive. Only the first and the last half
+of `log_max_bytes` are kept, the middle is replaced by a marker. Lines
+are inspected on the way for processing errors, interline values and
+step timings, so stdout is never held in memory as a whole.
+"""
+
+import gzip
+import re
+import threading
+from collections import deque
+from pathlib import Path
+from typing import IO, Callable
+
+from api.profile import StepTimingParser
+
+_INTERLINE = re.compile(r"interline value of (\d+) pixels")
+
+
+def is_processing_error(line: str) -> bool:
+    """Whether an Audiveris output line reports a processing error."""
+    # Look for WARN/ERROR lines with exceptions
+    if "Error in performing" in line or "Exception" in line:
+        return True
+    # Look for specific error patterns
+    return "WARN" in line and ("Error" in line or "null" in line.lower())
+
+
+class LogSink:
+    """Bounded head + tail log of all Audiveris runs of a task."""
+
+    MAX_ERRORS = 5
+    RECENT_LINES = 20
+
+    def __init__(self, path: Path, max_bytes: int) -> None:
+        self.path = path
+        # Appending keeps the log of an interrupted attempt (gzip members concatenate)
+        if path.suffix == ".gz":
+            self._handle: IO[str] = gzip.open(path, "at", encoding="utf-8", errors="replace")
+        else:
+            self._handle = path.open("a", encoding="utf-8", errors="replace")
+        self._head_left = max_bytes - max_bytes // 2
+        self._tail_budget = max_bytes // 2
+        self._tail: deque[str] = deque()
+        self._tail_size = 0
+        self._omitted = 0
+        self._lock = threading.Lock()
+        self._recent: dict[str, deque[str]] = {
+            "stdout": deque(maxlen=self.RECENT_LINES),
+            "stderr": deque(maxlen=self.RECENT_LINES),
+        }
+        self.errors: list[str] = []
+        self.interline: int | None = None
+        self.timings = StepTimingParser()
+        self.listeners: list[Callable[[str], None]] = []  # Called with every stdout line
+
+    def __enter__(self) -> "LogSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def section(self, text: str) -> None:
+        """Write a line of our own (command, step header, return code)."""
+        with self._lock:
+            self._append(f"{text}\n")
+
+    def feed(self, line: str, stream: str = "stdout") -> None:
+        """Record one output line of Audiveris."""
+        with self._lock:
+            self._recent[stream].append(line)
+            if len(self.errors) < self.MAX_ERRORS and is_processing_error(line):
+                self.errors.append(line.strip())
+            match = _INTERLINE.search(line)
+            if match:
+                value = int(match.group(1))
+                self.interline = value if self.interline is None else min(self.interline, value)
+            if stream == "stdout":
+                self.timings.feed(line)
+            self._append(line if stream == "stdout" else f"[stderr] {line}")
+        if stream == "stdout":
+            for listener in self.listeners:
+                listener(line)
+
+    def pump(self, pipe: IO[str], stream: str) -> threading.Thread:
+        """Feed a subprocess pipe into the log from a background thread."""
+        def _read() -> None:
+            for line in pipe:
+                self.feed(line, stream)
+            pipe.close()
+
+        thread = threading.Thread(target=_read, daemon=True)
+        thread.start()
+        return thread
+
+    def recent(self, stream: str) -> str:
+        """The last lines of a stream, for error messages."""
+        with self._lock:
+            return "".join(self._recent[stream]).strip()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle.closed:
+                return
+            if self._omitted:
+                self._handle.write(f"\n... {self._omitted} bytes omitted ...\n\n")
+            self._handle.writelines(self._tail)
+            self._handle.close()
+
+    def _append(self, text: str) -> None:
+        size = len(text.encode("utf-8", errors="replace"))
+        if self._head_left > 0:
+            self._handle.write(text)
+            self._head_left -= size
+            return
+        self._tail.append(text)
+        self._tail_size += size
+        while self._tail_size > self._tail_budget and self._tail:
+            dropped = self._tail.popleft()
+            dropped_size = len(dropped.encode("utf-8", errors="replace"))
+            self._tail_size -= dropped_size
+            self._omitted += dropped_size
@@ -1,36 +1,56 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
 import threading
 
+from api.autoscaler import autoscaler
 from api.cleanup import start_cleanup_loop
 from api.config import settings
+from api.metrics import mark_process_dead
+from api.packing import packed_worker_count
 from api.repository import repo
 from api.routes import router
-from api.worker import Worker, create_workers
+from api.storage import clean_scratch
+from api.worker import Worker, create_workers, drain_workers, start_heartbeat_loop
 
 workers: list[Worker] = []
 cleanup_stop_event = threading.Event()
 cleanup_thread: threading.Thread | None = None
+heartbeat_stop_event = threading.Event()
+heartbeat_thread: threading.Thread | None = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global workers, cleanup_thread
+    global workers, cleanup_thread, heartbeat_thread
     # Startup: requeue running tasks and start workers
     repo.requeue_running_tasks()
-    workers = create_workers(settings.task_workers)
+    clean_scratch()
+    heartbeat_stop_event.clear()
+    heartbeat_thread = start_heartbeat_loop(heartbeat_stop_event)
+    if settings.autoscale:
+        autoscaler.start()
+    else:
+        worker_count = packed_worker_count() if settings.cpu_packing else settings.task_workers
+        workers = create_workers(worker_count)
     if settings.task_ttl_seconds > 0:
         cleanup_stop_event.clear()
         cleanup_thread = start_cleanup_loop(cleanup_stop_event)
     yield
-    # Shutdown: stop workers gracefully
-    for worker in workers:
-        worker.stop()
+    # Shutdown: let workers drain, then interrupt what is left (tasks are requeued)
+    stopping = list(workers)
+    if settings.autoscale:
+        stopping += autoscaler.stop()
+    await asyncio.to_thread(drain_workers, stopping, settings.worker_shutdown_grace_seconds)
     cleanup_stop_event.set()
     if cleanup_thread:
         cleanup_thread.join(timeout=2)
+    heartbeat_stop_event.set()
+    if heartbeat_thread:
+        heartbeat_thread.join(timeout=2)
+    mark_process_dead()
 
 
 app = FastAPI(
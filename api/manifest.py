@@ -0,0 +1,83 @@
+"""Manifest of a task output dir, built in a single scandir pass.
+
+The manifest replaces separate tree walks for the result, the book log
+and the file listing in error messages, and is stored in the task.
+"""
+
+import os
+import re
+from pathlib import Path
+
+from api.models import ManifestFile, OutputManifest
+
+COMMAND_LOG = "audiveris.log"  # Written by us next to the Audiveris outputs
+SHEET_RESULTS_DIR = "sheets"  # MusicXML of single sheets, see `api.progress`
+
+_SHEET_DIR = re.compile(r"^sheet#\d+$")
+_EXCLUDED_OUTPUTS = {"playlist.xml"}
+
+
+def scan_output_dir(output_dir: Path) -> OutputManifest:
+    """List and classify every file under `output_dir`."""
+    files: list[ManifestFile] = []
+    sheets: list[str] = []
+    pending = [output_dir]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    rel = Path(entry.path).relative_to(output_dir).as_posix()
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(Path(entry.path))
+                        if _SHEET_DIR.match(entry.name):
+                            sheets.append(rel)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat_result = entry.stat()
+                        files.append(ManifestFile(path=rel, size=stat_result.st_size, mtime=stat_result.st_mtime))
+        except FileNotFoundError:
+            continue
+    files.sort(key=lambda item: item.path)
+
+    mxl_files, xml_files, logs, books = [], [], [], []
+    for item in files:
+        if item.path.startswith(f"{SHEET_RESULTS_DIR}/"):
+            continue  # Not outputs of the book run
+        name = item.path.rsplit("/", 1)[-1].lower()
+        if name.endswith(".mxl"):
+            mxl_files.append(item.path)
+        elif name.endswith(".xml") and "/" not in item.path and name not in _EXCLUDED_OUTPUTS:
+            # Audiveris keeps internal XML in sheet folders; only top-level XML is MusicXML
+            xml_files.append(item.path)
+        elif name.endswith((".log", ".log.gz")):
+            logs.append(item.path)
+        elif name.endswith(".omr"):
+            books.append(item.path)
+
+    return OutputManifest(
+        files=files,
+        outputs=mxl_files or xml_files,
+        logs=logs,
+        book=min(books, key=lambda path: path.count("/")) if books else None,
+        sheets=sorted(sheets),
+        total_size=sum(item.size for item in files),
+    )
+
+
+def find_book_log(manifest: OutputManifest) -> str | None:
+    """The newest Audiveris book log, or our command log when there is none."""
+    mtimes = {item.path: item.mtime for item in manifest.files}
+    book_logs = [path for path in manifest.logs if not path.rsplit("/", 1)[-1].startswith(COMMAND_LOG)]
+    if book_logs:
+        return max(book_logs, key=lambda path: mtimes[path])
+    return manifest.logs[0] if manifest.logs else None
+
+
+def file_listing(manifest: OutputManifest, limit: int) -> str:
+    """Comma-separated file list for error messages."""
+    paths = [item.path for item in manifest.files]
+    if not paths:
+        return "none"
+    if len(paths) > limit:
+        return ", ".join(paths[:limit]) + f", ... (+{len(paths) - limit} more)"
+    return ", ".join(paths)
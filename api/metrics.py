@@ -0,0 +1,140 @@
+"""Prometheus metrics for uploads, the queue and Audiveris processing stages.
+
+When `PROMETHEUS_MULTIPROC_DIR` is set (several uvicorn processes, each
+with its own workers), samples are written to that directory by every
+process and aggregated on scrape.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from api.models import TaskProfile
+
+SECONDS_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 3600)
+BYTES_BUCKETS = tuple(2 ** power for power in range(16, 28, 2))  # 64 KiB ... 64 MiB
+
+UPLOAD_BYTES = Histogram(
+    "audiveris_upload_bytes", "Size of uploaded task inputs", ["preset"], buckets=BYTES_BUCKETS
+)
+UPLOAD_SECONDS = Histogram(
+    "audiveris_upload_seconds", "Time spent saving uploaded task inputs", ["preset"],
+    buckets=SECONDS_BUCKETS,
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "audiveris_queue_wait_seconds", "Time from task creation until a worker picks it up", ["preset"],
+    buckets=SECONDS_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "audiveris_stage_seconds", "Time spent in each processing stage", ["stage", "preset", "outcome"],
+    buckets=SECONDS_BUCKETS,
+)
+TASKS_TOTAL = Counter("audiveris_tasks_total", "Processed tasks", ["preset", "outcome"])
+QUEUE_DEPTH = Gauge(
+    "audiveris_queue_depth", "Tasks waiting in the queue", multiprocess_mode="livemax"
+)
+BUSY_WORKERS = Gauge(
+    "audiveris_busy_workers", "Workers currently processing a task", multiprocess_mode="livesum"
+)
+
+OUTCOME_COMPLETED = "completed"
+OUTCOME_ERROR = "error"  # An exception escaped the task before an outcome was set
+
+_local = threading.local()
+
+
+class TaskRun:
+    """Stage durations of one task, observed once its outcome is known."""
+
+    def __init__(self, preset: str) -> None:
+        self.preset = preset
+        self.outcome: str | None = None
+        self.stages: dict[str, float] = {}
+        self.profile: TaskProfile | None = None
+
+    def finish(self) -> None:
+        for stage_name, seconds in self.stages.items():
+            STAGE_SECONDS.labels(stage_name, self.preset, self.outcome).observe(seconds)
+        TASKS_TOTAL.labels(self.preset, self.outcome).inc()
+
+
+@contextmanager
+def task_run(preset: str) -> Iterator[TaskRun]:
+    """Collect stage timings of the task processed by the current thread.
+
+    Without an explicit outcome the task counts as completed, or as an
+    error when an exception escapes it.
+    """
+    run = TaskRun(preset)
+    _local.run = run
+    BUSY_WORKERS.inc()
+    try:
+        yield run
+    except BaseException:
+        run.outcome = run.outcome or OUTCOME_ERROR
+        raise
+    else:
+        run.outcome = run.outcome or OUTCOME_COMPLETED
+    finally:
+        BUSY_WORKERS.dec()
+        _local.run = None
+        run.finish()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a processing stage of the current task (no-op outside a task).
+
+    Repeated stages of one task are summed into a single observation.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        run = getattr(_local, "run", None)
+        if run is not None:
+            run.stages[name] = run.stages.get(name, 0.0) + time.perf_counter() - started
+
+
+def set_outcome(outcome: str) -> None:
+    """Set the outcome label of the current task."""
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run.outcome = outcome
+
+
+def set_profile(profile: TaskProfile | None) -> None:
+    """Attach the Audiveris step profile to the current task."""
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run.profile = profile
+
+
+def render(queue_depth: int) -> tuple[bytes, str]:
+    """Render all metrics in the Prometheus text format."""
+    QUEUE_DEPTH.set(queue_depth)
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop live gauges of this process from the multiprocess directory."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
@@ -20,6 +20,17 @@ class TaskStatus(str, Enum):
     running = "running"
     completed = "completed"
     error = "error"
+    expired = "expired"
+
+
+class SheetResult(ApiModel):
+    """Распознанный лист книги."""
+
+    number: int = Field(description="Номер листа (с 1)")
+    url: str | None = Field(default=None, description="MusicXML только этого листа (пока не готов — null)")
+    movements: list[str] = Field(
+        default_factory=list, description="MusicXML каждой части, если на листе несколько частей (url — первая)"
+    )
 
 
 class TaskProgress(ApiModel):
@@ -28,6 +39,9 @@ class TaskProgress(ApiModel):
     total: int = Field(description="Общее количество файлов")
     completed: int = Field(description="Успешно обработано")
     failed: int = Field(description="Завершено с ошибкой")
+    sheets_total: int | None = Field(default=None, description="Листов в книге")
+    sheets_completed: int | None = Field(default=None, description="Распознано листов")
+    sheets: list[SheetResult] = Field(default_factory=list, description="Распознанные листы")
 
 
 class FileResult(ApiModel):
@@ -47,6 +61,14 @@ class TaskCreateResponse(ApiModel):
     status: TaskStatus = Field(description="Начальный статус (всегда 'queued')")
 
 
+class UploadResponse(ApiModel):
+    """Ссылка для прямой загрузки файла в хранилище."""
+
+    object_key: str = Field(description="Ключ объекта, передаётся в POST /tasks/single")
+    upload_url: str = Field(description="Pre-signed URL для загрузки файла методом PUT")
+    expires_at: str = Field(description="Время, до которого ссылка действительна (ISO 8601)")
+
+
 class TaskResponse(ApiModel):
     """Ответ со статусом задачи."""
 
@@ -54,9 +76,124 @@ class TaskResponse(ApiModel):
     status: TaskStatus = Field(description="Текущий статус задачи")
     created_at: str | None = Field(default=None, description="Время создания (ISO 8601)")
     updated_at: str | None = Field(default=None, description="Время обновления (ISO 8601)")
+    started_at: str | None = Field(default=None, description="Время начала обработки (ISO 8601)")
     progress: TaskProgress | None = Field(default=None, description="Прогресс обработки")
     results: FileResult | None = Field(default=None, description="Результат обработки")
     errors: str | None = Field(default=None, description="Ошибка обработки")
+    deadline: str | None = Field(default=None, description="Дедлайн задачи (ISO 8601)")
+    evicted_at: str | None = Field(
+        default=None, description="Время удаления файлов результата по квоте (ISO 8601), ссылки больше не работают"
+    )
+
+
+class TaskStatusRequest(ApiModel):
+    """Запрос статусов нескольких задач."""
+
+    ids: list[str] = Field(description="Идентификаторы задач")
+    updated_since: datetime | None = Field(
+        default=None, description="Вернуть только задачи, обновлённые не раньше этого времени (ISO 8601)"
+    )
+
+
+class TaskStatusEntry(ApiModel):
+    """Краткий статус задачи."""
+
+    status: TaskStatus = Field(description="Текущий статус задачи")
+    updated_at: str | None = Field(default=None, description="Время обновления (ISO 8601)")
+    progress: TaskProgress | None = Field(default=None, description="Прогресс обработки")
+    url: str | None = Field(default=None, description="Ссылка на результат (для completed)")
+    error: str | None = Field(default=None, description="Ошибка обработки")
+    evicted_at: str | None = Field(default=None, description="Время удаления файлов результата по квоте (ISO 8601)")
+
+
+class TaskStatusBatch(ApiModel):
+    """Статусы нескольких задач."""
+
+    checked_at: str = Field(
+        description="Время запроса минус запас (ISO 8601), передаётся в следующий updatedSince"
+    )
+    tasks: dict[str, TaskStatusEntry] = Field(description="Статусы по id задачи")
+    missing: list[str] = Field(description="Неизвестные (или удалённые по TTL) задачи")
+
+
+class ManifestFile(ApiModel):
+    """Файл в директории результатов."""
+
+    path: str = Field(description="Путь относительно директории результатов")
+    size: int = Field(description="Размер (байт)")
+    mtime: float = Field(description="Время изменения (Unix time)")
+
+
+class OutputManifest(ApiModel):
+    """Содержимое директории результатов задачи."""
+
+    files: list[ManifestFile] = Field(description="Все файлы")
+    outputs: list[str] = Field(description="MusicXML результаты (.mxl в приоритете)")
+    logs: list[str] = Field(description="Логи (.log, .log.gz)")
+    book: str | None = Field(default=None, description="Книга Audiveris (.omr)")
+    sheets: list[str] = Field(description="Папки листов книги")
+    total_size: int = Field(description="Суммарный размер (байт)")
+
+
+class TaskProfile(ApiModel):
+    """Профиль времени шагов Audiveris для задачи."""
+
+    steps: dict[str, float] = Field(description="Время каждого шага OMR по всем страницам (сек)")
+    sheets: dict[str, dict[str, float]] = Field(description="Время шагов по страницам (сек)")
+    total_seconds: float = Field(description="Суммарное время шагов (сек)")
+    wall_seconds: float | None = Field(default=None, description="Длительность по логу книги (сек)")
+
+
+class PresetProfile(ApiModel):
+    """Среднее время шагов Audiveris для пресета."""
+
+    preset: str = Field(description="Пресет")
+    tasks: int = Field(description="Количество задач в выборке")
+    avg_seconds: float = Field(description="Среднее суммарное время шагов (сек)")
+    steps: dict[str, float] = Field(description="Среднее время каждого шага (сек)")
+
+
+class PresetInfo(ApiModel):
+    """Пресет обработки."""
+
+    name: str = Field(description="Имя пресета")
+    description: str = Field(description="Описание")
+    constants: list[str] = Field(description="Константы Audiveris пресета")
+
+
+class SpeedEffect(ApiModel):
+    """Измеренное время уровня скорости на одном пресете."""
+
+    preset: str = Field(description="Пресет")
+    tasks: int = Field(description="Количество задач в выборке")
+    avg_seconds: float = Field(description="Среднее суммарное время шагов (сек)")
+    relative_to_balanced: float | None = Field(
+        default=None, description="Отношение к balanced на том же пресете (нет замеров balanced — null)"
+    )
+
+
+class SpeedInfo(ApiModel):
+    """Уровень скорости и его измеренный эффект."""
+
+    name: str = Field(description="Имя уровня")
+    description: str = Field(description="Описание")
+    constants: list[str] = Field(description="Константы Audiveris уровня")
+    tasks: int = Field(description="Количество задач в выборке (все пресеты)")
+    avg_seconds: float | None = Field(
+        default=None, description="Среднее время шагов по всем пресетам (зависит от набора пресетов)"
+    )
+    relative_to_balanced: float | None = Field(
+        default=None,
+        description="Отношение к balanced, сравнение внутри каждого пресета, взвешенное по числу задач",
+    )
+    by_preset: list[SpeedEffect] = Field(default_factory=list, description="Замеры по пресетам")
+
+
+class PresetsResponse(ApiModel):
+    """Пресеты и уровни скорости."""
+
+    presets: list[PresetInfo] = Field(description="Пресеты обработки")
+    speeds: list[SpeedInfo] = Field(description="Уровни скорости")
 
 
 class TaskResultResponse(ApiModel):
@@ -67,8 +204,46 @@ class TaskResultResponse(ApiModel):
     errors: list[str] = Field(description="Список ошибок")
 
 
+class ScalingDecision(ApiModel):
+    """Решение автомасштабирования воркеров."""
+
+    at: str = Field(description="Время решения (ISO 8601)")
+    action: str = Field(description="'up' или 'down'")
+    from_workers: int = Field(description="Воркеров до решения")
+    to_workers: int = Field(description="Воркеров после решения")
+    reason: str = Field(description="Причина")
+    queue_depth: int = Field(description="Глубина очереди")
+    avg_latency_seconds: float = Field(description="Среднее время задачи (сек)")
+    load_per_cpu: float | None = Field(default=None, description="Load average на ядро")
+    free_memory_mb: int | None = Field(default=None, description="Свободная память (МБ)")
+
+
+class AutoscalerStatus(ApiModel):
+    """Состояние автомасштабирования воркеров."""
+
+    active_workers: int = Field(description="Активных воркеров")
+    min_workers: int = Field(description="Минимум воркеров")
+    max_workers: int = Field(description="Максимум воркеров")
+    decisions: list[ScalingDecision] = Field(description="Последние решения")
+
+
+class QuarantineEntry(ApiModel):
+    """Вход, помещённый в карантин."""
+
+    input_hash: str = Field(description="sha256 входных файлов")
+    task_id: str = Field(description="Задача, на которой вход попал в карантин")
+    attempts: int = Field(description="Количество запусков")
+    input_files: list[str] = Field(description="Имена входных файлов")
+    quarantined_at: str = Field(description="Время помещения в карантин (ISO 8601)")
+
+
 class HealthResponse(ApiModel):
     """Статус здоровья API."""
 
     status: str = Field(description="Статус ('ok')")
     queue_depth: int = Field(description="Количество задач в очереди")
+    storage_used_mb: int = Field(description="Объём сохранённых результатов (МБ)")
+    free_disk_mb: int | None = Field(default=None, description="Свободное место на томе результатов (МБ)")
+    autoscaler: AutoscalerStatus | None = Field(
+        default=None, description="Автомасштабирование (если включено)"
+    )
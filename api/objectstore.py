@@ -0,0 +1,112 @@
+"""S3-compatible object storage for direct uploads (MinIO locally).
+
+Clients PUT input files to a pre-signed URL, so upload bytes never pass
+through the API process; a worker streams the object into the task's
+input directory and deletes it. Requires the optional `boto3` package.
+"""
+
+import hashlib
+import threading
+import uuid
+from pathlib import Path
+
+from api.config import settings
+
+UPLOAD_PREFIX = "uploads/"
+CHUNK_SIZE = 1024 * 1024
+
+
+class ObjectStore:
+    """Pre-signed uploads and streaming downloads from one bucket."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._client = None
+        self._presign_client = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.s3_bucket)
+
+    def _make_client(self, endpoint_url: str):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError as exc:
+            raise RuntimeError("S3 uploads require boto3: pip install boto3") from exc
+        return boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            aws_access_key_id=settings.s3_access_key or None,
+            aws_secret_access_key=settings.s3_secret_key or None,
+            region_name=settings.s3_region,
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+        )
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = self._make_client(settings.s3_endpoint_url)
+            return self._client
+
+    @property
+    def presign_client(self):
+        """Client signing for the endpoint clients see (the host is part of the signature)."""
+        if not settings.s3_public_endpoint_url:
+            return self.client
+        with self._lock:
+            if self._presign_client is None:
+                self._presign_client = self._make_client(settings.s3_public_endpoint_url)
+            return self._presign_client
+
+    def new_key(self, filename: str) -> str:
+        return f"{UPLOAD_PREFIX}{uuid.uuid4().hex}/{filename}"
+
+    def presign_put(self, key: str) -> str:
+        """URL the client uploads the object to with a plain PUT."""
+        return self.presign_client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": settings.s3_bucket, "Key": key},
+            ExpiresIn=settings.upload_url_ttl_seconds,
+        )
+
+    def read_header(self, key: str, size: int) -> bytes | None:
+        """First bytes of an object, or None if it does not exist."""
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self.client.get_object(
+                Bucket=settings.s3_bucket, Key=key, Range=f"bytes=0-{size - 1}"
+            )
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in {"NoSuchKey", "404", "InvalidRange"}:
+                return None
+            raise
+        body = response["Body"]
+        try:
+            return body.read()
+        finally:
+            body.close()
+
+    def download(self, key: str, path: Path) -> tuple[int, str]:
+        """Stream an object to `path`; returns its size and sha256."""
+        response = self.client.get_object(Bucket=settings.s3_bucket, Key=key)
+        size = 0
+        digest = hashlib.sha256()
+        body = response["Body"]
+        try:
+            with path.open("wb") as handle:
+                for chunk in body.iter_chunks(CHUNK_SIZE):
+                    handle.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+        finally:
+            body.close()
+        return size, digest.hexdigest()
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=settings.s3_bucket, Key=key)
+
+
+object_store = ObjectStore()
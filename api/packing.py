@@ -0,0 +1,80 @@
+"""CPU packing: pin each Audiveris process to its own set of cores."""
+
+import os
+from typing import Any
+
+from api.config import settings
+
+
+def available_cpus() -> list[int]:
+    """List CPUs this process is allowed to run on."""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def packed_worker_count() -> int:
+    """Number of workers that fit on the available cores.
+
+    With `cpus_per_task` set, the count is derived from the cores;
+    otherwise `task_workers` is kept (capped by the number of cores).
+    """
+    cpus = available_cpus()
+    if settings.cpus_per_task > 0:
+        return max(len(cpus) // settings.cpus_per_task, 1)
+    return max(min(settings.task_workers, len(cpus)), 1)
+
+
+def plan_cpu_sets(count: int, cpus_per_task: int = 0) -> list[frozenset[int]]:
+    """Split available cores into `count` disjoint CPU sets.
+
+    Cores left over after an even split are handed out one by one
+    to the first sets, unless `cpus_per_task` fixes the set size.
+    """
+    cpus = available_cpus()
+    count = max(min(count, len(cpus)), 1)
+    size = len(cpus) // count
+    if cpus_per_task > 0:
+        size = min(cpus_per_task, size)
+        extra = 0
+    else:
+        extra = len(cpus) - size * count
+
+    cpu_sets = []
+    start = 0
+    for index in range(count):
+        end = start + size + (1 if index < extra else 0)
+        cpu_sets.append(frozenset(cpus[start:end]))
+        start = end
+    return cpu_sets
+
+
+def subprocess_kwargs(
+    cpu_set: frozenset[int] | None,
+    java_opts: list[str] | None = None,
+) -> dict[str, Any]:
+    """Extra subprocess arguments pinning a child to `cpu_set`.
+
+    The JVM is also told how many processors it owns, so Audiveris
+    sizes its internal thread pools to the set instead of the node.
+    `java_opts` are appended to JAVA_OPTS of the child.
+    """
+    extra_opts = list(java_opts or [])
+    kwargs: dict[str, Any] = {}
+    if cpu_set:
+        cpus = set(cpu_set)
+
+        def _pin() -> None:
+            os.sched_setaffinity(0, cpus)
+
+        kwargs["preexec_fn"] = _pin
+        extra_opts.append(f"-XX:ActiveProcessorCount={len(cpus)}")
+    if not extra_opts:
+        return kwargs
+
+    env = os.environ.copy()
+    java_opts_env = env.get("JAVA_OPTS", "")
+    env["JAVA_OPTS"] = " ".join([java_opts_env, *extra_opts]).strip()
+    kwargs["env"] = env
+    return kwargs
@@ -17,9 +17,18 @@ class Preset(str, Enum):
     small_notes = "small_notes"
 
 
+class Speed(str, Enum):
+    """Speed/accuracy tiers, orthogonal to presets."""
+
+    fast = "fast"
+    balanced = "balanced"
+    accurate = "accurate"
+
+
 # Base constant prefix
 _PREFIX = "org.audiveris.omr.sheet.ProcessingSwitches"
 _FONT_PREFIX = "org.audiveris.omr.ui.symbol.MusicFont"
+_OCR_PREFIX = "org.audiveris.omr.text.tesseract.TesseractOCR"
 
 
 PRESET_CONSTANTS: dict[Preset, list[str]] = {
@@ -78,12 +87,67 @@ PRESET_CONSTANTS: dict[Preset, list[str]] = {
 }
 
 
-def get_preset_args(preset: Preset) -> list[str]:
-    """Get CLI arguments for a preset.
+SPEED_CONSTANTS: dict[Speed, list[str]] = {
+    Speed.fast: [
+        # Skip Tesseract OCR and the recognisers that depend on it
+        f"{_OCR_PREFIX}.useOCR=false",
+        f"{_PREFIX}.lyrics=false",
+        f"{_PREFIX}.lyricsAboveStaff=false",
+        f"{_PREFIX}.chordNames=false",
+        # Skip articulation symbols
+        f"{_PREFIX}.articulations=false",
+    ],
+
+    Speed.balanced: [
+        # Audiveris defaults
+    ],
+
+    Speed.accurate: [
+        # Optional rhythm checks, off by default
+        f"{_PREFIX}.implicitTuplets=true",
+        f"{_PREFIX}.partialWholeRests=true",
+        f"{_PREFIX}.multiWholeHeadChords=true",
+    ],
+}
+
+# Switches that need Tesseract OCR
+_OCR_SWITCHES = {f"{_PREFIX}.lyrics", f"{_PREFIX}.lyricsAboveStaff", f"{_PREFIX}.chordNames"}
+
+
+def _constant_key(constant: str) -> str:
+    return constant.split("=", 1)[0]
+
+
+def get_constants(preset: Preset, speed: Speed = Speed.balanced) -> list[str]:
+    """Get Audiveris constants for a preset and speed tier.
+
+    The preset wins over the speed tier: a switch set by the preset is
+    never overridden, and OCR stays on if the preset enables a text
+    feature (e.g. chord names for `jazz`, lyrics for `vocal`).
+    """
+    preset_constants = PRESET_CONSTANTS.get(preset, [])
+    preset_keys = {_constant_key(const) for const in preset_constants}
+    needs_ocr = any(
+        _constant_key(const) in _OCR_SWITCHES and const.endswith("=true")
+        for const in preset_constants
+    )
+
+    speed_constants = []
+    for const in SPEED_CONSTANTS.get(speed, []):
+        key = _constant_key(const)
+        if key in preset_keys:
+            continue
+        if needs_ocr and key == f"{_OCR_PREFIX}.useOCR":
+            continue
+        speed_constants.append(const)
+    return [*preset_constants, *speed_constants]
+
+
+def constant_args(constants: list[str]) -> list[str]:
+    """Get CLI arguments for constants.
 
     Returns a list of ["-constant", "key=value", "-constant", "key=value", ...]
     """
-    constants = PRESET_CONSTANTS.get(preset, [])
     args = []
     for const in constants:
         args.extend(["-constant", const])
@@ -104,3 +168,13 @@ def get_preset_description(preset: Preset) -> str:
         Preset.small_notes: "Scores with cue/small notes and beams",
     }
     return descriptions.get(preset, "Unknown preset")
+
+
+def get_speed_description(speed: Speed) -> str:
+    """Get human-readable description of a speed tier."""
+    descriptions = {
+        Speed.fast: "Skip text OCR (lyrics, chord names) and articulations",
+        Speed.balanced: "Audiveris defaults",
+        Speed.accurate: "Also check implicit tuplets, partial whole rests and multi-whole chords",
+    }
+    return descriptions.get(speed, "Unknown speed")
@@ -0,0 +1,109 @@
+"""Per-step timing profile of an Audiveris run.
+
+Audiveris prints a StopWatch table per sheet on stdout once the sheet
+is processed::
+
+    StopWatch "score#1"
+    -----------------------------------
+       ms      % Task
+    -----------------------------------
+      412  6.1% LOAD
+      ...
+    -----------------------------------
+     6754 100.0% Total
+
+The book log written next to the book (see `api.manifest.find_book_log`)
+gives the wall-clock span of the whole run.
+"""
+
+import re
+from datetime import datetime
+from pathlib import Path
+
+from api.models import TaskProfile
+
+OMR_STEPS = (
+    "LOAD", "BINARY", "SCALE", "GRID", "HEADERS", "STEM_SEEDS", "BEAMS", "LEDGERS",
+    "HEADS", "STEMS", "REDUCTION", "CUE_BEAMS", "TEXTS", "MEASURES", "CHORDS",
+    "CURVES", "SYMBOLS", "LINKS", "RHYTHMS", "PAGE",
+)
+
+_WATCH_HEADER = re.compile(r'^StopWatch "(.+)"\s*$')
+_WATCH_LINE = re.compile(r"^\s*(\d+)\s+[\d.]+%\s+(\S+)\s*$")
+_LOG_TIMESTAMP = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) ")
+
+
+class StepTimingParser:
+    """Collect per-sheet step durations from stdout lines as they arrive."""
+
+    def __init__(self) -> None:
+        self._sheets: dict[str, dict[str, float]] = {}
+        self._current: str | None = None
+
+    def feed(self, line: str) -> None:
+        header = _WATCH_HEADER.match(line)
+        if header:
+            self._current = header.group(1)
+            return
+        if self._current is None:
+            return
+        match = _WATCH_LINE.match(line)
+        if not match:
+            return
+        millis, label = match.groups()
+        if label == "Total":
+            self._current = None
+        elif label in OMR_STEPS:
+            steps = self._sheets.setdefault(self._current, {})
+            steps[label] = steps.get(label, 0.0) + int(millis) / 1000
+
+    @property
+    def sheets(self) -> dict[str, dict[str, float]]:
+        """Step durations (seconds) per sheet."""
+        return {sheet: steps for sheet, steps in self._sheets.items() if steps}
+
+
+def parse_step_timings(stdout: str) -> dict[str, dict[str, float]]:
+    """Extract per-sheet step durations (seconds) from StopWatch tables."""
+    parser = StepTimingParser()
+    for line in stdout.splitlines():
+        parser.feed(line)
+    return parser.sheets
+
+
+def parse_wall_seconds(book_log: Path) -> float | None:
+    """Time between the first and the last timestamped line of the book log."""
+    if not book_log.exists():
+        return None
+    first = last = None
+    with book_log.open(errors="ignore") as handle:
+        for line in handle:
+            match = _LOG_TIMESTAMP.match(line)
+            if match:
+                last = match.group(1)
+                first = first or last
+    if not first:
+        return None
+    fmt = "%Y-%m-%d %H:%M:%S,%f"
+    span = datetime.strptime(last, fmt) - datetime.strptime(first, fmt)
+    return round(span.total_seconds(), 3)
+
+
+def build_profile(sheets: dict[str, dict[str, float]], book_log: Path) -> TaskProfile | None:
+    """Build a task profile from per-sheet step timings (see `StepTimingParser`).
+
+    Returns None when Audiveris reported no step timings.
+    """
+    if not sheets:
+        return None
+    steps: dict[str, float] = {}
+    for sheet_steps in sheets.values():
+        for step, seconds in sheet_steps.items():
+            steps[step] = steps.get(step, 0.0) + seconds
+    ordered = {step: round(steps[step], 3) for step in OMR_STEPS if step in steps}
+    return TaskProfile(
+        steps=ordered,
+        sheets=sheets,
+        total_seconds=round(sum(ordered.values()), 3),
+        wall_seconds=parse_wall_seconds(book_log),
+    )
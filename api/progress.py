@@ -0,0 +1,205 @@
+"""Per-sheet progress of a running task, with early MusicXML of each sheet.
+
+Audiveris only writes MusicXML once the whole book is transcribed and
+exported. In batch mode it does store every sheet into the book (`.omr`)
+as soon as the sheet is transcribed, then logs "Disposed sheet<N>". On
+that line the progress of the task is published to Redis and, with
+`sheet_results`, a snapshot of the book is exported for sheet N alone
+(`-export -sheets N`) by a background Audiveris run, so clients can show
+the first pages while the rest of the book is processed.
+
+Exports run one at a time next to the main run; exports still pending
+when the main run ends are dropped, the book's MusicXML is there anyway.
+Each export costs a JVM launch and a copy of the book, so `sheet_results`
+is off by default. Snapshots are exported in node-local scratch (or the
+system temp dir) and only the resulting `sheet<N>.mxl` reaches
+`sheets_dir`. A sheet with several movements is exported by Audiveris
+as `<book>.sheet#<N>.mvt#<M>.mxl`; every movement is kept, as
+`sheet<N>.mvt<M>.mxl`.
+"""
+
+import os
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+from api.config import settings
+from api.logsink import LogSink
+from api.packing import subprocess_kwargs
+from api.repository import repo
+
+_DISPOSED = re.compile(r"Disposed sheet#?(\d+)\b")
+
+
+def _exported_files(work_dir: Path, radix: str, number: int) -> list[Path]:
+    """MusicXML exported for sheet `number` of book `radix`, one file per movement."""
+    pattern = re.compile(rf"{re.escape(radix)}(?:\.sheet#{number})?(?:\.mvt#?(\d+))?\.mxl")
+    movements = []
+    for path in work_dir.glob("*.mxl"):
+        match = pattern.fullmatch(path.name)
+        if match:
+            movements.append((int(match.group(1) or 0), path))
+    return [path for _, path in sorted(movements)]
+
+
+class SheetProgress:
+    """Sheets done by the Audiveris runs of one task, saved in `task["progress"]`."""
+
+    def __init__(self, task: dict, sheets_dir: Path, work_dir: Path | None = None) -> None:
+        self._task = task
+        self.sheets_dir = sheets_dir
+        self._work_dir = work_dir  # Node-local dir for snapshots; None = a temp dir per export
+        self._lock = threading.Lock()
+        self._exports: queue.Queue[int | None] = queue.Queue()
+        self._exporting: subprocess.Popen | None = None
+        self._stopped = False
+        self._book: Path | None = None
+        self._cpu_set: frozenset[int] | None = None
+        self._url_for: Callable[[Path], str | None] = lambda path: None
+        progress = task.setdefault("progress", {})
+        # Sheets finished by an earlier attempt of the task stay finished
+        self._sheets: dict[int, list[str]] = {
+            sheet["number"]: sheet.get("movements") or [url for url in [sheet.get("url")] if url]
+            for sheet in progress.get("sheets", [])
+        }
+
+    @property
+    def paths(self) -> list[Path]:
+        """MusicXML files exported for single sheets so far."""
+        return sorted(self.sheets_dir.glob("sheet*.mxl")) if self.sheets_dir.is_dir() else []
+
+    @contextmanager
+    def watch(
+        self,
+        sink: LogSink,
+        book_path: Path,
+        total: int,
+        cpu_set: frozenset[int] | None,
+        url_for: Callable[[Path], str | None],
+    ) -> Iterator[None]:
+        """Follow the sheets of an Audiveris run that transcribes `book_path`."""
+        self._book, self._cpu_set, self._url_for = book_path, cpu_set, url_for
+        self._publish(total)
+        exporter = None
+        if settings.sheet_results and total > 1:
+            self._stopped = False
+            exporter = threading.Thread(target=self._export_loop, name="sheet-exporter", daemon=True)
+            exporter.start()
+        sink.listeners.append(self.feed)
+        try:
+            yield
+        finally:
+            sink.listeners.remove(self.feed)
+            if exporter:
+                self._stop_exports()
+                exporter.join()
+
+    def feed(self, line: str) -> None:
+        """Inspect a stdout line of Audiveris for a finished sheet."""
+        match = _DISPOSED.search(line)
+        if not match:
+            return
+        number = int(match.group(1))
+        with self._lock:
+            if number in self._sheets:
+                return
+            self._sheets[number] = []
+            self._save()
+        self._exports.put(number)
+
+    def _publish(self, total: int) -> None:
+        with self._lock:
+            self._task["progress"]["sheets_total"] = total
+            self._save()
+
+    def _save(self) -> None:
+        """Write the sheet list into the task record (lock held)."""
+        progress = self._task["progress"]
+        progress["sheets_completed"] = len(self._sheets)
+        progress["sheets"] = [
+            {"number": number, "url": urls[0] if urls else None, "movements": urls if len(urls) > 1 else []}
+            for number, urls in sorted(self._sheets.items())
+        ]
+        repo.save(self._task)
+
+    def _export_loop(self) -> None:
+        while (number := self._exports.get()) is not None:
+            paths = self._export_sheet(number)
+            if paths:
+                with self._lock:
+                    self._sheets[number] = [url for url in map(self._url_for, paths) if url]
+                    self._save()
+
+    def _stop_exports(self) -> None:
+        """Drop pending exports and stop the running one."""
+        while True:
+            try:
+                self._exports.get_nowait()
+            except queue.Empty:
+                break
+        self._exports.put(None)
+        with self._lock:
+            self._stopped = True
+            process = self._exporting
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def _export_sheet(self, number: int) -> list[Path]:
+        """MusicXML of one sheet (a file per movement), exported from a snapshot of the book."""
+        try:
+            if self._work_dir is not None:
+                work_dir = self._work_dir / f"sheet{number}"
+                work_dir.mkdir(parents=True, exist_ok=True)
+            else:
+                work_dir = Path(tempfile.mkdtemp(prefix=f"sheet{number}-"))
+        except OSError:
+            return []
+        try:
+            # Audiveris replaces the book file on every store, a copy is consistent
+            snapshot = work_dir / f"sheet{number}.omr"
+            shutil.copyfile(self._book, snapshot)
+            cmd = [
+                settings.audiveris_cmd,
+                "-batch",
+                "-export", "-sheets", str(number),
+                "-output", str(work_dir),
+                str(snapshot),
+            ]
+            with self._lock:
+                if self._stopped:
+                    return []
+                process = self._exporting = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    **subprocess_kwargs(self._cpu_set),
+                )
+            returncode = process.wait()
+            exported = _exported_files(work_dir, snapshot.stem, number)
+            if returncode != 0 or not exported:
+                return []
+            names = (
+                [f"sheet{number}.mxl"] if len(exported) == 1
+                else [f"sheet{number}.mvt{movement}.mxl" for movement in range(1, len(exported) + 1)]
+            )
+            # Scratch is usually another filesystem: copy, then rename in place
+            self.sheets_dir.mkdir(parents=True, exist_ok=True)
+            targets = []
+            for source, name in zip(exported, names):
+                partial = self.sheets_dir / f".{name}.part"
+                shutil.copyfile(source, partial)
+                os.replace(partial, self.sheets_dir / name)
+                targets.append(self.sheets_dir / name)
+            return targets
+        except OSError:
+            return []
+        finally:
+            with self._lock:
+                self._exporting = None
+            shutil.rmtree(work_dir, ignore_errors=True)
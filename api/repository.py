@@ -1,10 +1,17 @@
 import json
+import os
+import socket
+import uuid
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Callable
 
 import redis
 
 from api.config import settings
+from api.profile import OMR_STEPS
+
+# This process as the owner of the input runs it registers (the suffix tells restarts apart)
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
 
 
 class TaskRepository:
@@ -24,6 +31,8 @@ class TaskRepository:
             if not expires_at:
                 expires_at = int(datetime.now(timezone.utc).timestamp()) + settings.task_ttl_seconds
                 task["expires_at"] = expires_at
+                dirs = [task[name] for name in ("input_dir", "output_dir") if task.get(name)]
+                self.schedule_expiry(dirs, expires_at)
         key = self._task_key(task["id"])
         self._redis.set(key, json.dumps(task, sort_keys=True, default=str))
         if settings.task_ttl_seconds > 0 and task.get("expires_at"):
@@ -38,6 +47,20 @@ class TaskRepository:
         except json.JSONDecodeError:
             return None
 
+    def get_many(self, task_ids: list[str]) -> dict[str, dict[str, Any]]:
+        """Tasks by id, read with one MGET (unknown and unreadable ids are left out)."""
+        if not task_ids:
+            return {}
+        tasks = {}
+        for task_id, payload in zip(task_ids, self._redis.mget([self._task_key(task_id) for task_id in task_ids])):
+            if not payload:
+                continue
+            try:
+                tasks[task_id] = json.loads(payload)
+            except json.JSONDecodeError:
+                continue
+        return tasks
+
     def update(self, task_id: str, **fields: Any) -> dict[str, Any] | None:
         task = self.get(task_id)
         if not task:
@@ -46,10 +69,33 @@ class TaskRepository:
         self.save(task)
         return task
 
-    def enqueue(self, task_id: str) -> None:
-        self._redis.rpush(settings.task_queue_key, task_id)
+    def enqueue(self, task_id: str, deadline: datetime | str | None = None) -> None:
+        """Queue a task; tasks with a deadline go first, earliest deadline first."""
+        if deadline is None:
+            self._redis.rpush(settings.task_queue_key, task_id)
+            return
+        if isinstance(deadline, str):
+            deadline = datetime.fromisoformat(deadline)
+        self._redis.zadd(settings.deadline_queue_key, {task_id: deadline.timestamp()})
 
     def dequeue(self, timeout: int = 0) -> str | None:
+        """Next task: a close deadline first, then FIFO, then the earliest deadline.
+
+        A deadline further than `deadline_priority_seconds` does not jump
+        the FIFO queue, so a generous deadline is no way to skip it.
+        """
+        close = datetime.now(timezone.utc).timestamp() + settings.deadline_priority_seconds
+        urgent = self._redis.zrangebyscore(settings.deadline_queue_key, "-inf", close, start=0, num=1)
+        # Another worker may have taken it in the meantime
+        if urgent and self._redis.zrem(settings.deadline_queue_key, urgent[0]):
+            return urgent[0]
+        task_id = self._redis.lpop(settings.task_queue_key)
+        if task_id:
+            return task_id
+        popped = self._redis.zpopmin(settings.deadline_queue_key)
+        if popped:
+            task_id, _ = popped[0]
+            return task_id
         item = self._redis.blpop(settings.task_queue_key, timeout=timeout)
         if not item:
             return None
@@ -57,11 +103,227 @@ class TaskRepository:
         return task_id
 
     def queue_depth(self) -> int:
-        return self._redis.llen(settings.task_queue_key)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.llen(settings.task_queue_key)
+        pipe.zcard(settings.deadline_queue_key)
+        return sum(pipe.execute())
+
+    def schedule_expiry(self, paths: list[str], expires_at: float) -> None:
+        """Register storage directories for removal at `expires_at` (or move it)."""
+        if paths:
+            self._redis.zadd(settings.expiry_key, {str(path): expires_at for path in paths})
+
+    def pop_expired(self, now: float, limit: int) -> list[str]:
+        """Take up to `limit` expired directories off the index."""
+        paths = self._redis.zrangebyscore(settings.expiry_key, "-inf", now, start=0, num=limit)
+        if not paths:
+            return []
+        pipe = self._redis.pipeline(transaction=False)
+        for path in paths:
+            pipe.zrem(settings.expiry_key, path)
+        # Another process may have taken some of them in the meantime
+        return [path for path, removed in zip(paths, pipe.execute()) if removed]
+
+    def expiry_scheduled(self, paths: list[str]) -> list[bool]:
+        pipe = self._redis.pipeline(transaction=False)
+        for path in paths:
+            pipe.zscore(settings.expiry_key, path)
+        return [score is not None for score in pipe.execute()] if paths else []
+
+    def claim_reconcile(self, interval_seconds: int) -> bool:
+        """Whether this process should run the orphan walk now (one per interval)."""
+        key = f"{settings.expiry_key}:reconciled"
+        return bool(self._redis.set(key, self._now(), nx=True, ex=max(interval_seconds, 1)))
+
+    def record_output_size(self, path: str, size: int) -> None:
+        """Store the size of an output dir and adjust the total usage."""
+        previous = int(self._redis.hget(settings.usage_key, path) or 0)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hset(settings.usage_key, path, size)
+        pipe.incrby(f"{settings.usage_key}:total", size - previous)
+        pipe.execute()
+
+    def touch_output(self, path: str, ts: float) -> None:
+        self._redis.zadd(settings.lru_key, {path: ts})
+
+    def storage_usage(self) -> int:
+        """Total size of tracked output dirs in bytes."""
+        return int(self._redis.get(f"{settings.usage_key}:total") or 0)
+
+    def least_recent_outputs(self, limit: int) -> list[str]:
+        return self._redis.zrange(settings.lru_key, 0, limit - 1)
+
+    def forget_output(self, path: str) -> int:
+        """Stop tracking a removed output dir; returns its recorded size."""
+        size = int(self._redis.hget(settings.usage_key, path) or 0)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hdel(settings.usage_key, path)
+        pipe.zrem(settings.lru_key, path)
+        if size:
+            pipe.decrby(f"{settings.usage_key}:total", size)
+        pipe.execute()
+        return size
+
+    def _running_inputs_key(self) -> str:
+        return f"{settings.attempts_key}:running"
+
+    def _owner_key(self, owner: str) -> str:
+        return f"{settings.attempts_key}:owner:{owner}"
+
+    def heartbeat(self) -> None:
+        """Mark this process alive, so the runs it registered are not reconciled."""
+        self._redis.set(self._owner_key(PROCESS_ID), self._now(), ex=settings.worker_heartbeat_seconds * 3)
+
+    def start_input_attempt(self, input_hash: str, task_id: str) -> int:
+        """Register a run of the input by a task of this process.
+
+        Returns the runs of the input that crashed or hung so far, plus
+        this one. Concurrent runs of the same input do not count.
+        """
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.set(self._owner_key(PROCESS_ID), self._now(), ex=settings.worker_heartbeat_seconds * 3)
+        pipe.hset(self._running_inputs_key(), task_id, json.dumps({"input_hash": input_hash, "owner": PROCESS_ID}))
+        pipe.hget(settings.attempts_key, input_hash)
+        _, _, failed = pipe.execute()
+        return int(failed or 0) + 1
+
+    def finish_input_attempt(self, input_hash: str, task_id: str, failed: bool = False) -> None:
+        """Unregister a run of the input; a `failed` (hung) run counts against the input."""
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hdel(self._running_inputs_key(), task_id)
+        if failed:
+            pipe.hincrby(settings.attempts_key, input_hash, 1)
+        pipe.execute()
+
+    def reconcile_input_attempts(self) -> int:
+        """Count runs left registered by a process that died as crashed runs of their inputs.
+
+        A process is dead once its heartbeat expired; runs of live
+        processes (this one or other nodes) are left alone.
+        """
+        running = {}
+        for task_id, payload in self._redis.hgetall(self._running_inputs_key()).items():
+            try:
+                running[task_id] = json.loads(payload)
+            except json.JSONDecodeError:
+                continue
+        owners = sorted({entry.get("owner", "") for entry in running.values()})
+        pipe = self._redis.pipeline(transaction=False)
+        for owner in owners:
+            pipe.exists(self._owner_key(owner))
+        alive = {owner for owner, exists in zip(owners, pipe.execute()) if exists}
+
+        crashed = 0
+        for task_id, entry in running.items():
+            if entry.get("owner") in alive:
+                continue
+            # Another starting process may reconcile the same run
+            if self._redis.hdel(self._running_inputs_key(), task_id):
+                self._redis.hincrby(settings.attempts_key, entry["input_hash"], 1)
+                crashed += 1
+        return crashed
+
+    def quarantine(self, input_hash: str, entry: dict[str, Any]) -> None:
+        self._redis.hset(settings.quarantine_key, input_hash, json.dumps(entry, default=str))
+
+    def is_quarantined(self, input_hash: str) -> bool:
+        return bool(self._redis.hexists(settings.quarantine_key, input_hash))
+
+    def quarantined(self) -> list[dict[str, Any]]:
+        entries = []
+        for input_hash, payload in self._redis.hgetall(settings.quarantine_key).items():
+            try:
+                entries.append({"input_hash": input_hash, **json.loads(payload)})
+            except json.JSONDecodeError:
+                continue
+        return sorted(entries, key=lambda entry: entry.get("quarantined_at", ""))
+
+    def release(self, input_hash: str) -> bool:
+        """Remove an input from quarantine and reset its attempts."""
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hdel(settings.quarantine_key, input_hash)
+        pipe.hdel(settings.attempts_key, input_hash)
+        removed, _ = pipe.execute()
+        return bool(removed)
+
+    def release_all(self) -> int:
+        """Empty the quarantine; returns the number of released inputs."""
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hlen(settings.quarantine_key)
+        pipe.delete(settings.quarantine_key, settings.attempts_key)
+        count, _ = pipe.execute()
+        return count
+
+    def _profile_key(self, preset: str) -> str:
+        return f"{settings.profile_key_prefix}{preset}"
+
+    def _speed_profile_key(self, speed: str) -> str:
+        return f"{settings.profile_key_prefix}speed:{speed}"
+
+    def _preset_speed_profile_key(self, pair: tuple[str, str]) -> str:
+        preset, speed = pair
+        return f"{settings.profile_key_prefix}{preset}:speed:{speed}"
+
+    def record_profile(self, preset: str, speed: str, profile: dict[str, Any]) -> None:
+        """Add a task profile to the running per-preset, per-speed and per-pair totals."""
+        pipe = self._redis.pipeline(transaction=False)
+        keys = (
+            self._profile_key(preset),
+            self._speed_profile_key(speed),
+            self._preset_speed_profile_key((preset, speed)),
+        )
+        for key in keys:
+            pipe.hincrby(key, "tasks", 1)
+            pipe.hincrbyfloat(key, "total_seconds", profile.get("total_seconds", 0.0))
+            for step, seconds in profile.get("steps", {}).items():
+                pipe.hincrbyfloat(key, f"step:{step}", seconds)
+        pipe.execute()
+
+    def preset_profiles(self, presets: list[str]) -> list[dict[str, Any]]:
+        """Average step durations per preset (presets without samples are skipped)."""
+        profiles = self._profiles(presets, self._profile_key)
+        return [{"preset": profile.pop("name"), **profile} for profile in profiles]
+
+    def speed_profiles(self, speeds: list[str]) -> list[dict[str, Any]]:
+        """Average step durations per speed tier (tiers without samples are skipped)."""
+        return self._profiles(speeds, self._speed_profile_key)
+
+    def preset_speed_profiles(self, presets: list[str], speeds: list[str]) -> list[dict[str, Any]]:
+        """Average step durations per (preset, speed) pair (pairs without samples are skipped)."""
+        pairs = [(preset, speed) for preset in presets for speed in speeds]
+        profiles = []
+        for profile in self._profiles(pairs, self._preset_speed_profile_key):
+            preset, speed = profile.pop("name")
+            profiles.append({"preset": preset, "speed": speed, **profile})
+        return profiles
+
+    def _profiles(self, names: list[Any], key_for: Callable[[Any], str]) -> list[dict[str, Any]]:
+        pipe = self._redis.pipeline(transaction=False)
+        for name in names:
+            pipe.hgetall(key_for(name))
+        profiles = []
+        for name, totals in zip(names, pipe.execute()):
+            tasks = int(totals.get("tasks", 0))
+            if not tasks:
+                continue
+            steps = {
+                step: round(float(totals[f"step:{step}"]) / tasks, 3)
+                for step in OMR_STEPS
+                if f"step:{step}" in totals
+            }
+            profiles.append({
+                "name": name,
+                "tasks": tasks,
+                "avg_seconds": round(float(totals.get("total_seconds", 0.0)) / tasks, 3),
+                "steps": steps,
+            })
+        return profiles
 
     def requeue_running_tasks(self) -> None:
+        """Requeue tasks left running by a process that died; their runs count as crashes."""
         if not settings.requeue_running:
             return
+        self.reconcile_input_attempts()
         cursor = 0
         pattern = f"{settings.task_key_prefix}*"
         while True:
@@ -78,7 +340,7 @@ class TaskRepository:
                     task["status"] = "queued"
                     task_id = task.get("id", key[len(settings.task_key_prefix):])
                     self.save(task)
-                    self._redis.rpush(settings.task_queue_key, task_id)
+                    self.enqueue(task_id, task.get("deadline"))
             if cursor == 0:
                 break
 
@@ -1,21 +1,42 @@
+import asyncio
+import hashlib
 import sys
+import time
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
-from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile, Depends
-from pypdf import PdfReader
+from fastapi import APIRouter, File, Form, HTTPException, Query, Request, Response, UploadFile, Depends
 
+from api.autoscaler import autoscaler
 from api.config import settings
 from api.deps import get_api_key
+from api.downloads import FileRangeResponse, log_response, zip_response
+from api.inputs import HEADER_SIZE, detect_file_type, file_type_of, pdf_page_count
+from api.manifest import find_book_log, scan_output_dir
+from api.metrics import UPLOAD_BYTES, UPLOAD_SECONDS, render
 from api.models import (
     HealthResponse,
+    OutputManifest,
+    PresetInfo,
+    PresetProfile,
+    PresetsResponse,
+    QuarantineEntry,
+    SpeedEffect,
+    SpeedInfo,
     TaskCreateResponse,
+    TaskProfile,
     TaskResponse,
     TaskStatus,
+    TaskStatusBatch,
+    TaskStatusEntry,
+    TaskStatusRequest,
+    UploadResponse,
 )
-from api.presets import Preset
+from api.objectstore import UPLOAD_PREFIX, object_store
+from api.presets import Preset, Speed
 from api.repository import repo
+from api.storage import free_disk_mb, touch_output
 
 router = APIRouter(tags=["API"], dependencies=[Depends(get_api_key)])
 
@@ -30,44 +51,19 @@ def _safe_name(name: str, default: str) -> str:
     return Path(name).name or default
 
 
-async def _save_file(file: UploadFile, path: Path) -> None:
-    """Сохранить загруженный файл на диск."""
+async def _save_file(file: UploadFile, path: Path) -> tuple[int, str]:
+    """Сохранить загруженный файл на диск, вернуть размер в байтах и sha256."""
+    size = 0
+    digest = hashlib.sha256()
     with path.open("wb") as handle:
         while True:
             chunk = await file.read(1024 * 1024)
             if not chunk:
                 break
             handle.write(chunk)
-
-
-def _get_pdf_page_count(path: Path) -> int:
-    """Получить количество страниц в PDF файле."""
-    reader = PdfReader(path)
-    return len(reader.pages)
-
-
-# Magic bytes для поддерживаемых форматов
-MAGIC_PDF = b"%PDF"
-MAGIC_PNG = b"\x89PNG"
-MAGIC_JPEG = b"\xff\xd8\xff"
-MAGIC_WEBP_RIFF = b"RIFF"
-MAGIC_WEBP_WEBP = b"WEBP"
-
-
-def _detect_file_type(path: Path) -> str | None:
-    """Определить тип файла по magic bytes."""
-    with path.open("rb") as f:
-        header = f.read(12)
-
-    if header.startswith(MAGIC_PDF):
-        return "pdf"
-    if header.startswith(MAGIC_PNG):
-        return "png"
-    if header.startswith(MAGIC_JPEG):
-        return "jpeg"
-    if header.startswith(MAGIC_WEBP_RIFF) and header[8:12] == MAGIC_WEBP_WEBP:
-        return "webp"
-    return None
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest.hexdigest()
 
 
 def _create_task_dirs(task_id: str) -> tuple[Path, Path]:
@@ -79,6 +75,22 @@ def _create_task_dirs(task_id: str) -> tuple[Path, Path]:
     return input_dir, output_dir
 
 
+def _resolve_deadline(deadline: datetime | None, max_wait_seconds: int | None) -> datetime | None:
+    """Дедлайн задачи: раньший из `deadline` и `now + max_wait_seconds`."""
+    now = datetime.now(timezone.utc)
+    candidates = []
+    if deadline is not None:
+        candidates.append(deadline if deadline.tzinfo else deadline.replace(tzinfo=timezone.utc))
+    if max_wait_seconds is not None:
+        candidates.append(now + timedelta(seconds=max_wait_seconds))
+    if not candidates:
+        return None
+    resolved = min(candidates)
+    if resolved <= now:
+        raise HTTPException(status_code=400, detail="Deadline is already in the past")
+    return resolved
+
+
 def _build_task(
     task_id: str,
     input_dir: Path,
@@ -86,6 +98,9 @@ def _build_task(
     input_files: list[str],
     playlist: bool,
     preset: str = "default",
+    speed: str = "balanced",
+    input_hash: str | None = None,
+    deadline: datetime | None = None,
 ) -> dict:
     """Создать словарь задачи."""
     return {
@@ -95,6 +110,9 @@ def _build_task(
         "updated_at": _now(),
         "playlist": playlist,
         "preset": preset,
+        "speed": speed,
+        "input_hash": input_hash,
+        "deadline": deadline.isoformat() if deadline else None,
         "input_files": input_files,
         "input_dir": str(input_dir),
         "output_dir": str(output_dir),
@@ -104,6 +122,81 @@ def _build_task(
     }
 
 
+@router.post(
+    "/uploads",
+    response_model=UploadResponse,
+    summary="Получить ссылку для загрузки файла",
+    description="""
+Получить pre-signed URL для загрузки файла напрямую в S3-совместимое хранилище
+(MinIO), минуя API.
+
+1. `POST /uploads` с именем файла — ответ содержит `uploadUrl` и `objectKey`.
+2. `PUT` файла на `uploadUrl` (тело запроса — содержимое файла).
+3. `POST /tasks/single` с полем `object_key` вместо `file`.
+
+Файл скачивает воркер перед обработкой. Ссылка действительна
+`UPLOAD_URL_TTL_SECONDS` секунд.
+""",
+    responses={
+        200: {"description": "Ссылка создана"},
+        503: {"description": "Хранилище для прямой загрузки не настроено"},
+    },
+)
+async def create_upload(
+    filename: str = Form(..., description="Имя загружаемого файла"),
+) -> UploadResponse:
+    """Выдать pre-signed URL для загрузки одного файла."""
+    if not object_store.enabled:
+        raise HTTPException(status_code=503, detail="Direct uploads are not configured")
+    object_key = object_store.new_key(_safe_name(filename, "input-0"))
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.upload_url_ttl_seconds)
+    return UploadResponse(
+        object_key=object_key,
+        upload_url=object_store.presign_put(object_key),
+        expires_at=expires_at.isoformat(),
+    )
+
+
+async def _create_object_task(
+    object_key: str,
+    preset: Preset,
+    speed: Speed,
+    deadline: datetime | None,
+) -> TaskCreateResponse:
+    """Создать задачу для файла, загруженного в хранилище через POST /uploads."""
+    if not object_store.enabled:
+        raise HTTPException(status_code=503, detail="Direct uploads are not configured")
+    if not object_key.startswith(UPLOAD_PREFIX) or ".." in object_key:
+        raise HTTPException(status_code=400, detail="Unknown object key")
+    # Только заголовок файла: сам файл скачивает воркер
+    header = await asyncio.to_thread(object_store.read_header, object_key, HEADER_SIZE)
+    if header is None:
+        raise HTTPException(status_code=400, detail="Object not found, upload the file first")
+    if file_type_of(header) is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Неподдерживаемый формат файла. Разрешены: PNG, JPG, WebP, PDF",
+        )
+
+    task_id = uuid.uuid4().hex
+    input_dir, output_dir = _create_task_dirs(task_id)
+    task = _build_task(
+        task_id=task_id,
+        input_dir=input_dir,
+        output_dir=output_dir,
+        input_files=[_safe_name(object_key, "input-0")],
+        playlist=False,
+        preset=preset.value,
+        speed=speed.value,
+        deadline=deadline,
+    )
+    task["input_object"] = object_key
+    repo.save(task)
+    repo.enqueue(task_id, deadline)
+
+    return TaskCreateResponse(task_id=task_id, status=TaskStatus.queued)
+
+
 @router.post(
     "/tasks/single",
     response_model=TaskCreateResponse,
@@ -114,6 +207,9 @@ def _build_task(
 Загрузите один файл изображения (PNG, JPG, WebP) или PDF (до 5 страниц) с нотами.
 Задача будет добавлена в очередь на обработку Audiveris.
 
+Вместо `file` можно передать `object_key` файла, загруженного напрямую
+в хранилище (см. `POST /uploads`).
+
 ## Пресеты
 
 | Пресет | Описание |
@@ -127,25 +223,59 @@ def _build_task(
 | `vocal` | Вокал с текстом (не проверял, не понятно что проверять, но режим существует)|
 | `piano` | Фортепиано |
 | `small_notes` | Ноты с cue/маленькими нотами |
+
+## Скорость
+
+| Значение | Описание |
+|----------|----------|
+| `fast` | Без OCR текста (слова, аккорды) и артикуляции |
+| `balanced` | Настройки Audiveris по умолчанию |
+| `accurate` | Дополнительные проверки ритма |
+
+Распознаватели, включённые пресетом, уровень скорости не отключает.
+
+## Дедлайн
+
+Необязательные `deadline` (ISO 8601) и `max_wait_seconds` (секунды от создания).
+Если задача не успела завершиться к дедлайну, она получает статус `expired`
+вместо запуска Audiveris. Задачи, до дедлайна которых осталось не больше
+`DEADLINE_PRIORITY_SECONDS`, берутся из очереди раньше, в порядке дедлайна;
+остальные — в общем порядке. `max_wait_seconds` — не больше
+`MAX_WAIT_LIMIT_SECONDS`.
 """,
     responses={
         200: {"description": "Задача успешно создана"},
         400: {"description": "Неподдерживаемый формат (разрешены: PNG, JPG, WebP, PDF) или PDF превышает лимит в 5 страниц"},
+        503: {"description": "Передан object_key, но прямая загрузка не настроена"},
     },
 )
 async def create_single_task(
-    file: UploadFile = File(..., description="Файл изображения (PNG, JPG, WebP) или PDF (до 5 страниц)"),
+    file: UploadFile | None = File(None, description="Файл изображения (PNG, JPG, WebP) или PDF (до 5 страниц)"),
+    object_key: str | None = Form(None, description="Ключ файла из POST /uploads (вместо file)"),
     preset: Preset = Form(Preset.default, description="Пресет обработки"),
+    speed: Speed = Form(Speed.balanced, description="Скорость/точность: fast, balanced, accurate"),
+    deadline: datetime | None = Form(None, description="Результат не нужен после этого времени (ISO 8601)"),
+    max_wait_seconds: int | None = Form(
+        None, gt=0, le=settings.max_wait_limit_seconds, description="Результат не нужен через столько секунд"
+    ),
 ) -> TaskCreateResponse:
     """Создать задачу OMR для одного файла."""
+    if (file is None) == (object_key is None):
+        raise HTTPException(status_code=400, detail="Provide either a file or an object_key")
+    task_deadline = _resolve_deadline(deadline, max_wait_seconds)
+    if object_key is not None:
+        return await _create_object_task(object_key, preset, speed, task_deadline)
     task_id = uuid.uuid4().hex
     input_dir, output_dir = _create_task_dirs(task_id)
 
     input_name = _safe_name(file.filename, "input-0")
     input_path = input_dir / input_name
-    await _save_file(file, input_path)
+    started = time.perf_counter()
+    size, input_hash = await _save_file(file, input_path)
+    UPLOAD_SECONDS.labels(preset.value).observe(time.perf_counter() - started)
+    UPLOAD_BYTES.labels(preset.value).observe(size)
 
-    file_type = _detect_file_type(input_path)
+    file_type = detect_file_type(input_path)
     print(file_type)
     if file_type is None:
         input_path.unlink()
@@ -157,7 +287,7 @@ async def create_single_task(
         )
 
     if file_type == "pdf":
-        page_count = _get_pdf_page_count(input_path)
+        page_count = pdf_page_count(input_path)
         if page_count > 5:
             input_path.unlink()
             input_dir.rmdir()
@@ -174,9 +304,12 @@ async def create_single_task(
         input_files=[input_name],
         playlist=False,
         preset=preset.value,
+        speed=speed.value,
+        input_hash=input_hash,
+        deadline=task_deadline,
     )
     repo.save(task)
-    repo.enqueue(task_id)
+    repo.enqueue(task_id, task_deadline)
 
     return TaskCreateResponse(task_id=task_id, status=TaskStatus.queued)
 
@@ -205,6 +338,25 @@ async def create_single_task(
 | `vocal` | Вокал с текстом |
 | `piano` | Фортепиано |
 | `small_notes` | Ноты с cue/маленькими нотами |
+
+## Скорость
+
+| Значение | Описание |
+|----------|----------|
+| `fast` | Без OCR текста (слова, аккорды) и артикуляции |
+| `balanced` | Настройки Audiveris по умолчанию |
+| `accurate` | Дополнительные проверки ритма |
+
+Распознаватели, включённые пресетом, уровень скорости не отключает.
+
+## Дедлайн
+
+Необязательные `deadline` (ISO 8601) и `max_wait_seconds` (секунды от создания).
+Если задача не успела завершиться к дедлайну, она получает статус `expired`
+вместо запуска Audiveris. Задачи, до дедлайна которых осталось не больше
+`DEADLINE_PRIORITY_SECONDS`, берутся из очереди раньше, в порядке дедлайна;
+остальные — в общем порядке. `max_wait_seconds` — не больше
+`MAX_WAIT_LIMIT_SECONDS`.
 """,
     responses={
         200: {"description": "Задача успешно создана"},
@@ -214,19 +366,33 @@ async def create_single_task(
 async def create_batch_task(
     files: list[UploadFile] = File(..., description="Файлы изображений (PNG, JPG)"),
     preset: Preset = Form(Preset.default, description="Пресет обработки"),
+    speed: Speed = Form(Speed.balanced, description="Скорость/точность: fast, balanced, accurate"),
+    deadline: datetime | None = Form(None, description="Результат не нужен после этого времени (ISO 8601)"),
+    max_wait_seconds: int | None = Form(
+        None, gt=0, le=settings.max_wait_limit_seconds, description="Результат не нужен через столько секунд"
+    ),
 ) -> TaskCreateResponse:
     """Создать задачу OMR для нескольких файлов (плейлист)."""
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
+    task_deadline = _resolve_deadline(deadline, max_wait_seconds)
 
     task_id = uuid.uuid4().hex
     input_dir, output_dir = _create_task_dirs(task_id)
 
     input_files: list[str] = []
+    started = time.perf_counter()
+    size = 0
+    digests: list[str] = []
     for i, file in enumerate(files):
         input_name = _safe_name(f"{i}-{file.filename}", f"input-{i}")
-        await _save_file(file, input_dir / input_name)
+        file_size, file_digest = await _save_file(file, input_dir / input_name)
+        size += file_size
+        digests.append(file_digest)
         input_files.append(input_name)
+    input_hash = hashlib.sha256("".join(digests).encode()).hexdigest()
+    UPLOAD_SECONDS.labels(preset.value).observe(time.perf_counter() - started)
+    UPLOAD_BYTES.labels(preset.value).observe(size)
 
     task = _build_task(
         task_id=task_id,
@@ -235,13 +401,106 @@ async def create_batch_task(
         input_files=input_files,
         playlist=True,
         preset=preset.value,
+        speed=speed.value,
+        input_hash=input_hash,
+        deadline=task_deadline,
     )
     repo.save(task)
-    repo.enqueue(task_id)
+    repo.enqueue(task_id, task_deadline)
 
     return TaskCreateResponse(task_id=task_id, status=TaskStatus.queued)
 
 
+def _visible_outputs(task: dict) -> tuple[dict | None, dict | None]:
+    """Прогресс и результат задачи; у вытесненной задачи ссылки на файлы убираются."""
+    progress, results = task.get("progress"), task.get("results")
+    if not task.get("evicted_at"):
+        return progress, results
+    if progress and progress.get("sheets"):
+        progress = {
+            **progress,
+            "sheets": [{**sheet, "url": None, "movements": []} for sheet in progress["sheets"]],
+        }
+    if results:
+        results = {**results, "url": None, "log_url": None}
+    return progress, results
+
+
+def _updated_since(task: dict, since: datetime) -> bool:
+    try:
+        return datetime.fromisoformat(task["updated_at"]) >= since
+    except (KeyError, TypeError, ValueError):
+        return True  # Без времени обновления задача отдаётся всегда
+
+
+@router.post(
+    "/tasks/status",
+    response_model=TaskStatusBatch,
+    summary="Статусы нескольких задач",
+    description="""
+Статусы до `MAX_STATUS_IDS` задач одним запросом (одно чтение из Redis вместо
+запроса `GET /tasks/{task_id}` на каждую задачу).
+
+```json
+{"ids": ["a1b2...", "c3d4..."], "updatedSince": "2026-01-01T12:00:00+00:00"}
+```
+
+- **tasks** — id → краткий статус: **status**, **updatedAt**, **progress**,
+  **url** (MusicXML завершённой задачи), **error**
+- **missing** — неизвестные id (или задачи, удалённые по TTL)
+- **checkedAt** — время запроса минус `STATUS_POLL_MARGIN_SECONDS`
+
+С **updatedSince** в **tasks** попадают только задачи, обновлённые с этого
+момента. Опрашивающий клиент передаёт в следующий запрос `checkedAt` из
+предыдущего ответа и получает только изменения. `checkedAt` сдвинут назад
+на запас (записи, которые ещё не дошли до Redis, и расхождение часов узлов),
+поэтому задача, обновлённая незадолго до запроса, может прийти повторно —
+клиент сравнивает `updatedAt`.
+""",
+    responses={
+        200: {"description": "Статусы задач"},
+        400: {"description": "Слишком много id"},
+    },
+)
+async def get_task_statuses(request: TaskStatusRequest) -> TaskStatusBatch:
+    """Получить статусы нескольких задач."""
+    ids = list(dict.fromkeys(request.ids))
+    if len(ids) > settings.max_status_ids:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many task ids (max {settings.max_status_ids})",
+        )
+
+    # Workers stamp updated_at before their write lands, on their own clocks:
+    # the next poll starts a margin earlier so no update falls between two polls
+    checked_at = (
+        datetime.now(timezone.utc) - timedelta(seconds=settings.status_poll_margin_seconds)
+    ).isoformat()
+    tasks = repo.get_many(ids)
+    since = request.updated_since
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    statuses = {}
+    for task_id, task in tasks.items():
+        if since is not None and not _updated_since(task, since):
+            continue
+        progress, results = _visible_outputs(task)
+        statuses[task_id] = TaskStatusEntry(
+            status=task["status"],
+            updated_at=task.get("updated_at"),
+            progress=progress,
+            url=(results or {}).get("url"),
+            error=task.get("errors"),
+            evicted_at=task.get("evicted_at"),
+        )
+    return TaskStatusBatch(
+        checked_at=checked_at,
+        tasks=statuses,
+        missing=[task_id for task_id in ids if task_id not in tasks],
+    )
+
+
 @router.get(
     "/tasks/{task_id}",
     response_model=TaskResponse,
@@ -257,6 +516,7 @@ async def create_batch_task(
 | `running` | Обрабатывается | Повторить запрос через 5-10 сек |
 | `completed` | Успешно завершена | Забрать результат из `results` |
 | `error` | Завершена с ошибкой | Показать ошибку из `errors` |
+| `expired` | Не успела к дедлайну | Создать задачу заново, если результат ещё нужен |
 
 ## Поля ответа
 
@@ -266,10 +526,15 @@ async def create_batch_task(
 - **progress.total** — общее количество файлов для обработки
 - **progress.completed** — успешно обработано
 - **progress.failed** — завершилось с ошибкой
+- **progress.sheetsTotal**, **progress.sheetsCompleted** — листов в книге и уже распознано (обновляется во время обработки)
+- **progress.sheets** — распознанные листы; `url` — MusicXML только этого листа, появляется до завершения всей книги;
+  `movements` — MusicXML каждой части, если на листе их несколько
 - **results** — массив успешных результатов с URL для скачивания
 - **results.url** — ссылка на mxl файл
 - **results.logUrl** — ссылка на log файл чтобы понять если будут ошибки что произошло
 - **errors** — массив ошибок обработки
+- **evictedAt** — файлы результата удалены по квоте (`STORAGE_QUOTA_MB`, `MIN_FREE_DISK_MB`):
+  ссылки в `results` и `progress.sheets` пустые, скачивание отвечает 410
 """,
     responses={
         200: {"description": "Детали задачи"},
@@ -283,44 +548,333 @@ async def get_task(task_id: str) -> TaskResponse:
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
+    progress, results = _visible_outputs(task)
     return TaskResponse(
         id=task["id"],
         status=task["status"],
         created_at=task.get("created_at"),
         updated_at=task.get("updated_at"),
-        progress=task.get("progress"),
-        results=task.get("results"),
+        started_at=task.get("started_at"),
+        progress=progress,
+        results=results,
         errors=task.get("errors"),
+        deadline=task.get("deadline"),
+        evicted_at=task.get("evicted_at"),
     )
 
 
+MUSICXML_MEDIA_TYPES = {
+    ".mxl": "application/vnd.recordare.musicxml",
+    ".xml": "application/vnd.recordare.musicxml+xml",
+}
+
+
+def _downloadable_task(task_id: str) -> dict:
+    """Задача, файлы которой ещё лежат на диске."""
+    task = repo.get(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if task.get("evicted_at"):
+        raise HTTPException(status_code=410, detail="Task files were evicted")
+    return task
+
+
+def _task_manifest(task: dict) -> OutputManifest:
+    """Манифест директории результатов (для старых задач — сканируется заново)."""
+    if task.get("manifest"):
+        return OutputManifest(**task["manifest"])
+    return scan_output_dir(Path(task.get("output_dir", "")))
+
+
+@router.get(
+    "/tasks/{task_id}/result",
+    summary="Скачать результат",
+    description="""
+Скачать MusicXML результат завершённой задачи.
+
+Поддерживаются `ETag` / `If-None-Match` (ответ `304`) и `Range` (ответ `206`).
+""",
+    response_class=Response,
+    responses={
+        200: {"description": "Файл MusicXML"},
+        206: {"description": "Часть файла (Range)"},
+        304: {"description": "Не изменился"},
+        404: {"description": "Задача или файл не найдены"},
+        409: {"description": "Задача не завершена успешно"},
+        410: {"description": "Файлы задачи удалены по квоте"},
+    },
+)
+async def download_result(task_id: str, request: Request) -> Response:
+    """Скачать MusicXML результат."""
+    task = _downloadable_task(task_id)
+    if task.get("status") != TaskStatus.completed.value:
+        raise HTTPException(status_code=409, detail="Task is not completed")
+
+    output_dir = Path(task["output_dir"])
+    manifest = _task_manifest(task)
+    if not manifest.outputs:
+        raise HTTPException(status_code=404, detail="Result file not found")
+    path = output_dir / manifest.outputs[0]
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Result file not found")
+
+    touch_output(output_dir)
+    media_type = MUSICXML_MEDIA_TYPES.get(path.suffix.lower(), "application/octet-stream")
+    return FileRangeResponse(request, path, media_type, path.name)
+
+
+@router.get(
+    "/tasks/{task_id}/log",
+    summary="Скачать лог",
+    description="""
+Скачать лог Audiveris задачи (в том числе завершённой с ошибкой).
+
+Сжатые логи отдаются как есть с `Content-Encoding: gzip` клиентам, которые
+принимают gzip, остальным — распакованными на лету.
+""",
+    response_class=Response,
+    responses={
+        200: {"description": "Лог"},
+        304: {"description": "Не изменился"},
+        404: {"description": "Задача или лог не найдены"},
+        410: {"description": "Файлы задачи удалены по квоте"},
+    },
+)
+async def download_log(task_id: str, request: Request) -> Response:
+    """Скачать лог Audiveris."""
+    task = _downloadable_task(task_id)
+    log_name = find_book_log(_task_manifest(task))
+    path = Path(task["output_dir"]) / log_name if log_name else None
+    if path is None or not path.is_file():
+        raise HTTPException(status_code=404, detail="Log not found")
+
+    touch_output(Path(task["output_dir"]))
+    return log_response(request, path)
+
+
+@router.get(
+    "/tasks/{task_id}/bundle",
+    summary="Скачать все файлы задачи",
+    description="ZIP со всеми сохранёнными файлами задачи (результат и логи), собирается на лету.",
+    response_class=Response,
+    responses={
+        200: {"description": "ZIP архив"},
+        404: {"description": "Задача не найдена или ещё не обработана"},
+        410: {"description": "Файлы задачи удалены по квоте"},
+    },
+)
+async def download_bundle(task_id: str) -> Response:
+    """Скачать все файлы задачи одним ZIP."""
+    task = _downloadable_task(task_id)
+    if task.get("status") not in {TaskStatus.completed.value, TaskStatus.error.value}:
+        raise HTTPException(status_code=404, detail="Task is not processed yet")
+
+    output_dir = Path(task["output_dir"])
+    files = [(output_dir / item.path, item.path) for item in _task_manifest(task).files]
+    if not files:
+        raise HTTPException(status_code=404, detail="No files found")
+
+    touch_output(output_dir)
+    return zip_response(files, f"{task_id}.zip")
+
+
+@router.get(
+    "/tasks/{task_id}/profile",
+    response_model=TaskProfile,
+    summary="Профиль задачи",
+    description="""
+Время выполнения шагов Audiveris (LOAD, BINARY, SCALE, GRID, ... PAGE) для задачи.
+
+- **steps** — время каждого шага по всем страницам (сек)
+- **sheets** — время шагов по каждой странице (сек)
+- **totalSeconds** — суммарное время шагов
+- **wallSeconds** — длительность по логу книги Audiveris
+""",
+    responses={
+        200: {"description": "Профиль задачи"},
+        404: {"description": "Задача не найдена или профиль ещё не готов"},
+    },
+)
+async def get_task_profile(task_id: str) -> TaskProfile:
+    """Получить профиль времени шагов Audiveris."""
+    task = repo.get(task_id)
+
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if not task.get("profile"):
+        raise HTTPException(status_code=404, detail="Profile not available")
+
+    return TaskProfile(**task["profile"])
+
+
 @router.get(
     "/presets",
+    response_model=PresetsResponse,
     summary="Список пресетов",
-    description="Получить список доступных пресетов обработки.",
+    description="""
+Получить список доступных пресетов обработки и уровней скорости.
+
+Для уровней скорости публикуется измеренный эффект. Время уровня сравнивается с
+`balanced` внутри каждого пресета (`byPreset[].relativeToBalanced`), а
+`relativeToBalanced` уровня — среднее этих отношений, взвешенное по числу задач.
+Так на эффект не влияет то, какие пресеты чаще запускают с каким уровнем.
+`avgSeconds` — среднее время шагов по всем пресетам, без такой поправки.
+""",
 )
-async def list_presets() -> dict:
+async def list_presets() -> PresetsResponse:
     """Получить список доступных пресетов."""
-    from api.presets import PRESET_CONSTANTS, get_preset_description
+    from api.presets import (
+        PRESET_CONSTANTS,
+        SPEED_CONSTANTS,
+        get_preset_description,
+        get_speed_description,
+    )
 
-    return {
-        "presets": [
-            {
-                "name": preset.value,
-                "description": get_preset_description(preset),
-                "constants": PRESET_CONSTANTS.get(preset, []),
-            }
-            for preset in Preset
-        ]
+    overall = {
+        profile["name"]: profile
+        for profile in repo.speed_profiles([speed.value for speed in Speed])
     }
+    pairs = repo.preset_speed_profiles([preset.value for preset in Preset], [speed.value for speed in Speed])
+    baselines = {
+        profile["preset"]: profile["avg_seconds"]
+        for profile in pairs
+        if profile["speed"] == Speed.balanced.value
+    }
+
+    speeds = []
+    for speed in Speed:
+        effects = [
+            SpeedEffect(
+                preset=profile["preset"],
+                tasks=profile["tasks"],
+                avg_seconds=profile["avg_seconds"],
+                relative_to_balanced=(
+                    round(profile["avg_seconds"] / baselines[profile["preset"]], 3)
+                    if baselines.get(profile["preset"]) else None
+                ),
+            )
+            for profile in pairs
+            if profile["speed"] == speed.value
+        ]
+        compared = [effect for effect in effects if effect.relative_to_balanced is not None]
+        weight = sum(effect.tasks for effect in compared)
+        profile = overall.get(speed.value)
+        speeds.append(SpeedInfo(
+            name=speed.value,
+            description=get_speed_description(speed),
+            constants=SPEED_CONSTANTS.get(speed, []),
+            tasks=profile["tasks"] if profile else 0,
+            avg_seconds=profile["avg_seconds"] if profile else None,
+            relative_to_balanced=(
+                round(sum(effect.relative_to_balanced * effect.tasks for effect in compared) / weight, 3)
+                if weight else None
+            ),
+            by_preset=effects,
+        ))
+
+    return PresetsResponse(
+        presets=[
+            PresetInfo(
+                name=preset.value,
+                description=get_preset_description(preset),
+                constants=PRESET_CONSTANTS.get(preset, []),
+            )
+            for preset in Preset
+        ],
+        speeds=speeds,
+    )
+
+
+@router.get(
+    "/presets/profiles",
+    response_model=list[PresetProfile],
+    summary="Профили пресетов",
+    description="Среднее время шагов Audiveris по пресетам (только пресеты с обработанными задачами).",
+)
+async def list_preset_profiles() -> list[PresetProfile]:
+    """Получить среднее время шагов по пресетам."""
+    profiles = repo.preset_profiles([preset.value for preset in Preset])
+    return [PresetProfile(**profile) for profile in profiles]
 
 
 @router.get(
     "/health",
     response_model=HealthResponse,
     summary="Проверка здоровья",
-    description="Проверить статус API и текущую глубину очереди.",
+    description="Проверить статус API, глубину очереди, занятое место и решения автомасштабирования.",
 )
 async def health() -> HealthResponse:
     """Проверка здоровья API."""
-    return HealthResponse(status="ok", queue_depth=repo.queue_depth())
+    return HealthResponse(
+        status="ok",
+        queue_depth=repo.queue_depth(),
+        storage_used_mb=repo.storage_usage() // (1024 * 1024),
+        free_disk_mb=free_disk_mb(),
+        autoscaler=autoscaler.status() if settings.autoscale else None,
+    )
+
+
+@router.get(
+    "/metrics",
+    summary="Метрики Prometheus",
+    description="""
+Метрики в текстовом формате Prometheus:
+
+- `audiveris_upload_bytes`, `audiveris_upload_seconds` — размер и время загрузки входных файлов
+- `audiveris_queue_wait_seconds` — ожидание в очереди (от создания задачи до запуска)
+- `audiveris_stage_seconds{stage, preset, outcome}` — время этапов: `extract`, `split`, `preprocess`, `audiveris`,
+  `audiveris_build`, `audiveris_export`, `scan`, `save`
+- `audiveris_tasks_total{preset, outcome}` — обработанные задачи
+- `audiveris_queue_depth`, `audiveris_busy_workers` — глубина очереди и занятые воркеры
+
+`outcome`: `completed`, `LowInterlineError`, `ProcessingError`, `AudiverisTimeout`,
+`interrupted`, `quarantined`, `expired`, класс `OSError` (ошибка scratch или общего тома),
+`error` (необработанное исключение).
+""",
+    response_class=Response,
+)
+async def metrics() -> Response:
+    """Метрики Prometheus."""
+    payload, content_type = render(repo.queue_depth())
+    return Response(content=payload, media_type=content_type)
+
+
+@router.get(
+    "/admin/quarantine",
+    response_model=list[QuarantineEntry],
+    summary="Карантин входов",
+    description="""
+Входы, которые больше `MAX_ATTEMPTS` раз не смогли завершиться (падение или
+зависание Audiveris). Задачи с такими входами сразу завершаются с ошибкой,
+а их книги не кэшируются.
+""",
+)
+async def list_quarantine() -> list[QuarantineEntry]:
+    """Получить список входов в карантине."""
+    return [QuarantineEntry(**entry) for entry in repo.quarantined()]
+
+
+@router.delete(
+    "/admin/quarantine/{input_hash}",
+    summary="Убрать вход из карантина",
+    description="Убрать вход из карантина и сбросить счётчик его запусков.",
+    responses={
+        200: {"description": "Вход убран из карантина"},
+        404: {"description": "Вход не в карантине"},
+    },
+)
+async def release_quarantine(input_hash: str) -> dict:
+    """Убрать вход из карантина."""
+    if not repo.release(input_hash):
+        raise HTTPException(status_code=404, detail="Input not quarantined")
+    return {"released": 1}
+
+
+@router.delete(
+    "/admin/quarantine",
+    summary="Очистить карантин",
+    description="Убрать все входы из карантина и сбросить счётчики запусков.",
+)
+async def purge_quarantine() -> dict:
+    """Очистить карантин."""
+    return {"released": repo.release_all()}
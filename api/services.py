@@ -1,17 +1,100 @@
+import gzip
+import os
 import re
+import signal
 import subprocess
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Callable, Iterator
 from urllib.parse import quote
 
 from PIL import Image, ImageEnhance
 
 from api.config import settings
-from api.exceptions import LowInterlineError, ProcessingError
+from api.binarize import binarize_image, save_binary
+from api.books import book_cache, first_affected_step
+from api.checkpoints import BOOK_BUILT, EXTRACTED, PREPROCESSED, SPLIT, TRANSCRIBED, TaskCheckpoints
+from api.exceptions import (
+    AudiverisTimeout,
+    LowInterlineError,
+    ProcessingError,
+    TaskExpired,
+    TaskInterrupted,
+)
+from api.manifest import COMMAND_LOG, file_listing, find_book_log, scan_output_dir
+from api.inputs import extract_page_images, pdf_page_count
+from api.jvm import jvm_launcher
+from api.logsink import LogSink
+from api.metrics import set_outcome, set_profile, stage
 from api.models import FileResult
-from api.presets import Preset, get_preset_args
+from api.packing import subprocess_kwargs
+from api.presets import Preset, Speed, constant_args, get_constants
+from api.profile import OMR_STEPS, build_profile
+from api.progress import SheetProgress
+from api.splitter import split_tall_image
+from api.storage import publish_outputs, retain_outputs
+
+# A playlist and its book in one run must be processed one after the other
+SEQUENTIAL_BATCH_TASKS = "org.audiveris.omr.Main.runBatchTasksInParallel=false"
+PARALLEL_SHEETS = "org.audiveris.omr.sheet.Book.processAllStubsInParallel=true"
+
+
+def _transcribe_args(force: bool) -> list[str]:
+    """Transcribe a book; with `force` its transcribed sheets are redone from BINARY.
+
+    Audiveris honours `-force` only together with `-step`: `-transcribe`
+    alone stops at sheets that already reached the last step.
+    """
+    if force:
+        return ["-step", OMR_STEPS[-1], "-force"]
+    return ["-transcribe"]
+
+
+@contextmanager
+def _timed(timings: dict[str, float] | None, name: str) -> Iterator[None]:
+    """Add the duration of the block to `timings[name]`, if timings are collected."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
 
 
 class AudiverisService:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._processes: set[subprocess.Popen] = set()
+        self._interrupted: set[subprocess.Popen] = set()
+        self._shutdown = threading.Event()
+
+    def terminate_running(self, timeout: float = 10.0) -> None:
+        """Stop all running Audiveris processes and refuse to start new ones.
+
+        Tasks whose process was stopped raise TaskInterrupted.
+        """
+        self._shutdown.set()
+        with self._lock:
+            processes = list(self._processes)
+            self._interrupted.update(processes)
+        # The launcher script and the JVM share the process group
+        for process in processes:
+            self._signal_group(process, signal.SIGTERM)
+        for process in processes:
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self._signal_group(process, signal.SIGKILL)
+
+    def _signal_group(self, process: subprocess.Popen, sig: int) -> None:
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            pass
+
     def _convert_webp_to_jpg(self, input_path: Path) -> Path:
         """Convert WebP image to JPG (Audiveris doesn't support WebP)."""
         if input_path.suffix.lower() != ".webp":
@@ -30,13 +113,21 @@ class AudiverisService:
         except Exception:
             return input_path  # If conversion fails, try with original
 
-    def _preprocess_image(self, input_path: Path) -> Path:
-        """Preprocess image: convert WebP, upscale if small, enhance contrast and sharpness."""
+    def _preprocess_image(self, input_path: Path, timings: dict[str, float] | None = None) -> Path:
+        """Preprocess image: convert WebP, upscale if small, enhance contrast and sharpness.
+
+        With `image_binarize` the result is thresholded to a 1-bit PNG/TIFF
+        (see `api.binarize`) that replaces the input; if that fails, the
+        8-bit result is kept. When `timings` is given, seconds spent per
+        phase (convert, decode, resize, enhance, binarize, encode) are added
+        to it.
+        """
         if input_path.suffix.lower() == ".pdf":
             return input_path  # Skip PDF files
 
         # Convert WebP to JPG first
-        input_path = self._convert_webp_to_jpg(input_path)
+        with _timed(timings, "convert"):
+            input_path = self._convert_webp_to_jpg(input_path)
 
         try:
             with Image.open(input_path) as img:
@@ -44,53 +135,122 @@ class AudiverisService:
                     img.width < settings.image_min_dimension
                     or img.height < settings.image_min_dimension
                 )
-
-                if needs_upscale:
-                    factor = settings.image_upscale_factor
-                    new_size = (int(img.width * factor), int(img.height * factor))
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-                else:
+                if not needs_upscale and not settings.image_binarize:
                     return input_path
 
-                # Enhance contrast
-                if settings.image_contrast_factor != 1.0:
-                    enhancer = ImageEnhance.Contrast(img)
-                    img = enhancer.enhance(settings.image_contrast_factor)
-
-                # Enhance sharpness
-                if settings.image_sharpness_factor != 1.0:
-                    enhancer = ImageEnhance.Sharpness(img)
-                    img = enhancer.enhance(settings.image_sharpness_factor)
-
-                # Save back if any changes were made
-                if needs_upscale or settings.image_contrast_factor != 1.0 or settings.image_sharpness_factor != 1.0:
+                with _timed(timings, "decode"):
+                    img.load()
+                if needs_upscale:
+                    with _timed(timings, "resize"):
+                        factor = settings.image_upscale_factor
+                        new_size = (int(img.width * factor), int(img.height * factor))
+                        img = img.resize(new_size, Image.Resampling.LANCZOS)
+
+                    with _timed(timings, "enhance"):
+                        # Enhance contrast
+                        if settings.image_contrast_factor != 1.0:
+                            enhancer = ImageEnhance.Contrast(img)
+                            img = enhancer.enhance(settings.image_contrast_factor)
+
+                        # Enhance sharpness
+                        if settings.image_sharpness_factor != 1.0:
+                            enhancer = ImageEnhance.Sharpness(img)
+                            img = enhancer.enhance(settings.image_sharpness_factor)
+
+                if settings.image_binarize:
+                    binary_path = self._binarize(img, input_path, timings)
+                    if binary_path is not None:
+                        return binary_path
+                    if not needs_upscale:
+                        return input_path
+
+                with _timed(timings, "encode"):
                     img.save(input_path)
+            return input_path
 
         except Exception:
             pass  # If preprocessing fails, continue with original image
 
         return input_path
 
+    def _binarize(self, img: Image.Image, input_path: Path, timings: dict[str, float] | None) -> Path | None:
+        """Replace the input with the 1-bit page; None (input untouched) if that failed."""
+        suffix = ".tif" if settings.image_binarize_format == "tiff" else ".png"
+        output_path = input_path.with_suffix(suffix)
+        tmp_path = output_path.with_name(f".{output_path.stem}.binary{suffix}")
+        try:
+            with _timed(timings, "binarize"):
+                binary = binarize_image(img)
+            with _timed(timings, "encode"):
+                save_binary(binary, tmp_path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            return None  # No numpy or a bad image: the caller keeps the 8-bit page
+        os.replace(tmp_path, output_path)
+        if output_path != input_path:
+            input_path.unlink()
+        return output_path
+
     def process_single(
-        self, input_path: Path, output_dir: Path, preset: str = "default"
+        self,
+        input_path: Path,
+        output_dir: Path,
+        preset: str = "default",
+        speed: str = "balanced",
+        cpu_set: frozenset[int] | None = None,
+        input_hash: str | None = None,
+        checkpoints: TaskCheckpoints | None = None,
+        deadline: str | None = None,
+        publish_dir: Path | None = None,
+        progress: SheetProgress | None = None,
     ) -> FileResult:
-        """Process a single input file and return a FileResult."""
+        """Process a single input file and return a FileResult.
+
+        Raises TaskInterrupted when Audiveris is stopped by a shutdown and
+        TaskExpired when the deadline passes before Audiveris is started.
+        With `publish_dir` the run happens in `output_dir` (node-local
+        scratch) and only the retained artifacts are moved to `publish_dir`.
+        With `progress` finished sheets are published while Audiveris runs
+        (see `api.progress`).
+
+        A scanned PDF is processed as its page images and a very tall image
+        as page-sized strips: one page like an image, several pages like a
+        playlist, whose book is exported as one MusicXML.
+        """
+        checkpoints = checkpoints or TaskCheckpoints()
         try:
-            output_path, log_path, interline = self._run_audiveris(
-                input_path, output_dir, preset
-            )
+            pages = self._extract_pdf_pages(input_path, checkpoints)
+            parallel = False
+            if len(pages) == 1:
+                pages = self._split_tall_image(pages[0], checkpoints)
+                parallel = len(pages) > 1  # Strips are small enough to run side by side
+            if len(pages) == 1:
+                output_path, log_path, interline = self._run_audiveris(
+                    pages[0], output_dir, preset, speed, cpu_set, input_hash,
+                    checkpoints, deadline, progress,
+                )
+            else:
+                output_path, log_path, interline = self._run_audiveris_playlist(
+                    pages, output_dir, preset, speed, cpu_set, input_hash,
+                    checkpoints, deadline, progress, parallel,
+                )
+            output_path, log_path = self._retain(output_dir, output_path, log_path, publish_dir, progress)
             return FileResult(
                 filename=output_path.name,
                 url=self._build_media_url(output_path),
                 log_url=self._build_media_url(log_path) if log_path else None,
             )
         except LowInterlineError as exc:
+            set_outcome(type(exc).__name__)
+            _, exc.log_path = self._retain(output_dir, None, exc.log_path, publish_dir, progress)
             return FileResult(
                 filename=input_path.name,
                 error=exc.message,
                 log_url=self._build_media_url(exc.log_path) if exc.log_path else None,
             )
         except ProcessingError as exc:
+            set_outcome(type(exc).__name__)
+            _, exc.log_path = self._retain(output_dir, None, exc.log_path, publish_dir, progress)
             return FileResult(
                 filename=input_path.name,
                 error=exc.message,
@@ -98,25 +258,49 @@ class AudiverisService:
             )
 
     def process_playlist(
-        self, input_paths: list[Path], output_dir: Path, preset: str = "default"
+        self,
+        input_paths: list[Path],
+        output_dir: Path,
+        preset: str = "default",
+        speed: str = "balanced",
+        cpu_set: frozenset[int] | None = None,
+        input_hash: str | None = None,
+        checkpoints: TaskCheckpoints | None = None,
+        deadline: str | None = None,
+        publish_dir: Path | None = None,
+        progress: SheetProgress | None = None,
     ) -> FileResult:
-        """Process multiple files as a playlist (single book) and return a FileResult."""
+        """Process multiple files as a playlist (single book) and return a FileResult.
+
+        Raises TaskInterrupted when Audiveris is stopped by a shutdown and
+        TaskExpired when the deadline passes before Audiveris is started.
+        With `publish_dir` the run happens in `output_dir` (node-local
+        scratch) and only the retained artifacts are moved to `publish_dir`.
+        With `progress` finished sheets are published while Audiveris runs
+        (see `api.progress`).
+        """
         try:
             output_path, log_path, interline = self._run_audiveris_playlist(
-                input_paths, output_dir, preset
+                input_paths, output_dir, preset, speed, cpu_set, input_hash,
+                checkpoints, deadline, progress,
             )
+            output_path, log_path = self._retain(output_dir, output_path, log_path, publish_dir, progress)
             return FileResult(
                 filename=output_path.name,
                 url=self._build_media_url(output_path),
                 log_url=self._build_media_url(log_path) if log_path else None,
             )
         except LowInterlineError as exc:
+            set_outcome(type(exc).__name__)
+            _, exc.log_path = self._retain(output_dir, None, exc.log_path, publish_dir, progress)
             return FileResult(
                 filename="playlist",
                 error=exc.message,
                 log_url=self._build_media_url(exc.log_path) if exc.log_path else None,
             )
         except ProcessingError as exc:
+            set_outcome(type(exc).__name__)
+            _, exc.log_path = self._retain(output_dir, None, exc.log_path, publish_dir, progress)
             return FileResult(
                 filename="playlist",
                 error=exc.message,
@@ -124,34 +308,310 @@ class AudiverisService:
             )
 
     def _run_audiveris(
-            self, input_path: Path, output_dir: Path, preset: str = "default"
+            self,
+            input_path: Path,
+            output_dir: Path,
+            preset: str = "default",
+            speed: str = "balanced",
+            cpu_set: frozenset[int] | None = None,
+            input_hash: str | None = None,
+            checkpoints: TaskCheckpoints | None = None,
+            deadline: str | None = None,
+            progress: SheetProgress | None = None,
     ) -> tuple[Path, Path, int | None]:
-        """Run audiveris on a single input file."""
-        input_path = self._preprocess_image(input_path)
+        """Run audiveris on a single input file.
 
-        # Build command with preset
+        If a book for the same input is cached, it is re-run instead of
+        the image (see `api.books`). Completed stages are recorded in
+        `checkpoints` and skipped when the task is resumed.
+        """
+        checkpoints = checkpoints or TaskCheckpoints()
+        if TRANSCRIBED in checkpoints:
+            outcome = self._collect_outputs(output_dir)
+            if outcome:
+                return outcome
+
+        constants = self._constants(preset, speed)
+        radix = input_path.stem
+        cached = self._restore_book(input_hash, output_dir, radix, constants)
+
+        if cached:
+            book_path, force = cached
+            cmd = [
+                settings.audiveris_cmd,
+                "-batch",
+                *constant_args(constants),
+                *_transcribe_args(force), "-export",
+                "-output", str(output_dir),
+                str(book_path),
+            ]
+        else:
+            input_path = self._preprocess_inputs([input_path], checkpoints)[0]
+            cmd = [
+                settings.audiveris_cmd,
+                "-batch",
+                *constant_args(constants),
+                "-transcribe", "-export",
+                "-output", str(output_dir),
+                str(input_path),
+            ]
+
+        pages = self._job_pages([input_path])
+        with self._open_log(output_dir) as sink:
+            self._check_deadline(deadline)
+            with self._watch_sheets(progress, sink, output_dir / f"{radix}.omr", pages, cpu_set):
+                outcome = self._execute_and_process(cmd, output_dir, sink, cpu_set, pages=pages)
+        checkpoints.mark(TRANSCRIBED)
+        self._store_book(input_hash, output_dir / f"{radix}.omr", constants)
+        return outcome
+
+    def _extract_pdf_pages(self, input_path: Path, checkpoints: TaskCheckpoints) -> list[Path]:
+        """Page images of a scanned PDF, extracted next to it (see `api.inputs`).
+
+        Returns `[input_path]` for images and for PDFs that are not plain
+        scans (vector pages), which Audiveris rasterises itself.
+        """
+        if input_path.suffix.lower() != ".pdf" or not settings.pdf_extract_images:
+            return [input_path]
+        return self._derive_inputs(input_path, checkpoints, EXTRACTED, "extract", extract_page_images)
+
+    def _split_tall_image(self, input_path: Path, checkpoints: TaskCheckpoints) -> list[Path]:
+        """Page-sized strips of a very tall image (see `api.splitter`), or `[input_path]`."""
+        if input_path.suffix.lower() == ".pdf" or not settings.image_split_tall:
+            return [input_path]
+        return self._derive_inputs(input_path, checkpoints, SPLIT, "split", split_tall_image)
+
+    def _derive_inputs(
+            self,
+            input_path: Path,
+            checkpoints: TaskCheckpoints,
+            checkpoint: str,
+            stage_name: str,
+            derive: Callable[[Path, Path], list[Path] | None],
+    ) -> list[Path]:
+        """Files derived from an input once per task, next to it.
+
+        `derive` returns None when the input is processed as is. The outcome
+        is recorded in `checkpoint`, so a resumed task reuses the same files.
+        """
+        names = checkpoints.get(checkpoint)
+        if names is not None:
+            paths = [input_path.parent / name for name in names]
+            if all(path.exists() for path in paths):
+                return paths or [input_path]
+
+        with stage(stage_name):
+            try:
+                paths = derive(input_path, input_path.parent)
+            except Exception:
+                paths = None  # Let Audiveris try the input itself
+        checkpoints.mark(checkpoint, [path.name for path in paths or []])
+        return paths or [input_path]
+
+    def _job_pages(self, input_paths: list[Path]) -> int:
+        """Number of pages of a job, for the JVM startup options and sheet progress."""
+        pages = 0
+        for path in input_paths:
+            try:
+                pages += pdf_page_count(path) if path.suffix.lower() == ".pdf" else 1
+            except Exception:
+                pages += 1
+        return pages
+
+    def _watch_sheets(
+            self,
+            progress: SheetProgress | None,
+            sink: LogSink,
+            book_path: Path,
+            pages: int,
+            cpu_set: frozenset[int] | None,
+    ):
+        """Publish the sheets of a transcribing run as they finish, if asked to."""
+        if progress is None:
+            return nullcontext()
+        return progress.watch(sink, book_path, pages, cpu_set, self._build_media_url)
+
+    def _preprocess_inputs(self, input_paths: list[Path], checkpoints: TaskCheckpoints) -> list[Path]:
+        """Preprocess input images once per task.
+
+        Preprocessing rewrites the images in place, so a resumed task must
+        reuse the files from its checkpoint instead of upscaling them again.
+        """
+        names = checkpoints.get(PREPROCESSED)
+        if names and len(names) == len(input_paths):
+            resumed = [path.parent / name for path, name in zip(input_paths, names)]
+            if all(path.exists() for path in resumed):
+                return resumed
+
+        with stage("preprocess"):
+            processed = [self._preprocess_image(path) for path in input_paths]
+        checkpoints.mark(PREPROCESSED, [path.name for path in processed])
+        return processed
+
+    def _retain(
+            self,
+            output_dir: Path,
+            output_path: Path | None,
+            log_path: Path | None,
+            publish_dir: Path | None = None,
+            progress: SheetProgress | None = None,
+    ) -> tuple[Path | None, Path | None]:
+        """Keep only the retained artifacts of a finished run (see `api.storage`).
+
+        MusicXML of single sheets already handed out to clients is kept
+        too. With `publish_dir` they are moved there; returns the final
+        result and (compressed) log paths.
+        """
+        served = [output_path] if output_path else []
+        if progress is not None:
+            served += progress.paths
+        with stage("retain"):
+            log_path = retain_outputs(output_dir, served, log_path)
+        if publish_dir is None or publish_dir == output_dir:
+            return output_path, log_path
+        with stage("publish"):
+            publish_outputs(output_dir, publish_dir)
+
+        def _published(path: Path | None) -> Path | None:
+            return publish_dir / path.relative_to(output_dir) if path else None
+
+        return _published(output_path), _published(log_path)
+
+    def _check_deadline(self, deadline: str | None) -> None:
+        """Do not start Audiveris for a task nobody waits for anymore."""
+        if deadline and datetime.fromisoformat(deadline) <= datetime.now(timezone.utc):
+            raise TaskExpired()
+
+    def _collect_outputs(self, output_dir: Path) -> tuple[Path, Path, int | None] | None:
+        """Outputs of an Audiveris run that already finished, if any."""
+        with stage("scan"):
+            manifest = scan_output_dir(output_dir)
+            if not manifest.outputs:
+                return None
+            book_log = output_dir / (find_book_log(manifest) or COMMAND_LOG)
+            return output_dir / manifest.outputs[0], book_log, self._detect_interline(book_log)
+
+    def _constants(self, preset: str, speed: str) -> list[str]:
+        """All Audiveris constants for a run with this preset and speed tier."""
         preset_enum = Preset(preset) if preset else Preset.default
-        preset_args = get_preset_args(preset_enum)
-
-        cmd = [
-            settings.audiveris_cmd,
-            "-batch",
-            "-constant", f"org.audiveris.omr.sheet.ScaleBuilder.minInterline={settings.min_interline}",
-            *preset_args,
-            "-transcribe", "-export",
-            "-output", str(output_dir),
-            str(input_path),
+        speed_enum = Speed(speed) if speed else Speed.balanced
+        return [
+            f"org.audiveris.omr.sheet.ScaleBuilder.minInterline={settings.min_interline}",
+            *get_constants(preset_enum, speed_enum),
         ]
-        return self._execute_and_process(cmd, output_dir)
+
+    def _restore_book(
+            self, input_hash: str | None, output_dir: Path, radix: str, constants: list[str]
+    ) -> tuple[Path, bool] | None:
+        """Copy a cached book for this input into the output dir.
+
+        Returns the book path and whether its sheets must be redone from
+        BINARY (`_transcribe_args`), or None when there is no usable book.
+        """
+        if not input_hash or not settings.book_cache:
+            return None
+        cached = book_cache.lookup(input_hash)
+        if not cached:
+            return None
+        book_path, cached_constants = cached
+        step = first_affected_step(cached_constants, constants)
+        if step is not None and OMR_STEPS.index(step) <= OMR_STEPS.index("BINARY"):
+            return None
+        return book_cache.restore(book_path, output_dir, radix), step is not None
+
+    def _store_book(self, input_hash: str | None, book_path: Path, constants: list[str]) -> None:
+        """Keep the book of a successful run for later preset retries."""
+        if not input_hash or not settings.book_cache or not book_path.is_file():
+            return
+        try:
+            book_cache.store(input_hash, book_path, constants)
+        except OSError:
+            pass  # The cache is an optimisation only
+
+    def _open_log(self, output_dir: Path) -> LogSink:
+        """The command log of a task, shared by all its Audiveris runs."""
+        output_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{COMMAND_LOG}.gz" if settings.compress_logs else COMMAND_LOG
+        return LogSink(output_dir / name, settings.log_max_bytes)
+
+    def _run_subprocess(
+            self,
+            cmd: list[str],
+            sink: LogSink,
+            cpu_set: frozenset[int] | None = None,
+            stage_name: str = "audiveris",
+            pages: int = 1,
+    ) -> int:
+        """Run an audiveris command, pinned to `cpu_set` when packing is on.
+
+        Both pipes are streamed into `sink`; returns the exit code. The
+        JVM gets startup options for a job of `pages` pages (see `api.jvm`).
+        """
+        if self._shutdown.is_set():
+            raise TaskInterrupted()
+        java_opts, training = jvm_launcher.options(pages)
+        # The training flag of the launcher must be released even if the JVM never starts
+        try:
+            sink.section(f"cmd: {' '.join(cmd)}")
+            if java_opts:
+                sink.section(f"java opts: {' '.join(java_opts)}")
+            with stage(stage_name):
+                process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    errors="replace",
+                    start_new_session=True,
+                    **subprocess_kwargs(cpu_set, java_opts),
+                )
+                readers = [sink.pump(process.stdout, "stdout"), sink.pump(process.stderr, "stderr")]
+                with self._lock:
+                    self._processes.add(process)
+                timed_out = False
+                try:
+                    process.wait(timeout=settings.audiveris_timeout_seconds or None)
+                except subprocess.TimeoutExpired:
+                    timed_out = True
+                    self._signal_group(process, signal.SIGKILL)
+                    process.wait()
+                finally:
+                    with self._lock:
+                        self._processes.discard(process)
+                        interrupted = process in self._interrupted
+                        self._interrupted.discard(process)
+                for reader in readers:
+                    reader.join(timeout=10)
+        finally:
+            if training:
+                jvm_launcher.finish_training(training)
+        sink.section(f"returncode: {process.returncode}")
+        if interrupted:
+            raise TaskInterrupted()
+        if timed_out:
+            raise AudiverisTimeout(
+                f"Audiveris timed out after {settings.audiveris_timeout_seconds:g}s"
+            )
+        return process.returncode
 
     def _execute_and_process(
-            self, cmd: list[str], output_dir: Path
+            self,
+            cmd: list[str],
+            output_dir: Path,
+            sink: LogSink,
+            cpu_set: frozenset[int] | None = None,
+            stage_name: str = "audiveris",
+            pages: int = 1,
     ) -> tuple[Path, Path, int | None]:
         """Execute audiveris command and process results."""
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        log_path = self._write_log(output_dir, cmd, result)
-        book_log = self._find_audiveris_log(output_dir, log_path)
-        interline_value = self._detect_interline(book_log)
+        returncode = self._run_subprocess(cmd, sink, cpu_set, stage_name, pages)
+        with stage("scan"):
+            manifest = scan_output_dir(output_dir)
+            book_log = output_dir / (find_book_log(manifest) or sink.path.name)
+            interline_value = None if book_log == sink.path else self._detect_interline(book_log)
+            if interline_value is None:
+                interline_value = sink.interline
+            set_profile(build_profile(sink.timings.sheets, book_log))
 
         if interline_value is not None and interline_value < settings.min_interline:
             detail = (
@@ -159,23 +619,20 @@ class AudiverisService:
             )
             raise LowInterlineError(interline_value, detail, book_log)
 
-        if result.returncode != 0:
-            error = (result.stderr or result.stdout or "Audiveris failed").strip()
-            detail = f"Audiveris failed. {error}"
+        if returncode != 0:
+            error = sink.recent("stderr") or sink.recent("stdout") or "Audiveris failed"
+            detail = f"Audiveris failed. {error[-settings.max_error_len:]}"
             raise ProcessingError(detail, log_path=book_log)
 
-        # Check for errors in stdout (Audiveris may return 0 even with errors)
-        processing_errors = self._detect_processing_errors(result.stdout or "")
-
-        candidates = self._find_outputs(output_dir)
-        if not candidates:
-            files = self._list_files(output_dir)
+        # Errors seen in stdout (Audiveris may return 0 even with errors)
+        processing_errors = sink.errors
+        if not manifest.outputs:
+            files = file_listing(manifest, settings.max_listed_files)
             error_info = f" Errors: {processing_errors}" if processing_errors else ""
             detail = f"No MusicXML output found, files={files}).{error_info}"
             raise ProcessingError(detail, log_path=book_log)
 
-        output_path = sorted(candidates)[0]
-        return output_path, book_log, interline_value
+        return output_dir / manifest.outputs[0], book_log, interline_value
 
     def _create_playlist_xml(self, input_paths: list[Path], output_dir: Path) -> Path:
         """Create a playlist XML file for audiveris."""
@@ -190,101 +647,175 @@ class AudiverisService:
         return playlist_path
 
     def _run_audiveris_playlist(
-            self, input_paths: list[Path], output_dir: Path, preset: str = "default"
+            self,
+            input_paths: list[Path],
+            output_dir: Path,
+            preset: str = "default",
+            speed: str = "balanced",
+            cpu_set: frozenset[int] | None = None,
+            input_hash: str | None = None,
+            checkpoints: TaskCheckpoints | None = None,
+            deadline: str | None = None,
+            progress: SheetProgress | None = None,
+            parallel: bool = False,
     ) -> tuple[Path, Path, int | None]:
         """Run audiveris with playlist.
 
         Step 1: Create compound book from playlist (images -> playlist.omr)
         Step 2: Transcribe and export the compound book
-        """
-        all_logs: list[str] = []
 
-        # Build preset args
-        preset_enum = Preset(preset) if preset else Preset.default
-        preset_args = get_preset_args(preset_enum)
+        With `playlist_single_pass` a new book is built, transcribed and
+        exported by one Audiveris run (`_run_single_pass`); the steps are
+        run separately when the book is cached, was built before the task
+        was interrupted, or the single run stopped after building it.
+        Step 2 on a partially transcribed book only processes the sheets
+        that are not done yet. With `parallel` Audiveris processes the
+        sheets concurrently (small sheets, e.g. strips of a split image).
+        """
+        checkpoints = checkpoints or TaskCheckpoints()
+        if TRANSCRIBED in checkpoints:
+            outcome = self._collect_outputs(output_dir)
+            if outcome:
+                return outcome
+
+        constants = self._constants(preset, speed)
+        preset_args = constant_args([*constants, *([PARALLEL_SHEETS] if parallel else [])])
+        compound_omr = output_dir / "playlist.omr"
 
+        # All runs write to the same command log
+        with self._open_log(output_dir) as sink:
+            built = checkpoints.get(BOOK_BUILT)
+            if built is not None and compound_omr.exists():
+                force = built["force"]
+            else:
+                cached = self._restore_book(input_hash, output_dir, "playlist", constants)
+                if cached:
+                    compound_omr, force = cached
+                elif settings.playlist_single_pass:
+                    self._check_deadline(deadline)
+                    outcome = self._run_single_pass(
+                        input_paths, output_dir, preset_args, cpu_set, checkpoints, sink, progress
+                    )
+                    if outcome:
+                        checkpoints.mark(TRANSCRIBED)
+                        self._store_book(input_hash, compound_omr, constants)
+                        return outcome
+                    force = False
+                else:
+                    self._check_deadline(deadline)
+                    self._build_compound_book(
+                        input_paths, output_dir, preset_args, cpu_set, checkpoints, sink
+                    )
+                    force = False
+                checkpoints.mark(BOOK_BUILT, {"force": force})
+
+            # Step 2: Transcribe and export compound book
+            cmd_export = [
+                settings.audiveris_cmd,
+                "-batch",
+                *preset_args,
+                *_transcribe_args(force), "-export",
+                "-output", str(output_dir),
+                str(compound_omr),
+            ]
+            self._check_deadline(deadline)
+            sink.section("=== Step 2: Transcribe and export ===")
+            with self._watch_sheets(progress, sink, compound_omr, len(input_paths), cpu_set):
+                outcome = self._execute_and_process(
+                    cmd_export, output_dir, sink, cpu_set, "audiveris_export", len(input_paths)
+                )
+        checkpoints.mark(TRANSCRIBED)
+        self._store_book(input_hash, compound_omr, constants)
+        return outcome
+
+    def _run_single_pass(
+            self,
+            input_paths: list[Path],
+            output_dir: Path,
+            preset_args: list[str],
+            cpu_set: frozenset[int] | None,
+            checkpoints: TaskCheckpoints,
+            sink: LogSink,
+            progress: SheetProgress | None = None,
+    ) -> tuple[Path, Path, int | None] | None:
+        """Build, transcribe and export `playlist.omr` in one Audiveris run.
+
+        Audiveris runs the `-playlist` task before the book given as
+        argument, so the book it has just built is transcribed by the same
+        JVM. Returns None when the run wrote the book but transcribed no
+        sheet (e.g. an Audiveris that does not chain the tasks): the caller
+        falls back to step 2 on that book. Other failures are raised.
+        """
+        processed_paths = self._preprocess_inputs(input_paths, checkpoints)
+        playlist_path = self._create_playlist_xml(processed_paths, output_dir)
+        compound_omr = output_dir / "playlist.omr"
+        cmd = [
+            settings.audiveris_cmd,
+            "-batch",
+            *preset_args,
+            *constant_args([SEQUENTIAL_BATCH_TASKS]),
+            "-playlist", str(playlist_path),
+            "-transcribe", "-export",
+            "-output", str(output_dir),
+            str(compound_omr),
+        ]
+        sink.section("=== Build, transcribe and export ===")
+        try:
+            with self._watch_sheets(progress, sink, compound_omr, len(input_paths), cpu_set):
+                return self._execute_and_process(
+                    cmd, output_dir, sink, cpu_set, "audiveris", len(input_paths)
+                )
+        except ProcessingError as exc:
+            transcribed = bool(sink.timings.sheets)
+            if isinstance(exc, (LowInterlineError, AudiverisTimeout)) or transcribed or not compound_omr.exists():
+                raise
+            sink.section("=== Book built but not transcribed, falling back to step 2 ===")
+            return None
+        finally:
+            if compound_omr.exists():
+                # An interrupted task resumes with step 2 on this book
+                checkpoints.mark(BOOK_BUILT, {"force": False})
+
+    def _build_compound_book(
+            self,
+            input_paths: list[Path],
+            output_dir: Path,
+            preset_args: list[str],
+            cpu_set: frozenset[int] | None,
+            checkpoints: TaskCheckpoints,
+            sink: LogSink,
+    ) -> None:
+        """Step 1: create `playlist.omr` from the (preprocessed) input images."""
         # Preprocess all input images (may convert WebP to JPG)
-        processed_paths = [self._preprocess_image(p) for p in input_paths]
+        processed_paths = self._preprocess_inputs(input_paths, checkpoints)
 
-        # Step 1: Create compound book from playlist
         playlist_path = self._create_playlist_xml(processed_paths, output_dir)
         cmd_build = [
             settings.audiveris_cmd,
             "-batch",
-            "-constant", f"org.audiveris.omr.sheet.ScaleBuilder.minInterline={settings.min_interline}",
             *preset_args,
             "-playlist", str(playlist_path),
             "-output", str(output_dir),
         ]
-        result_build = subprocess.run(cmd_build, capture_output=True, text=True)
-        all_logs.append(f"=== Step 1: Build compound book ===")
-        all_logs.append(f"cmd: {' '.join(cmd_build)}")
-        all_logs.append(result_build.stdout or "")
-        if result_build.stderr:
-            all_logs.append(result_build.stderr)
+        sink.section("=== Step 1: Build compound book ===")
+        self._run_subprocess(cmd_build, sink, cpu_set, "audiveris_build", len(input_paths))
 
         # Find compound .omr file
-        compound_omr = output_dir / "playlist.omr"
-        if not compound_omr.exists():
-            log_path = output_dir / "audiveris.log"
-            log_path.write_text("\n".join(all_logs))
+        if not (output_dir / "playlist.omr").exists():
             raise ProcessingError(
                 f"Compound book not created",
-                log_path=log_path
+                log_path=sink.path
             )
 
-        # Step 2: Transcribe and export compound book
-        cmd_export = [
-            settings.audiveris_cmd,
-            "-batch",
-            "-constant", f"org.audiveris.omr.sheet.ScaleBuilder.minInterline={settings.min_interline}",
-            *preset_args,
-            "-transcribe",
-            "-export",
-            "-output", str(output_dir),
-            str(compound_omr),
-        ]
-        all_logs.append(f"\n=== Step 2: Transcribe and export ===")
-        all_logs.append(f"cmd: {' '.join(cmd_export)}")
-
-        # Write intermediate log
-        log_path = output_dir / "audiveris.log"
-        log_path.write_text("\n".join(all_logs))
-
-        return self._execute_and_process(cmd_export, output_dir)
-
-    def _write_log(
-            self, out_dir: Path, cmd: list[str], result: subprocess.CompletedProcess
-    ) -> Path:
-        """Write audiveris execution log."""
-        log_path = out_dir / "audiveris.log"
-        payload = [
-            f"cmd: {' '.join(cmd)}",
-            f"returncode: {result.returncode}",
-            "",
-            "stdout:",
-            result.stdout or "",
-            "",
-            "stderr:",
-            result.stderr or "",
-        ]
-        log_path.write_text("\n".join(payload))
-        return log_path
-
-    def _find_audiveris_log(self, out_dir: Path, fallback: Path) -> Path:
-        """Find the audiveris-generated log file."""
-        logs = [path for path in out_dir.rglob("*.log") if path.is_file()]
-        logs = [path for path in logs if path.name != fallback.name]
-        if not logs:
-            return fallback
-        logs.sort(key=lambda path: path.stat().st_mtime, reverse=True)
-        return logs[0]
-
     def _detect_interline(self, log_path: Path) -> int | None:
         """Detect interline value from log file."""
         if not log_path.exists():
             return None
-        content = log_path.read_text(errors="ignore")
+        if log_path.suffix == ".gz":
+            with gzip.open(log_path, "rt", errors="ignore") as handle:
+                content = handle.read()
+        else:
+            content = log_path.read_text(errors="ignore")
         values = [
             int(match.group(1))
             for match in re.finditer(r"interline value of (\d+) pixels", content)
@@ -293,59 +824,6 @@ class AudiverisService:
             return None
         return min(values)
 
-    def _detect_processing_errors(self, stdout: str) -> list[str]:
-        """Detect processing errors from Audiveris stdout."""
-        errors = []
-        for line in stdout.split("\n"):
-            # Look for WARN/ERROR lines with exceptions
-            if "Error in performing" in line or "Exception" in line:
-                errors.append(line.strip())
-            # Look for specific error patterns
-            elif "WARN" in line and ("Error" in line or "null" in line.lower()):
-                errors.append(line.strip())
-        return errors[:5]  # Limit to first 5 errors
-
-    def _find_outputs(self, out_dir: Path) -> list[Path]:
-        """Find all MusicXML output files (.mxl preferred)."""
-        # Exclude known non-output files
-        exclude_names = {"playlist.xml"}
-
-        mxl_files = []
-        xml_files = []
-
-        for path in out_dir.rglob("*"):
-            if not path.is_file():
-                continue
-            if path.name.lower() in exclude_names:
-                continue
-            suffix = path.suffix.lower()
-            if suffix == ".mxl":
-                mxl_files.append(path)
-            elif suffix == ".xml":
-                # Only include XML files that look like MusicXML (not internal Audiveris files)
-                # Audiveris stores internal data in subdirectories like /sheet#1/sheet#1.xml
-                if path.parent == out_dir:
-                    xml_files.append(path)
-
-        # Prefer .mxl files over .xml
-        return mxl_files if mxl_files else xml_files
-
-    def _list_files(self, root: Path) -> str:
-        """List files in directory for error messages."""
-        if not root.exists():
-            return "none"
-        files = sorted(
-            str(path.relative_to(root)) for path in root.rglob("*") if path.is_file()
-        )
-        if not files:
-            return "none"
-        if len(files) > settings.max_listed_files:
-            return (
-                    ", ".join(files[: settings.max_listed_files])
-                    + f", ... (+{len(files) - settings.max_listed_files} more)"
-            )
-        return ", ".join(files)
-
     def _build_media_url(self, path: Path) -> str | None:
         """Build a media URL for a file path."""
         try:
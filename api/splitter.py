@@ -0,0 +1,93 @@
+"""Splitting of very tall images into page-sized strips.
+
+Long screenshots and stitched phone captures arrive as one image many
+pages tall; upscaled, they exhaust the JVM heap and take far longer
+than the same music as several pages. Such an image is cut at the
+horizontal whitespace between systems into strips about one page high,
+which are then processed as the sheets of one book.
+"""
+
+from pathlib import Path
+
+from PIL import Image
+
+from api.config import settings
+
+INK_LEVEL = 0.5  # Pixels darker than this share of the background are ink
+NOISE_FRACTION = 0.001  # Share of ink in a row that is still blank (specks, dust)
+MIN_GAP_FRACTION = 0.03  # Shortest blank band to cut in, share of the width (above staff line spacing)
+
+
+def ink_profile(image: Image.Image) -> list[float]:
+    """Share of ink pixels in every row.
+
+    The background is the median brightness (a score is mostly paper). Ink
+    is averaged per row by a width-1 box resize in float mode, so a single
+    bar line joining the staves of a system keeps its rows from being blank.
+    """
+    gray = image.convert("L")
+    half = gray.width * gray.height / 2
+    seen = 0
+    for background, count in enumerate(gray.histogram()):
+        seen += count
+        if seen >= half:
+            break
+    threshold = background * INK_LEVEL
+    ink = gray.point(lambda value: 255 if value < threshold else 0).convert("F")
+    return [value / 255 for value in ink.resize((1, gray.height), Image.Resampling.BOX).getdata()]
+
+
+def find_gaps(rows: list[float], min_gap: int) -> list[int]:
+    """Middles of the blank bands between systems; bands at the edges are margins."""
+    gaps = []
+    start = None
+    for index, value in enumerate([*rows, 1.0]):
+        if value <= NOISE_FRACTION:
+            if start is None:
+                start = index
+        elif start is not None:
+            if index - start >= min_gap and start > 0 and index < len(rows):
+                gaps.append((start + index) // 2)
+            start = None
+    return gaps
+
+
+def plan_cuts(height: int, gaps: list[int], strip_height: int) -> list[int]:
+    """Cut rows that keep strips at most `strip_height` high where the gaps allow.
+
+    Each strip ends at the last gap that fits; a system taller than a strip
+    gets a strip of its own.
+    """
+    cuts = []
+    start = 0
+    while height - start > strip_height:
+        later = [gap for gap in gaps if gap > start]
+        if not later:
+            break
+        fitting = [gap for gap in later if gap - start <= strip_height]
+        start = fitting[-1] if fitting else later[0]
+        cuts.append(start)
+    return cuts
+
+
+def split_tall_image(path: Path, target_dir: Path) -> list[Path] | None:
+    """Cut a tall image into strips `<name>-strip<N>.png` in `target_dir`.
+
+    Returns None for images that are not tall enough or have no gaps to
+    cut in; those are processed whole.
+    """
+    with Image.open(path) as image:
+        width, height = image.size
+        if height < width * settings.image_split_min_aspect:
+            return None
+        gaps = find_gaps(ink_profile(image), max(int(width * MIN_GAP_FRACTION), 2))
+        cuts = plan_cuts(height, gaps, int(width * settings.image_split_strip_aspect))
+        if not cuts:
+            return None
+
+        strips = []
+        for number, (top, bottom) in enumerate(zip([0, *cuts], [*cuts, height]), 1):
+            strip_path = target_dir / f"{path.stem}-strip{number}.png"
+            image.crop((0, top, width, bottom)).save(strip_path)
+            strips.append(strip_path)
+    return strips
@@ -0,0 +1,199 @@
+"""Retention of task outputs and the disk quota of the output volume.
+
+After a run only the configured artifacts are kept in the output dir
+(the served MusicXML and logs by default), logs are gzipped. Runs on
+node-local scratch publish only those artifacts to the output dir. Retained
+outputs are tracked in Redis by size and last use: when the quota is
+exceeded or the volume runs low, the least recently used outputs are
+evicted first.
+"""
+
+import gzip
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from api.config import settings
+from api.repository import repo
+
+_MB = 1024 * 1024
+_evicting = threading.Lock()  # One eviction at a time, whatever the number of workers
+
+
+def _retained_suffixes() -> set[str]:
+    return {
+        f".{name.strip().lstrip('.').lower()}"
+        for name in settings.retain_artifacts.split(",")
+        if name.strip()
+    }
+
+
+def _artifact_suffix(path: Path) -> str:
+    """File type for retention; compressed logs are still logs."""
+    name = path.name.lower()
+    return ".log" if name.endswith(".log.gz") else path.suffix.lower()
+
+
+def _gzip(path: Path) -> Path:
+    target = path.with_name(f"{path.name}.gz")
+    with path.open("rb") as source, gzip.open(target, "wb") as handle:
+        shutil.copyfileobj(source, handle)
+    path.unlink()
+    return target
+
+
+def _prune(directory: Path, keep: set[Path], suffixes: set[str], logs: list[Path]) -> None:
+    """Remove files of `directory` not kept by name or suffix; recurse into kept dirs."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            path = Path(entry.path)
+            if entry.is_dir(follow_symlinks=False):
+                if any(path in kept.parents for kept in keep):
+                    _prune(path, keep, set(), logs)  # Only the served files survive below the top
+                else:
+                    shutil.rmtree(path, ignore_errors=True)
+            elif path in keep or _artifact_suffix(path) in suffixes:
+                if path.suffix.lower() == ".log":
+                    logs.append(path)
+            else:
+                path.unlink(missing_ok=True)
+
+
+def retain_outputs(output_dir: Path, served: list[Path], log_path: Path | None) -> Path | None:
+    """Drop everything but the retained artifacts; returns the (compressed) log path.
+
+    The served result and log are always kept.
+    """
+    suffixes = _retained_suffixes()
+    if not suffixes or not output_dir.is_dir():
+        return log_path
+
+    keep = {*served, *([log_path] if log_path else [])}
+    logs: list[Path] = []
+    _prune(output_dir, keep, suffixes, logs)
+
+    if settings.compress_logs:
+        for path in logs:
+            compressed = _gzip(path)
+            if path == log_path:
+                log_path = compressed
+    return log_path
+
+
+def scratch_dir(task_id: str) -> Path | None:
+    """Node-local working dir of a task, None when runs use the shared volume."""
+    return Path(settings.scratch_dir) / task_id if settings.scratch_dir else None
+
+
+def copy_to_scratch(paths: list[Path], target_dir: Path) -> list[Path]:
+    """Copy task inputs to node-local scratch; copies left by an earlier attempt are reused."""
+    target_dir.mkdir(parents=True, exist_ok=True)
+    copies = []
+    for path in paths:
+        target = target_dir / path.name
+        if not target.exists():
+            tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, target)
+        copies.append(target)
+    return copies
+
+
+def clean_scratch() -> int:
+    """Remove scratch dirs of tasks that are no longer queued or running."""
+    if not settings.scratch_dir or not os.path.isdir(settings.scratch_dir):
+        return 0
+    removed = 0
+    with os.scandir(settings.scratch_dir) as entries:
+        for entry in entries:
+            task = repo.get(entry.name)
+            if task and task.get("status") in {"queued", "running"}:
+                continue
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def publish_outputs(source_dir: Path, target_dir: Path) -> None:
+    """Move the files left in `source_dir` (node-local scratch) to `target_dir`.
+
+    Each file is copied under a temporary name and renamed into place, so
+    readers of the shared volume never see a partial artifact.
+    """
+    for path in sorted(source_dir.rglob("*")):
+        if not path.is_file():
+            continue
+        target = target_dir / path.relative_to(source_dir)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+        shutil.copy2(path, tmp)
+        os.replace(tmp, target)
+        path.unlink()
+
+
+def record_output(output_dir: Path, size: int) -> None:
+    """Account a finished task's output dir towards the quota and mark it used."""
+    repo.record_output_size(str(output_dir), size)
+    touch_output(output_dir)
+
+
+def touch_output(output_dir: Path) -> None:
+    """Mark an output dir as recently used (completion or download)."""
+    repo.touch_output(str(output_dir), datetime.now(timezone.utc).timestamp())
+
+
+def free_disk_mb() -> int | None:
+    try:
+        return shutil.disk_usage(settings.output_dir).free // _MB
+    except OSError:
+        return None
+
+
+def disk_low() -> bool:
+    """Whether the output volume has less free space than `min_free_disk_mb`."""
+    if settings.min_free_disk_mb <= 0:
+        return False
+    free_mb = free_disk_mb()
+    return free_mb is not None and free_mb < settings.min_free_disk_mb
+
+
+def _over_quota() -> bool:
+    return settings.storage_quota_mb > 0 and repo.storage_usage() > settings.storage_quota_mb * _MB
+
+
+def _disk_shortfall() -> int:
+    """Bytes missing to `min_free_disk_mb` of free space (0 when there is enough)."""
+    free_mb = free_disk_mb() if disk_low() else None
+    return (settings.min_free_disk_mb - free_mb) * _MB if free_mb is not None else 0
+
+
+def enforce_quota() -> int:
+    """Evict least recently used outputs while over quota or low on disk.
+
+    Low disk space evicts at most the tracked bytes it was short of when
+    the eviction started: space taken by what is not tracked (inputs,
+    books, JVM archives) is not won back by evicting every output. Only
+    one eviction runs at a time, concurrent calls return at once.
+
+    Returns the number of evicted output dirs.
+    """
+    if not _evicting.acquire(blocking=False):
+        return 0
+    try:
+        shortfall = _disk_shortfall()
+        evicted = 0
+        while (_over_quota() or (shortfall > 0 and disk_low())) and repo.storage_usage() > 0:
+            victims = repo.least_recent_outputs(1)
+            if not victims:
+                break
+            path = victims[0]
+            shutil.rmtree(path, ignore_errors=True)
+            shortfall -= repo.forget_output(path)
+            repo.update(Path(path).name, evicted_at=datetime.now(timezone.utc).isoformat())
+            evicted += 1
+        return evicted
+    finally:
+        _evicting.release()
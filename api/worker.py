@@ -1,33 +1,78 @@
+import os
 import shutil
 import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
 from pathlib import Path
 
+import redis
+
+from api.books import book_cache
+from api.checkpoints import TaskCheckpoints
+from api.config import settings
+from api.exceptions import AudiverisTimeout, TaskExpired, TaskInterrupted
+from api.inputs import detect_file_type, pdf_page_count
+from api.manifest import SHEET_RESULTS_DIR, scan_output_dir
+from api.metrics import QUEUE_WAIT_SECONDS, UPLOAD_BYTES, UPLOAD_SECONDS, TaskRun, set_outcome, stage, task_run
 from api.models import TaskStatus
+from api.objectstore import object_store
+from api.packing import plan_cpu_sets
+from api.progress import SheetProgress
 from api.repository import repo
 from api.services import audiveris_service
+from api.storage import copy_to_scratch, disk_low, enforce_quota, record_output, scratch_dir
 
 
 class Worker:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        cpu_set: frozenset[int] | None = None,
+        on_task_done: Callable[[float], None] | None = None,
+    ) -> None:
+        self._cpu_set = cpu_set
+        self._on_task_done = on_task_done
         self._running = False
         self._thread: threading.Thread | None = None
 
+    @property
+    def cpu_set(self) -> frozenset[int] | None:
+        return self._cpu_set
+
+    def is_alive(self) -> bool:
+        """Whether the worker thread is still running (possibly finishing a task)."""
+        return self._thread is not None and self._thread.is_alive()
+
     def start(self) -> None:
         """Start the worker in a background thread."""
         self._running = True
-        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="audiveris-worker")
         self._thread.start()
 
     def stop(self) -> None:
         """Signal the worker to stop."""
         self._running = False
 
+    def join(self, timeout: float | None = None) -> None:
+        """Wait for the worker thread to finish its current task."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
     def _run(self) -> None:
         """Main worker loop."""
         while self._running:
+            # Do not start tasks that could not store their outputs
+            if disk_low():
+                enforce_quota()
+                if disk_low():
+                    time.sleep(1)
+                    continue
             task_id = repo.dequeue(timeout=1)
             if task_id:
+                started = time.monotonic()
                 self._process_task(task_id)
+                if self._on_task_done:
+                    self._on_task_done(time.monotonic() - started)
 
     def _process_task(self, task_id: str) -> None:
         """Process a single task from the queue."""
@@ -35,23 +80,169 @@ class Worker:
         if not task or task.get("status") not in {"queued", "running"}:
             return
 
+        preset = task.get("preset", "default")
+        deadline = task.get("deadline")
+        if deadline and datetime.fromisoformat(deadline) <= datetime.now(timezone.utc):
+            with task_run(preset):
+                set_outcome("expired")
+                self._expire(task)
+            return
+
+        # Inputs uploaded to object storage are fetched before the first run
+        # (and again when the task resumes on a node without the local copy)
+        if task.get("input_object") and not self._input_location(task).exists():
+            if not self._fetch_input(task):
+                return
+
+        # Attempts are counted before the run: a crash of the whole
+        # process leaves them counted and the task is requeued on restart.
+        # Runs of the input are registered and count once they crash or hang.
+        input_hash = task.get("input_hash")
+        task["attempts"] = task.get("attempts", 0) + 1
+        input_attempts = repo.start_input_attempt(input_hash, task_id) if input_hash else 0
         task["status"] = TaskStatus.running.value
+        started_at = datetime.now(timezone.utc)
+        task.setdefault("started_at", started_at.isoformat())
         repo.save(task)
 
+        created_at = task.get("created_at")
+        if created_at and task["attempts"] == 1:
+            waited = started_at - datetime.fromisoformat(created_at)
+            QUEUE_WAIT_SECONDS.labels(preset).observe(waited.total_seconds())
+
+        with task_run(preset) as run:
+            attempts = max(task["attempts"], input_attempts)
+            hung = False
+            try:
+                if attempts > settings.max_attempts or (input_hash and repo.is_quarantined(input_hash)):
+                    set_outcome("quarantined")
+                    self._quarantine(task, attempts)
+                    return
+                self._run_task(task, run)
+                # A timed out run counts against the input, like a crash
+                hung = run.outcome == AudiverisTimeout.__name__
+            except TaskInterrupted:
+                # Put the task back; it resumes from its checkpoints
+                set_outcome("interrupted")
+                task["attempts"] -= 1
+                task["status"] = TaskStatus.queued.value
+                repo.save(task)
+                repo.enqueue(task_id, deadline)
+            except TaskExpired:
+                set_outcome("expired")
+                self._expire(task)
+            except OSError as exc:
+                # Staging to scratch or publishing outputs failed (full tmpfs, EXDEV, ...)
+                set_outcome(type(exc).__name__)
+                self._give_up(task, TaskStatus.error, f"Storage error: {exc}")
+                self._discard_inputs(task)
+            finally:
+                if input_hash:
+                    repo.finish_input_attempt(input_hash, task_id, failed=hung)
+
+    def _quarantine(self, task: dict, attempts: int) -> None:
+        """Fail a task whose input keeps crashing or hanging Audiveris."""
+        input_hash = task.get("input_hash")
+        if input_hash and not repo.is_quarantined(input_hash):
+            repo.quarantine(input_hash, {
+                "task_id": task["id"],
+                "attempts": attempts,
+                "input_files": task.get("input_files", []),
+                "quarantined_at": datetime.now(timezone.utc).isoformat(),
+            })
+            book_cache.evict(input_hash)
+        self._give_up(task, TaskStatus.error, "Input quarantined: it repeatedly crashed or hung Audiveris")
+
+    def _expire(self, task: dict) -> None:
+        """Give up on a task whose deadline has passed."""
+        self._give_up(task, TaskStatus.expired, "Deadline passed before the task could be processed")
+        self._discard_inputs(task)
+
+    def _discard_inputs(self, task: dict) -> None:
+        """Remove the inputs and the scratch dir of a task that will not run again."""
+        shutil.rmtree(task.get("input_dir", ""), ignore_errors=True)
+        scratch = scratch_dir(task["id"])
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+        if task.get("input_object"):
+            try:
+                object_store.delete(task["input_object"])
+            except Exception:
+                pass  # The bucket lifecycle rule removes leftovers
+
+    def _give_up(self, task: dict, status: TaskStatus, error: str) -> None:
+        """Finish a task without running Audiveris."""
+        progress = task.get("progress") or {}
+        task["status"] = status.value
+        task["errors"] = error
+        task["progress"] = {"total": progress.get("total", 1), "completed": 0, "failed": progress.get("total", 1)}
+        repo.save(task)
+
+    def _input_location(self, task: dict) -> Path:
+        """Where the input of a direct upload is fetched to: scratch when configured."""
+        scratch = scratch_dir(task["id"])
+        input_dir = scratch / "in" if scratch else Path(task["input_dir"])
+        return input_dir / task["input_files"][0]
+
+    def _fetch_input(self, task: dict) -> bool:
+        """Stream an input uploaded via POST /uploads into scratch (or the task's input dir).
+
+        The object stays in the bucket until the task is finished, so a task
+        resumed on another node can fetch it again.
+        """
+        object_key = task["input_object"]
+        input_path = self._input_location(task)
+        partial = input_path.with_name(f".{input_path.name}.part")
+        preset = task.get("preset", "default")
+        started = time.perf_counter()
+        try:
+            input_path.parent.mkdir(parents=True, exist_ok=True)
+            size, input_hash = object_store.download(object_key, partial)
+            os.replace(partial, input_path)
+            if detect_file_type(input_path) == "pdf":
+                page_count = pdf_page_count(input_path)
+                if page_count > settings.max_pdf_pages:
+                    raise ValueError(f"PDF has {page_count} pages, at most {settings.max_pdf_pages} allowed")
+        except Exception as exc:
+            partial.unlink(missing_ok=True)
+            self._give_up(task, TaskStatus.error, f"Failed to fetch uploaded input: {exc}")
+            return False
+        UPLOAD_SECONDS.labels(preset).observe(time.perf_counter() - started)
+        UPLOAD_BYTES.labels(preset).observe(size)
+
+        task["input_hash"] = input_hash
+        repo.save(task)
+        return True
+
+    def _run_task(self, task: dict, run: TaskRun) -> None:
+        """Run Audiveris for a task and store the outcome."""
         input_files = task.get("input_files", [])
         input_dir = Path(task.get("input_dir", ""))
         output_dir = Path(task.get("output_dir", ""))
         playlist = task.get("playlist", False)
         preset = task.get("preset", "default")
+        speed = task.get("speed", "balanced")
 
         input_paths = [input_dir / fname for fname in input_files]
+        work_dir, publish_dir = output_dir, None
+        scratch = scratch_dir(task["id"])
+        if scratch:
+            # Audiveris runs on node-local scratch, only retained artifacts reach the shared volume
+            with stage("stage_inputs"):
+                input_paths = copy_to_scratch(input_paths, scratch / "in")
+            work_dir, publish_dir = scratch / "out", output_dir
+        checkpoints = TaskCheckpoints(task)
+        progress = SheetProgress(task, output_dir / SHEET_RESULTS_DIR, scratch / "sheets" if scratch else None)
         errors = None
         completed_count = 0
         failed_count = 0
 
         if playlist and len(input_paths) > 0:
             # Process all files as a single playlist (one book -> one MusicXML)
-            res = audiveris_service.process_playlist(input_paths, output_dir, preset)
+            res = audiveris_service.process_playlist(
+                input_paths, work_dir, preset, speed, self._cpu_set, task.get("input_hash"),
+                checkpoints, task.get("deadline"), publish_dir, progress,
+            )
             results = res.model_dump()
 
             if res.error:
@@ -62,7 +253,10 @@ class Worker:
         else:
             # Process single file
             input_path = input_paths[0]
-            res = audiveris_service.process_single(input_path, output_dir, preset)
+            res = audiveris_service.process_single(
+                input_path, work_dir, preset, speed, self._cpu_set, task.get("input_hash"),
+                checkpoints, task.get("deadline"), publish_dir, progress,
+            )
             results = res.model_dump()
 
             if res.error:
@@ -74,7 +268,12 @@ class Worker:
         # Determine final status
         task["results"] = results
         task["errors"] = errors
+        task["profile"] = run.profile.model_dump() if run.profile else None
+        with stage("scan"):
+            manifest = scan_output_dir(output_dir)
+        task["manifest"] = manifest.model_dump()
         task["progress"] = {
+            **task["progress"],
             "total": len(input_paths) if not playlist else 1,
             "completed": completed_count,
             "failed": failed_count,
@@ -85,16 +284,61 @@ class Worker:
         else:
             task["status"] = TaskStatus.error.value
 
-        repo.save(task)
-
-        shutil.rmtree(input_dir, ignore_errors=True)
+        with stage("save"):
+            repo.save(task)
+            if task["profile"]:
+                repo.record_profile(preset, speed, task["profile"])
+            self._discard_inputs(task)
+            record_output(output_dir, manifest.total_size)
+            enforce_quota()
 
 
 def create_workers(count: int) -> list[Worker]:
-    """Create and start multiple workers."""
+    """Create and start multiple workers.
+
+    With CPU packing enabled every worker gets its own CPU set.
+    """
+    count = max(count, 1)
+    cpu_sets: list[frozenset[int] | None] = [None] * count
+    if settings.cpu_packing:
+        cpu_sets = plan_cpu_sets(count, settings.cpus_per_task)
+
     workers = []
-    for _ in range(max(count, 1)):
-        worker = Worker()
+    for cpu_set in cpu_sets:
+        worker = Worker(cpu_set)
         worker.start()
         workers.append(worker)
     return workers
+
+
+def start_heartbeat_loop(stop_event: threading.Event) -> threading.Thread:
+    """Keep this process marked alive in a background thread (see `repo.reconcile_input_attempts`)."""
+    def _loop() -> None:
+        while True:
+            try:
+                repo.heartbeat()
+            except redis.RedisError:
+                pass  # Retried on the next beat; the key outlives two missed beats
+            if stop_event.wait(settings.worker_heartbeat_seconds):
+                return
+
+    thread = threading.Thread(target=_loop, daemon=True)
+    thread.start()
+    return thread
+
+
+def drain_workers(workers: list[Worker], grace_seconds: float) -> None:
+    """Stop workers, letting in-flight tasks finish within the grace period.
+
+    Audiveris processes still running after it are terminated; their
+    tasks are requeued and resume from their checkpoints.
+    """
+    for worker in workers:
+        worker.stop()
+    deadline = time.monotonic() + grace_seconds
+    for worker in workers:
+        worker.join(max(deadline - time.monotonic(), 0))
+    if any(worker.is_alive() for worker in workers):
+        audiveris_service.terminate_running()
+        for worker in workers:
+            worker.join(timeout=5)
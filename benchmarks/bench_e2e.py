@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark of the service around Audiveris.
+
+Audiveris is replaced with `benchmarks/fake_audiveris.py`, so the numbers
+show the overhead of routes, workers and Redis rather than OMR time. The
+API runs in-process (ASGI, no network) with real workers against a local
+Redis, or against fakeredis with `--fakeredis`. Keys go to a separate
+`audiveris-bench:` namespace and are removed afterwards.
+
+For every worker count it reports submissions/sec, throughput, queue
+wait and end-to-end latency percentiles, and Redis round trips per task
+(single commands plus pipeline executions) made by the API and by the
+workers. Idle dequeue polls are reported separately.
+
+Usage:
+    python -m benchmarks.bench_e2e
+    python -m benchmarks.bench_e2e --workers 1 4 8 --tasks 200 --seconds 0.1
+    python -m benchmarks.bench_e2e --fakeredis --cpu-seconds 0.2
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from api.config import settings
+from api.repository import repo
+from api.routes import router
+from api.worker import create_workers, drain_workers
+
+FAKE_AUDIVERIS = Path(__file__).with_name("fake_audiveris.py")
+NAMESPACE = "audiveris-bench:"
+DONE = {"completed", "error", "expired"}
+
+
+class RoundTripCounter:
+    """Count Redis round trips of a client, split by caller.
+
+    A single command and a pipeline execution are one round trip each.
+    Calls from worker threads count as worker trips, calls from the main
+    thread (the harness itself) are ignored, the rest are API trips.
+    """
+
+    POLLS = {"BLPOP", "ZPOPMIN"}
+
+    def __init__(self, client) -> None:
+        self._lock = threading.Lock()
+        self.counts: Counter[str] = Counter()
+        execute_command = client.execute_command
+        pipeline = client.pipeline
+
+        def counted_command(*args, **kwargs):
+            self._count(str(args[0]).upper())
+            return execute_command(*args, **kwargs)
+
+        def counted_pipeline(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            execute = pipe.execute
+
+            def counted_execute(*exec_args, **exec_kwargs):
+                self._count("PIPELINE")
+                return execute(*exec_args, **exec_kwargs)
+
+            pipe.execute = counted_execute
+            return pipe
+
+        client.execute_command = counted_command
+        client.pipeline = counted_pipeline
+
+    def _count(self, command: str) -> None:
+        thread = threading.current_thread()
+        if thread is threading.main_thread():
+            return
+        if thread.name.startswith("audiveris-worker"):
+            caller = "poll" if command in self.POLLS else "worker"
+        else:
+            caller = "api"
+        with self._lock:
+            self.counts[caller] += 1
+
+    def reset(self) -> Counter[str]:
+        with self._lock:
+            counts, self.counts = self.counts, Counter()
+        return counts
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile, 0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(max(int(round(q / 100 * len(ordered) + 0.5)) - 1, 0), len(ordered) - 1)
+    return ordered[index]
+
+
+def make_inputs(count: int, size: int) -> list[bytes]:
+    """Distinct PNG pages, so every task has its own input hash."""
+    inputs = []
+    for index in range(count):
+        image = Image.new("L", (size, size * 4 // 3), 255)
+        image.putpixel((index % size, index // size % size), 0)
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG")
+        inputs.append(buffer.getvalue())
+    return inputs
+
+
+def isolate_settings(root: Path, audiveris_cmd: str) -> None:
+    """Point storage and Redis keys of the service at benchmark-only places."""
+    settings.audiveris_cmd = audiveris_cmd
+    settings.input_dir = str(root / "in")
+    settings.output_dir = str(root / "out")
+    settings.media_root = str(root)
+    settings.book_cache = False
+    settings.autoscale = False
+    for name in type(settings).model_fields:
+        if name.endswith(("_key", "_key_prefix")):
+            value = getattr(settings, name)
+            if not value.startswith(NAMESPACE):
+                setattr(settings, name, NAMESPACE + value)
+
+
+def clear_namespace(client) -> None:
+    keys = list(client.scan_iter(f"{NAMESPACE}*"))
+    if keys:
+        client.delete(*keys)
+
+
+def wait_for(client, task_ids: list[str], timeout: float) -> list[dict]:
+    """Poll task records (uncounted: main thread) until all are finished."""
+    keys = [f"{settings.task_key_prefix}{task_id}" for task_id in task_ids]
+    deadline = time.monotonic() + timeout
+    while True:
+        tasks = [json.loads(payload) if payload else {} for payload in client.mget(keys)]
+        if all(task.get("status") in DONE for task in tasks) or time.monotonic() > deadline:
+            return tasks
+        time.sleep(0.05)
+
+
+def run_workers(
+    client: TestClient,
+    counter: RoundTripCounter,
+    inputs: list[bytes],
+    workers: int,
+    concurrency: int,
+    timeout: float,
+) -> dict:
+    """Submit every input and process it with `workers` workers."""
+    clear_namespace(repo._redis)
+    counter.reset()
+    pool = create_workers(workers)
+
+    def _submit(index: int) -> str:
+        response = client.post(
+            "/tasks/single",
+            params={"api_key": settings.api_token},
+            files={"file": (f"page-{index}.png", inputs[index], "image/png")},
+        )
+        response.raise_for_status()
+        return response.json()["taskId"]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench-submit") as submitters:
+        task_ids = list(submitters.map(_submit, range(len(inputs))))
+    submit_elapsed = time.perf_counter() - started
+
+    tasks = wait_for(repo._redis, task_ids, timeout)
+    elapsed = time.perf_counter() - started
+    drain_workers(pool, settings.worker_shutdown_grace_seconds)
+    counts = counter.reset()
+
+    waits, latencies = [], []
+    failed = 0
+    for task in tasks:
+        if task.get("status") != "completed":
+            failed += 1
+            continue
+        created = datetime.fromisoformat(task["created_at"])
+        waits.append((datetime.fromisoformat(task["started_at"]) - created).total_seconds())
+        latencies.append((datetime.fromisoformat(task["updated_at"]) - created).total_seconds())
+
+    return {
+        "workers": workers,
+        "submit_rate": len(inputs) / submit_elapsed if submit_elapsed else 0.0,
+        "throughput": len(inputs) / elapsed * 60 if elapsed else 0.0,
+        "wait": [percentile(waits, q) for q in (50, 95)],
+        "e2e": [percentile(latencies, q) for q in (50, 95, 99)],
+        "api_trips": counts["api"] / len(inputs),
+        "worker_trips": counts["worker"] / len(inputs),
+        "polls": counts["poll"],
+        "failed": failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark with a fake Audiveris")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Worker counts to compare")
+    parser.add_argument("--tasks", type=int, default=50, help="Tasks per worker count (default: 50)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel submitting clients (default: 8)")
+    parser.add_argument("--seconds", type=float, default=0.2, help="Fake Audiveris sleep per sheet (default: 0.2)")
+    parser.add_argument("--cpu-seconds", type=float, default=0.0, help="Fake Audiveris CPU burn per sheet")
+    parser.add_argument("--image-size", type=int, default=settings.image_min_dimension, help="Input page width, px")
+    parser.add_argument("--redis-url", default=settings.redis_url, help="Redis to run against (default: REDIS_URL)")
+    parser.add_argument("--fakeredis", action="store_true", help="Use in-process fakeredis instead of Redis")
+    parser.add_argument("--audiveris-cmd", default=str(FAKE_AUDIVERIS), help="Audiveris stand-in to run")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Max seconds to wait for one run")
+
+    args = parser.parse_args()
+
+    if args.fakeredis:
+        try:
+            import fakeredis
+        except ImportError:
+            print("Error: --fakeredis needs the fakeredis package (pip install fakeredis)")
+            return 1
+        repo._redis = fakeredis.FakeRedis(decode_responses=True)
+    else:
+        import redis
+
+        repo._redis = redis.Redis.from_url(args.redis_url, decode_responses=True)
+    counter = RoundTripCounter(repo._redis)
+
+    os.environ["FAKE_AUDIVERIS_SECONDS"] = str(args.seconds)
+    os.environ["FAKE_AUDIVERIS_CPU_SECONDS"] = str(args.cpu_seconds)
+
+    app = FastAPI()
+    app.include_router(router)
+    inputs = make_inputs(args.tasks, args.image_size)
+    root = Path(tempfile.mkdtemp(prefix="bench-e2e-"))
+    isolate_settings(root, args.audiveris_cmd)
+
+    print(f"Redis:     {'fakeredis' if args.fakeredis else args.redis_url}")
+    print(f"Audiveris: {args.audiveris_cmd} ({args.seconds:g}s sleep, {args.cpu_seconds:g}s CPU per sheet)")
+    print(f"Tasks:     {args.tasks} per run, {args.concurrency} submitters")
+    print()
+    print(
+        f"{'workers':>7} {'submit/s':>9} {'tasks/min':>10} {'wait p50':>9} {'wait p95':>9} "
+        f"{'e2e p50':>8} {'e2e p95':>8} {'e2e p99':>8} {'api RT':>7} {'wrk RT':>7} {'polls':>6} {'failed':>7}"
+    )
+    try:
+        with TestClient(app) as client:
+            for workers in args.workers:
+                stats = run_workers(client, counter, inputs, workers, args.concurrency, args.timeout)
+                print(
+                    f"{stats['workers']:>7} {stats['submit_rate']:>9.1f} {stats['throughput']:>10.1f} "
+                    f"{stats['wait'][0]:>9.2f} {stats['wait'][1]:>9.2f} "
+                    f"{stats['e2e'][0]:>8.2f} {stats['e2e'][1]:>8.2f} {stats['e2e'][2]:>8.2f} "
+                    f"{stats['api_trips']:>7.1f} {stats['worker_trips']:>7.1f} "
+                    f"{stats['polls']:>6} {stats['failed']:>7}"
+                )
+    finally:
+        clear_namespace(repo._redis)
+        shutil.rmtree(root, ignore_errors=True)
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark of Audiveris with and without JVM startup tuning.
+
+Launches Audiveris repeatedly with plain JAVA_OPTS and with the options
+from `api.jvm` (AppCDS archive plus startup flags), and reports the
+wall time per launch. The archive is trained by one extra run first,
+in a temporary directory unless `--cds-dir` is given.
+
+Without an input only startup is measured (`audiveris -batch -help`);
+with an input every launch transcribes it, so the gain is seen against
+a whole job.
+
+Usage:
+    python -m benchmarks.bench_jvm_startup
+    python -m benchmarks.bench_jvm_startup score.png --runs 5
+    python -m benchmarks.bench_jvm_startup score.png --pages 10  # Large-job flags
+"""
+
+import argparse
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from api.config import settings
+from api.jvm import jvm_launcher
+from api.packing import subprocess_kwargs
+
+
+def launch(cmd: list[str], java_opts: list[str]) -> tuple[float, int]:
+    """Wall time and exit code of one Audiveris launch."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        cmd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **subprocess_kwargs(None, java_opts),
+    )
+    return time.perf_counter() - started, result.returncode
+
+
+def build_cmd(input_path: Path | None, output_dir: Path) -> list[str]:
+    if input_path is None:
+        return [settings.audiveris_cmd, "-batch", "-help"]
+    return [
+        settings.audiveris_cmd, "-batch", "-transcribe", "-export",
+        "-output", str(output_dir), str(input_path),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Audiveris cold starts with JVM startup tuning")
+    parser.add_argument("input", type=Path, nargs="?", help="Image to transcribe (default: startup only)")
+    parser.add_argument("--runs", type=int, default=5, help="Launches per mode (default: 5)")
+    parser.add_argument("--pages", type=int, default=1, help="Job size used to pick the flags (default: 1)")
+    parser.add_argument("--cds-dir", type=Path, help="Archive directory (default: a temporary one)")
+
+    args = parser.parse_args()
+
+    if args.input and not args.input.exists():
+        print(f"Error: Input file not found: {args.input}")
+        return 1
+
+    with tempfile.TemporaryDirectory(prefix="bench-jvm-") as tmp:
+        settings.jvm_startup_tuning = True
+        settings.jvm_cds_dir = str(args.cds_dir or Path(tmp) / "cds")
+        cmd = build_cmd(args.input, Path(tmp) / "out")
+
+        print(f"Command: {' '.join(cmd)}")
+        print(f"Archive: {jvm_launcher.archive_path()}")
+
+        if not jvm_launcher.archive_path().exists():
+            java_opts, training = jvm_launcher.options(args.pages)
+            seconds, code = launch(cmd, java_opts)
+            if training:
+                jvm_launcher.finish_training(training)
+            print(f"Training run: {seconds:.2f}s (exit {code})")
+        if not jvm_launcher.archive_path().exists():
+            print("Error: the JVM did not write an AppCDS archive")
+            return 1
+        java_opts, _ = jvm_launcher.options(args.pages)
+        print(f"Tuned opts: {' '.join(java_opts)}")
+        print()
+
+        print(f"{'mode':>8} {'median, s':>10} {'min, s':>8} {'max, s':>8} {'failed':>7}")
+        for mode, opts in (("plain", []), ("tuned", java_opts)):
+            times, failed = [], 0
+            for _ in range(args.runs):
+                seconds, code = launch(cmd, opts)
+                times.append(seconds)
+                failed += 1 if code != 0 else 0
+            print(
+                f"{mode:>8} {statistics.median(times):>10.2f} "
+                f"{min(times):>8.2f} {max(times):>8.2f} {failed:>7}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for CPU packing of Audiveris processes.
+
+Runs the same input through AudiverisService with different
+workers x cpus-per-task layouts (1xN ... Nx1) and reports tasks/minute.
+
+Usage:
+    python -m benchmarks.bench_packing input.png
+    python -m benchmarks.bench_packing input.png --jobs 16 --preset drums
+    python -m benchmarks.bench_packing input.png --layout 1x8 --layout 8x1
+"""
+
+import argparse
+import queue
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from api.packing import available_cpus, plan_cpu_sets
+from api.services import audiveris_service
+
+
+def default_layouts(cpu_count: int) -> list[tuple[int, int]]:
+    """All workers x cpus layouts that exactly fill the available cores."""
+    return [
+        (workers, cpu_count // workers)
+        for workers in range(1, cpu_count + 1)
+        if cpu_count % workers == 0
+    ]
+
+
+def parse_layout(value: str) -> tuple[int, int]:
+    workers, cpus = value.lower().split("x")
+    return int(workers), int(cpus)
+
+
+def run_layout(
+    input_path: Path,
+    workers: int,
+    cpus_per_task: int,
+    jobs: int,
+    preset: str,
+    pinned: bool,
+) -> dict:
+    """Process `jobs` copies of the input with the given layout."""
+    cpu_sets = plan_cpu_sets(workers, cpus_per_task) if pinned else [None] * workers
+    # A running job holds its CPU set, so no two jobs share one while another is idle
+    free_sets: queue.Queue[frozenset[int] | None] = queue.Queue()
+    for cpu_set in cpu_sets:
+        free_sets.put(cpu_set)
+    failures = 0
+
+    with tempfile.TemporaryDirectory(prefix="bench-packing-") as tmp:
+        root = Path(tmp)
+
+        def _job(index: int) -> bool:
+            job_dir = root / f"job-{index}"
+            out_dir = job_dir / "out"
+            out_dir.mkdir(parents=True)
+            job_input = job_dir / input_path.name
+            shutil.copy(input_path, job_input)
+            cpu_set = free_sets.get()
+            try:
+                res = audiveris_service.process_single(job_input, out_dir, preset, cpu_set=cpu_set)
+            finally:
+                free_sets.put(cpu_set)
+            return res.error is None
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(cpu_sets)) as pool:
+            for ok in pool.map(_job, range(jobs)):
+                failures += 0 if ok else 1
+        elapsed = time.perf_counter() - started
+
+    return {
+        "workers": len(cpu_sets),
+        "cpus": cpus_per_task,
+        "elapsed": elapsed,
+        "throughput": jobs / elapsed * 60 if elapsed else 0.0,
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Audiveris CPU packing layouts")
+    parser.add_argument("input", type=Path, help="Input image or PDF")
+    parser.add_argument("--jobs", type=int, default=0, help="Tasks per layout (default: number of CPUs)")
+    parser.add_argument("--preset", default="default", help="Preset to use (default: default)")
+    parser.add_argument(
+        "--layout", action="append", type=parse_layout,
+        help="WORKERSxCPUS layout, may be repeated (default: every exact split of the cores)",
+    )
+    parser.add_argument("--no-pin", action="store_true", help="Run workers side by side without CPU sets")
+
+    args = parser.parse_args()
+
+    if not args.input.exists():
+        print(f"Error: Input file not found: {args.input}")
+        return 1
+
+    cpu_count = len(available_cpus())
+    layouts = args.layout or default_layouts(cpu_count)
+    jobs = args.jobs or cpu_count
+
+    print(f"Input:  {args.input}")
+    print(f"CPUs:   {cpu_count}")
+    print(f"Jobs:   {jobs} per layout")
+    print(f"Pinned: {'No' if args.no_pin else 'Yes'}")
+    print()
+    print(f"{'layout':>8} {'elapsed, s':>11} {'tasks/min':>10} {'failed':>7}")
+
+    for workers, cpus in layouts:
+        stats = run_layout(args.input, workers, cpus, jobs, args.preset, not args.no_pin)
+        layout = f"{stats['workers']}x{stats['cpus']}"
+        print(
+            f"{layout:>8} {stats['elapsed']:>11.1f} "
+            f"{stats['throughput']:>10.2f} {stats['failures']:>7}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Image preprocessing benchmark over a corpus of sample scans.
+
+Runs the service's own preprocessing (`AudiverisService._preprocess_image`)
+on copies of every image and reports per-image decode / resize / enhance /
+encode time, peak RSS and output size. With `--audiveris` the preprocessed
+image is also transcribed, reporting Audiveris time, interline and
+success, so upscale/contrast/sharpness settings can be compared on speed
+versus recognition.
+
+With `--binarize both` every image also goes through the 1-bit path
+(`IMAGE_BINARIZE`, see `api.binarize`) and both paths are reported side by
+side, so its speed, output size and, with `--audiveris`, Audiveris time and
+interline can be compared against the 8-bit path.
+
+Settings default to the service configuration (IMAGE_* variables).
+
+Usage:
+    python -m benchmarks.bench_preprocess scans/
+    python -m benchmarks.bench_preprocess scans/ --factor 3.0 --contrast 1.5 --sharpness 2.0
+    python -m benchmarks.bench_preprocess scans/ page1.png --audiveris --preset drums
+    python -m benchmarks.bench_preprocess scans/ --keep enhanced/
+    python -m benchmarks.bench_preprocess scans/ --binarize both --audiveris
+"""
+
+import argparse
+import resource
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from api.checkpoints import PREPROCESSED, TaskCheckpoints
+from api.config import settings
+from api.manifest import find_book_log, scan_output_dir
+from api.services import audiveris_service
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+PHASES = ("convert", "decode", "resize", "enhance", "binarize", "encode")
+MODES = {"off": (False,), "on": (True,), "both": (False, True)}
+
+
+def collect_images(paths: list[Path]) -> list[Path]:
+    """Images given directly or found in the given directories."""
+    images = []
+    for path in paths:
+        if path.is_dir():
+            images.extend(sorted(
+                found for found in path.rglob("*") if found.suffix.lower() in IMAGE_SUFFIXES
+            ))
+        elif path.exists():
+            images.append(path)
+    return images
+
+
+def reset_peak_rss() -> bool:
+    """Reset the peak RSS of this process (Linux); False if unsupported."""
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux and never goes down
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_image(image: Path, work_dir: Path, audiveris: bool, preset: str, speed: str, binarize: bool) -> dict:
+    """Preprocess a copy of one image, optionally transcribe it."""
+    settings.image_binarize = binarize
+    image_dir = work_dir / f"{image.stem}-{'1bit' if binarize else '8bit'}"
+    image_dir.mkdir(parents=True, exist_ok=True)
+    input_path = image_dir / image.name
+    shutil.copyfile(image, input_path)
+
+    timings: dict[str, float] = {}
+    reset_peak_rss()
+    started = time.perf_counter()
+    processed = audiveris_service._preprocess_image(input_path, timings)
+    stats = {
+        "image": image.name,
+        "binarize": binarize,
+        "timings": timings,
+        "total": time.perf_counter() - started,
+        "peak_rss": peak_rss_mb(),
+        "input_bytes": image.stat().st_size,
+        "output_bytes": processed.stat().st_size,
+        "processed": processed,
+    }
+
+    if audiveris:
+        out_dir = image_dir / "out"
+        checkpoints = TaskCheckpoints()
+        checkpoints.mark(PREPROCESSED, [processed.name])  # Do not preprocess again
+        started = time.perf_counter()
+        result = audiveris_service.process_single(
+            processed, out_dir, preset, speed, checkpoints=checkpoints,
+        )
+        stats["audiveris"] = time.perf_counter() - started
+        stats["error"] = result.error
+        book_log = find_book_log(scan_output_dir(out_dir))
+        stats["interline"] = audiveris_service._detect_interline(out_dir / book_log) if book_log else None
+    return stats
+
+
+def summarize(results: list[dict], audiveris: bool) -> None:
+    """Totals of one path (8-bit or 1-bit)."""
+    totals = [stats["total"] for stats in results]
+    print(f"  Preprocess: median {statistics.median(totals) * 1000:.1f} ms, total {sum(totals):.2f} s")
+    print(f"  Peak RSS:   max {max(stats['peak_rss'] for stats in results):.0f} MB")
+    output = sum(stats["output_bytes"] for stats in results)
+    source = sum(stats["input_bytes"] for stats in results)
+    print(f"  Output:     {output / 1024 / 1024:.1f} MB ({output / source:.2f}x input)")
+    if audiveris:
+        succeeded = sum(1 for stats in results if not stats["error"])
+        omr = [stats["audiveris"] for stats in results]
+        interlines = [stats["interline"] for stats in results if stats["interline"] is not None]
+        print(f"  Audiveris:  {succeeded}/{len(results)} succeeded, median {statistics.median(omr):.1f} s")
+        print(f"  Interline:  {len(interlines)}/{len(results)} detected"
+              + (f", median {statistics.median(interlines)}" if interlines else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image preprocessing for Audiveris")
+    parser.add_argument("inputs", type=Path, nargs="+", help="Images or directories of images")
+    parser.add_argument("--min-dimension", type=int, default=settings.image_min_dimension,
+                        help=f"Min dimension to trigger upscale (default: {settings.image_min_dimension})")
+    parser.add_argument("--factor", type=float, default=settings.image_upscale_factor,
+                        help=f"Upscale factor (default: {settings.image_upscale_factor})")
+    parser.add_argument("--contrast", type=float, default=settings.image_contrast_factor,
+                        help=f"Contrast factor (default: {settings.image_contrast_factor})")
+    parser.add_argument("--sharpness", type=float, default=settings.image_sharpness_factor,
+                        help=f"Sharpness factor (default: {settings.image_sharpness_factor})")
+    parser.add_argument("--binarize", choices=sorted(MODES), default="on" if settings.image_binarize else "off",
+                        help="1-bit path: off, on, or both to compare (default: IMAGE_BINARIZE)")
+    parser.add_argument("--window", type=int, default=settings.image_binarize_window,
+                        help=f"Binarisation window, px (default: {settings.image_binarize_window})")
+    parser.add_argument("--format", choices=["png", "tiff"], default=settings.image_binarize_format,
+                        help=f"1-bit output format (default: {settings.image_binarize_format})")
+    parser.add_argument("--audiveris", action="store_true", help="Also transcribe each preprocessed image")
+    parser.add_argument("--preset", default="default", help="Preset for --audiveris (default: default)")
+    parser.add_argument("--speed", default="balanced", help="Speed tier for --audiveris (default: balanced)")
+    parser.add_argument("--keep", type=Path, help="Copy preprocessed images to this directory")
+
+    args = parser.parse_args()
+
+    images = collect_images(args.inputs)
+    if not images:
+        print("Error: no images found (PNG, JPG, WebP)")
+        return 1
+
+    settings.image_min_dimension = args.min_dimension
+    settings.image_upscale_factor = args.factor
+    settings.image_contrast_factor = args.contrast
+    settings.image_sharpness_factor = args.sharpness
+    settings.image_binarize_window = args.window
+    settings.image_binarize_format = args.format
+
+    print(f"Images: {len(images)}")
+    print("Settings:")
+    print(f"  min_dimension: {args.min_dimension}px")
+    print(f"  upscale_factor: {args.factor}x")
+    print(f"  contrast: {args.contrast}")
+    print(f"  sharpness: {args.sharpness}")
+    print(f"  binarize: {args.binarize} (window {args.window}px, {args.format})")
+    if not reset_peak_rss():
+        print("  (peak RSS is the process-wide maximum: /proc/self/clear_refs is not available)")
+    print()
+
+    header = f"{'image':<28}{'path':>6}" + "".join(f"{phase + ', ms':>13}" for phase in PHASES)
+    header += f"{'RSS, MB':>9}{'out, KB':>9}"
+    if args.audiveris:
+        header += f"{'omr, s':>8}{'interline':>10}  result"
+    print(header)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-preprocess-") as tmp:
+        for image, binarize in ((image, mode) for image in images for mode in MODES[args.binarize]):
+            stats = bench_image(image, Path(tmp), args.audiveris, args.preset, args.speed, binarize)
+            results.append(stats)
+            row = f"{stats['image'][:27]:<28}{'1-bit' if binarize else '8-bit':>6}"
+            row += "".join(f"{stats['timings'].get(phase, 0.0) * 1000:>13.1f}" for phase in PHASES)
+            row += f"{stats['peak_rss']:>9.0f}{stats['output_bytes'] / 1024:>9.0f}"
+            if args.audiveris:
+                interline = stats["interline"] if stats["interline"] is not None else "-"
+                row += f"{stats['audiveris']:>8.1f}{interline:>10}  {stats['error'] or 'ok'}"
+            print(row)
+            if args.keep:
+                args.keep.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(stats["processed"], args.keep / stats["processed"].name)
+
+    for binarize in MODES[args.binarize]:
+        print()
+        print("1-bit path:" if binarize else "8-bit path:")
+        summarize([stats for stats in results if stats["binarize"] == binarize], args.audiveris)
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
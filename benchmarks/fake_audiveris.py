@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the Audiveris CLI, for benchmarking the service around it.
+
+Understands the arguments AudiverisService passes (`-batch`, `-constant`,
+`-transcribe`, `-step`, `-force`, `-export`, `-sheets`, `-playlist`, `-output`) and
+writes what Audiveris would: a `.omr` book (zip with book.xml and one folder
+per sheet), a `.mxl` MusicXML archive and a timestamped book log with
+interline lines. StopWatch tables and the "Disposed sheet" line of every
+transcribed sheet are printed on stdout like Audiveris does.
+
+Like Audiveris, the book keeps the last step each sheet reached: a sheet
+only runs the steps it has not done yet, and `-force` (read only together
+with `-step`) resets a sheet that already reached the step to BINARY.
+
+Behaviour is tuned with environment variables:
+
+    FAKE_AUDIVERIS_SECONDS      sleep per sheet (default 0.5)
+    FAKE_AUDIVERIS_CPU_SECONDS  busy loop per sheet (default 0)
+    FAKE_AUDIVERIS_INTERLINE    interline in the log (default 20)
+    FAKE_AUDIVERIS_BOOK_KB      size of each sheet image in the book (default 256)
+    FAKE_AUDIVERIS_FAIL_RATE    share of runs that exit with an error (default 0)
+    FAKE_AUDIVERIS_MOVEMENTS    movements per export (default 1); several are written
+                                as `<book>[.sheet#N].mvt#M.mxl`
+
+Usage:
+    AUDIVERIS_CMD=benchmarks/fake_audiveris.py uvicorn api.main:app
+"""
+
+import os
+import random
+import re
+import sys
+import time
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+STEPS = (
+    "LOAD", "BINARY", "SCALE", "GRID", "HEADERS", "STEM_SEEDS", "BEAMS", "LEDGERS",
+    "HEADS", "STEMS", "REDUCTION", "CUE_BEAMS", "TEXTS", "MEASURES", "CHORDS",
+    "CURVES", "SYMBOLS", "LINKS", "RHYTHMS", "PAGE",
+)
+
+MUSICXML = """<?xml version="1.0" encoding="UTF-8"?>
+<score-partwise version="4.0">
+  <part-list><score-part id="P1"><part-name>Music</part-name></score-part></part-list>
+  <part id="P1">
+    <measure number="1">
+      <attributes><divisions>1</divisions></attributes>
+      <note><pitch><step>C</step><octave>4</octave></pitch><duration>4</duration><type>whole</type></note>
+    </measure>
+  </part>
+</score-partwise>
+"""
+
+CONTAINER = """<?xml version="1.0" encoding="UTF-8"?>
+<container><rootfiles><rootfile full-path="{name}"/></rootfiles></container>
+"""
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def parse_args(argv: list[str]) -> tuple[Path | None, list[Path], Path | None, str | None]:
+    """Output dir, input files, playlist and target step of an Audiveris command line."""
+    output = playlist = target = None
+    inputs: list[Path] = []
+    args = iter(argv)
+    for arg in args:
+        if arg == "-output":
+            output = Path(next(args))
+        elif arg == "-playlist":
+            playlist = Path(next(args))
+        elif arg == "-step":
+            target = next(args, None)
+        elif arg == "-transcribe":
+            target = target or STEPS[-1]
+        elif arg in {"-constant", "-sheets", "-option"}:
+            next(args, None)
+        elif not arg.startswith("-"):
+            inputs.append(Path(arg))
+    return output, inputs, playlist, target
+
+
+def count_sheets(playlist: Path) -> int:
+    try:
+        return max(playlist.read_text().count("<excerpt"), 1)
+    except OSError:
+        return 1
+
+
+def process_sheet(seconds: float, cpu_seconds: float) -> None:
+    if cpu_seconds > 0:
+        deadline = time.process_time() + cpu_seconds
+        value = 0
+        while time.process_time() < deadline:
+            value = (value * 31 + 7) % 1_000_003
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+def steps_to_run(reached: str | None, target: str, force: bool) -> tuple[str, ...]:
+    """Steps a sheet that reached `reached` runs to get to `target`."""
+    done = STEPS.index(reached) if reached else -1
+    if force and done >= STEPS.index(target):
+        done = STEPS.index("BINARY")
+    return STEPS[done + 1:STEPS.index(target) + 1]
+
+
+def print_stopwatch(radix: str, sheet: int, total_seconds: float, steps: tuple[str, ...]) -> None:
+    """StopWatch table of one sheet, with the time spread over the steps."""
+    total_ms = max(int(total_seconds * 1000), len(steps))
+    share = total_ms // len(steps)
+    print(f'StopWatch "{radix}#{sheet}"')
+    print("-" * 35)
+    print("   ms      % Task")
+    print("-" * 35)
+    for step in steps:
+        print(f"{share:>5} {share * 100 / total_ms:5.1f}% {step}")
+    print("-" * 35)
+    print(f"{total_ms:>5} 100.0% Total")
+
+
+def read_book(path: Path) -> list[str | None]:
+    """Last step reached by every sheet of a book."""
+    reached: list[str | None] = []
+    try:
+        with zipfile.ZipFile(path) as book:
+            sheets = re.search(r'sheets="(\d+)"', book.read("book.xml").decode())
+            for sheet in range(1, int(sheets.group(1)) + 1 if sheets else 1):
+                folder = f"sheet#{sheet}"
+                step = re.search(r'step="(\w+)"', book.read(f"{folder}/{folder}.xml").decode())
+                reached.append(step.group(1) if step else None)
+    except (OSError, KeyError, zipfile.BadZipFile):
+        pass
+    return reached or [None]
+
+
+def write_book(path: Path, reached: list[str | None], image_bytes: int) -> None:
+    with zipfile.ZipFile(path, "w") as book:
+        book.writestr("book.xml", f'<book sheets="{len(reached)}"/>')
+        for sheet, step in enumerate(reached, 1):
+            folder = f"sheet#{sheet}"
+            step_attr = f' step="{step}"' if step else ""
+            book.writestr(f"{folder}/{folder}.xml", f'<sheet number="{sheet}"{step_attr}/>')
+            book.writestr(f"{folder}/BINARY.png", os.urandom(image_bytes), zipfile.ZIP_STORED)
+
+
+def write_mxl(path: Path) -> None:
+    name = f"{path.stem}.xml"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("META-INF/container.xml", CONTAINER.format(name=name))
+        archive.writestr(name, MUSICXML)
+
+
+def write_log(path: Path, radix: str, sheets: int, interline: int, started: datetime) -> None:
+    lines = []
+    stamp = started
+    for sheet in range(1, sheets + 1):
+        for message in (
+            f"Loading sheet#{sheet}",
+            f"{radix}#{sheet} Scale: interline value of {interline} pixels",
+            f"{radix}#{sheet} Transcribed",
+        ):
+            lines.append(f"{stamp:%Y-%m-%d %H:%M:%S},{stamp.microsecond // 1000:03d} INFO  {message}")
+            stamp += timedelta(milliseconds=5)
+    ended = max(datetime.now(), stamp)
+    lines.append(f"{ended:%Y-%m-%d %H:%M:%S},{ended.microsecond // 1000:03d} INFO  Exporting {radix}.mxl")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def main(argv: list[str]) -> int:
+    output, inputs, playlist, target = parse_args(argv)
+    if output is None or not (inputs or playlist):
+        print("Usage: fake_audiveris.py -batch [-transcribe -export] -output DIR INPUT...", file=sys.stderr)
+        return 2
+    output.mkdir(parents=True, exist_ok=True)
+
+    seconds = _env_float("FAKE_AUDIVERIS_SECONDS", 0.5)
+    cpu_seconds = _env_float("FAKE_AUDIVERIS_CPU_SECONDS", 0.0)
+    interline = int(_env_float("FAKE_AUDIVERIS_INTERLINE", 20))
+    image_bytes = int(_env_float("FAKE_AUDIVERIS_BOOK_KB", 256) * 1024)
+    fail_rate = _env_float("FAKE_AUDIVERIS_FAIL_RATE", 0.0)
+    movements = int(_env_float("FAKE_AUDIVERIS_MOVEMENTS", 1))
+    sheet_scope = f".sheet#{argv[argv.index('-sheets') + 1]}" if "-sheets" in argv[:-1] else ""
+    started = datetime.now()
+
+    if playlist is not None:
+        # Compound book first; books given as arguments are processed after it
+        write_book(output / f"{playlist.stem}.omr", [None] * count_sheets(playlist), image_bytes)
+        print(f"INFO  Book {playlist.stem} created")
+        if not inputs:
+            return 0
+
+    force = "-step" in argv and "-force" in argv
+    export = "-export" in argv
+    for input_path in inputs:
+        radix = input_path.stem
+        reached = read_book(input_path) if input_path.suffix == ".omr" else [None]
+        sheets = len(reached)
+        book_path = output / f"{radix}.omr"
+        if target:
+            for sheet in range(1, sheets + 1):
+                steps = steps_to_run(reached[sheet - 1], target, force)
+                if not steps:
+                    continue
+                sheet_started = time.perf_counter()
+                process_sheet(seconds, cpu_seconds)
+                print(f"INFO  {radix}#{sheet} Scale: interline value of {interline} pixels")
+                print_stopwatch(radix, sheet, time.perf_counter() - sheet_started, steps)
+                print(f"INFO  Stub#{sheet} storing")
+                print(f"INFO  Disposed sheet{sheet}", flush=True)
+                reached[sheet - 1] = steps[-1]
+        write_book(book_path, reached, image_bytes)
+        if random.random() < fail_rate:
+            print(f"ERROR Error in performing SYMBOLS on {radix}", file=sys.stderr)
+            return 1
+        write_log(output / f"{radix}-{started:%Y%m%dT%H%M%S}.log", radix, sheets, interline, started)
+        if export and movements > 1:
+            for movement in range(1, movements + 1):
+                write_mxl(output / f"{radix}{sheet_scope}.mvt#{movement}.mxl")
+        elif export:
+            write_mxl(output / f"{radix}.mxl")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from api import services
+from api.books import book_cache
+from api.config import settings
+from api.profile import OMR_STEPS
+from api.services import AudiverisService
+
+FAKE_AUDIVERIS = Path(__file__).resolve().parent.parent / "benchmarks" / "fake_audiveris.py"
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_AUDIVERIS_SECONDS", "0")
+    monkeypatch.setenv("FAKE_AUDIVERIS_BOOK_KB", "1")
+    monkeypatch.setattr(settings, "audiveris_cmd", str(FAKE_AUDIVERIS))
+    monkeypatch.setattr(settings, "book_cache", True)
+    monkeypatch.setattr(settings, "task_ttl_seconds", 0)
+    monkeypatch.setattr(settings, "jvm_startup_tuning", False)
+    monkeypatch.setattr(settings, "image_min_dimension", 0)
+    monkeypatch.setattr(book_cache, "_root", tmp_path / "books")
+    return AudiverisService()
+
+
+@pytest.fixture
+def profiles(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(services, "set_profile", recorded.append)
+    return recorded
+
+
+@pytest.fixture
+def commands(service, monkeypatch):
+    recorded = []
+    run_subprocess = service._run_subprocess
+
+    def record(cmd, *args, **kwargs):
+        recorded.append(cmd)
+        return run_subprocess(cmd, *args, **kwargs)
+
+    monkeypatch.setattr(service, "_run_subprocess", record)
+    return recorded
+
+
+def run(service: AudiverisService, tmp_path: Path, name: str, preset: str) -> None:
+    input_path = tmp_path / name / "score.png"
+    (tmp_path / name / "out").mkdir(parents=True)
+    Image.new("L", (400, 300), 255).save(input_path)
+    service._run_audiveris(input_path, tmp_path / name / "out", preset=preset, input_hash="abc")
+
+
+def test_preset_retry_redoes_the_steps_after_binary(service, profiles, commands, tmp_path):
+    run(service, tmp_path, "first", "default")
+    assert list(profiles[-1].steps) == list(OMR_STEPS)
+
+    run(service, tmp_path, "retry", "jazz")
+    assert list(profiles[-1].steps) == list(OMR_STEPS[OMR_STEPS.index("BINARY") + 1:])
+    assert "-force" in commands[-1] and "-step" in commands[-1]
+
+
+def test_same_constants_only_export(service, profiles, tmp_path):
+    run(service, tmp_path, "first", "default")
+    run(service, tmp_path, "again", "default")
+    assert profiles[-1] is None
+    assert (tmp_path / "again" / "out" / "score.mxl").is_file()
@@ -0,0 +1,167 @@
+import gzip
+import io
+import zipfile
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from api.downloads import FileRangeResponse, log_response, zip_response
+
+CONTENT = bytes(range(256)) * 40
+LOG_TEXT = "step LOAD\nstep BINARY\n" * 1000
+
+
+@pytest.fixture
+def files(tmp_path):
+    result = tmp_path / "score.mxl"
+    result.write_bytes(CONTENT)
+    log = tmp_path / "run.log"
+    log.write_text(LOG_TEXT)
+    with gzip.open(tmp_path / "audiveris.log.gz", "wt") as handle:
+        handle.write(LOG_TEXT)
+    return result, log
+
+
+@pytest.fixture
+def client(files):
+    result, log = files
+    app = FastAPI()
+
+    @app.get("/result")
+    def get_result(request: Request):
+        return FileRangeResponse(request, result, "application/vnd.recordare.musicxml", result.name)
+
+    @app.get("/log/{name}")
+    def get_log(request: Request, name: str):
+        return log_response(request, result.parent / name)
+
+    @app.get("/bundle")
+    def get_bundle():
+        return zip_response([(result, "score.mxl"), (log, "logs/run.log")], "bundle.zip")
+
+    return TestClient(app)
+
+
+def test_full_file(client):
+    response = client.get("/result")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-length"] == str(len(CONTENT))
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"]
+
+
+@pytest.mark.parametrize(
+    ("header", "start", "end"),
+    [
+        ("bytes=0-99", 0, 99),
+        ("bytes=100-", 100, len(CONTENT) - 1),
+        ("bytes=-10", len(CONTENT) - 10, len(CONTENT) - 1),
+        ("bytes=10000-20000", 10000, len(CONTENT) - 1),
+        ("bytes=-999999", 0, len(CONTENT) - 1),
+    ],
+)
+def test_partial(client, header, start, end):
+    response = client.get("/result", headers={"Range": header})
+    assert response.status_code == 206
+    assert response.content == CONTENT[start:end + 1]
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(CONTENT)}"
+    assert response.headers["content-length"] == str(end - start + 1)
+
+
+@pytest.mark.parametrize("header", ["bytes=20000-", "bytes=10240-10300", "bytes=-0"])
+def test_unsatisfiable(client, header):
+    response = client.get("/result", headers={"Range": header})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+    assert response.content == b""
+
+
+@pytest.mark.parametrize(
+    "header",
+    ["bytes=abc-", "bytes=1-x", "bytes=-", "bytes=5", "bytes=50-10", "bytes=0-1,5-9", "items=0-9"],
+)
+def test_invalid_range_is_ignored(client, header):
+    response = client.get("/result", headers={"Range": header})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_if_range_mismatch_serves_full_file(client):
+    response = client.get("/result", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_if_range_match_serves_part(client):
+    etag = client.get("/result").headers["etag"]
+    response = client.get("/result", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert response.status_code == 206
+    assert response.content == CONTENT[:10]
+
+
+def test_not_modified(client):
+    etag = client.get("/result").headers["etag"]
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = client.get("/result", headers={"If-None-Match": header})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+
+def test_not_modified_wins_over_range(client):
+    etag = client.get("/result").headers["etag"]
+    response = client.get("/result", headers={"If-None-Match": etag, "Range": "bytes=0-9"})
+    assert response.status_code == 304
+
+
+def test_zip_round_trip(client, files):
+    result, log = files
+    response = client.get("/bundle")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert 'filename="bundle.zip"' in response.headers["content-disposition"]
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["score.mxl", "logs/run.log"]
+        assert archive.read("score.mxl") == result.read_bytes()
+        assert archive.read("logs/run.log") == log.read_bytes()
+        assert archive.getinfo("score.mxl").compress_type == zipfile.ZIP_STORED
+        assert archive.getinfo("logs/run.log").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_plain_log(client):
+    response = client.get("/log/run.log", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.text == LOG_TEXT[:10]
+    assert "content-encoding" not in response.headers
+
+
+def test_gzipped_log_is_sent_as_is(client, files):
+    compressed = files[0].parent / "audiveris.log.gz"
+    response = client.get("/log/audiveris.log.gz", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-length"] == str(compressed.stat().st_size)
+    assert 'filename="audiveris.log"' in response.headers["content-disposition"]
+    assert response.text == LOG_TEXT
+
+
+def test_gzipped_log_is_decompressed_for_other_clients(client):
+    response = client.get("/log/audiveris.log.gz", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == LOG_TEXT
+
+    etag = response.headers["etag"]
+    response = client.get("/log/audiveris.log.gz", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_gzip_variants_have_distinct_etags(client):
+    gzipped = client.get("/log/audiveris.log.gz", headers={"Accept-Encoding": "gzip"})
+    plain = client.get("/log/audiveris.log.gz", headers={"Accept-Encoding": "identity"})
+    assert gzipped.headers["etag"] != plain.headers["etag"]
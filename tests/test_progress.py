@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import pytest
+
+from api import progress as progress_module
+from api.config import settings
+from api.progress import SheetProgress
+
+FAKE_AUDIVERIS = Path(__file__).resolve().parent.parent / "benchmarks" / "fake_audiveris.py"
+
+
+@pytest.fixture
+def progress(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_AUDIVERIS_SECONDS", "0")
+    monkeypatch.setenv("FAKE_AUDIVERIS_BOOK_KB", "1")
+    monkeypatch.setattr(settings, "audiveris_cmd", str(FAKE_AUDIVERIS))
+    monkeypatch.setattr(progress_module.repo, "save", lambda task: None)
+    book = tmp_path / "book.omr"
+    book.write_bytes(b"")
+    sheet_progress = SheetProgress({"id": "task"}, tmp_path / "sheets", tmp_path / "scratch")
+    sheet_progress._book = book
+    sheet_progress._url_for = lambda path: f"/out/sheets/{path.name}"
+    return sheet_progress
+
+
+def export(progress: SheetProgress, number: int) -> list[dict]:
+    progress.feed(f"INFO  Disposed sheet{number}")
+    progress._exports.put(None)
+    progress._export_loop()
+    return progress._task["progress"]["sheets"]
+
+
+def test_single_movement_sheet(progress):
+    sheets = export(progress, 2)
+    assert sheets == [{"number": 2, "url": "/out/sheets/sheet2.mxl", "movements": []}]
+    assert [path.name for path in progress.paths] == ["sheet2.mxl"]
+
+
+def test_every_movement_of_a_sheet_is_kept(progress, monkeypatch):
+    monkeypatch.setenv("FAKE_AUDIVERIS_MOVEMENTS", "3")
+    sheets = export(progress, 2)
+    urls = [f"/out/sheets/sheet2.mvt{movement}.mxl" for movement in (1, 2, 3)]
+    assert sheets == [{"number": 2, "url": urls[0], "movements": urls}]
+    assert [path.name for path in progress.paths] == ["sheet2.mvt1.mxl", "sheet2.mvt2.mxl", "sheet2.mvt3.mxl"]
+
+
+def test_movements_of_other_sheets_are_ignored(tmp_path):
+    for name in ("sheet2.sheet#2.mvt#2.mxl", "sheet2.sheet#2.mvt#1.mxl", "sheet2.sheet#12.mvt#1.mxl", "other.mxl"):
+        (tmp_path / name).write_bytes(b"")
+    exported = progress_module._exported_files(tmp_path, "sheet2", 2)
+    assert [path.name for path in exported] == ["sheet2.sheet#2.mvt#1.mxl", "sheet2.sheet#2.mvt#2.mxl"]
+
+
+def test_sheets_of_an_earlier_attempt_stay_finished(tmp_path):
+    task = {"id": "task", "progress": {"sheets": [
+        {"number": 1, "url": "/out/sheets/sheet1.mxl", "movements": []},
+        {"number": 2, "url": "/a", "movements": ["/a", "/b"]},
+    ]}}
+    progress = SheetProgress(task, tmp_path)
+    assert progress._sheets == {1: ["/out/sheets/sheet1.mxl"], 2: ["/a", "/b"]}
@@ -0,0 +1,114 @@
+from PIL import Image, ImageDraw
+
+from api import splitter
+from api.config import settings
+from api.splitter import NOISE_FRACTION, find_gaps, ink_profile, plan_cuts, split_tall_image
+
+WIDTH = 1200  # One dark pixel in a row stays under NOISE_FRACTION
+MIN_GAP = int(WIDTH * splitter.MIN_GAP_FRACTION)
+
+
+def score(height: int, systems: list[tuple[int, int]]) -> Image.Image:
+    """White page with systems of staff lines between (top, bottom) rows, joined by bar lines."""
+    image = Image.new("L", (WIDTH, height), 255)
+    draw = ImageDraw.Draw(image)
+    for top, bottom in systems:
+        for row in range(top, bottom, 8):
+            draw.line((40, row, WIDTH - 40, row), fill=0)
+        draw.line((40, top, 40, bottom - 1), fill=0)
+        draw.line((WIDTH - 40, top, WIDTH - 40, bottom - 1), fill=0)
+    return image
+
+
+def gaps_of(image: Image.Image) -> list[int]:
+    return find_gaps(ink_profile(image), MIN_GAP)
+
+
+def test_gaps_between_systems():
+    image = score(1000, [(100, 300), (400, 600), (700, 900)])
+    assert gaps_of(image) == [(300 + 400) // 2, (600 + 700) // 2]
+
+
+def test_margins_are_not_gaps():
+    image = score(1000, [(200, 800)])
+    assert gaps_of(image) == []
+
+
+def test_no_gaps_when_ink_fills_the_page():
+    image = score(1000, [(0, 1000)])
+    assert gaps_of(image) == []
+
+
+def test_band_shorter_than_min_gap_is_not_a_gap():
+    image = score(1000, [(100, 480), (480 + MIN_GAP - 2, 900)])
+    assert gaps_of(image) == []
+
+
+def test_dust_under_noise_fraction_keeps_rows_blank():
+    image = score(1000, [(100, 300), (500, 700)])
+    for row in range(310, 490, 15):
+        image.putpixel((WIDTH // 2 + row, row), 0)
+    assert 1 / WIDTH <= NOISE_FRACTION
+    assert gaps_of(image) == [(300 + 500) // 2]
+
+
+def test_mark_above_noise_fraction_breaks_the_band():
+    image = score(1000, [(100, 300), (300 + MIN_GAP + 10, 700)])
+    draw = ImageDraw.Draw(image)
+    middle = 300 + (MIN_GAP + 10) // 2
+    draw.line((100, middle, 100 + WIDTH // 100, middle), fill=0)
+    assert gaps_of(image) == []
+
+
+def test_plan_cuts_keeps_strips_under_height():
+    assert plan_cuts(1000, [100, 200, 300, 400, 500, 600, 700, 800, 900], 350) == [300, 600, 900]
+
+
+def test_plan_cuts_short_image_is_not_cut():
+    assert plan_cuts(300, [100, 200], 350) == []
+
+
+def test_plan_cuts_without_gaps():
+    assert plan_cuts(1000, [], 300) == []
+
+
+def test_system_taller_than_a_strip_gets_its_own_strip():
+    cuts = plan_cuts(1000, [100, 700, 800], 300)
+    assert cuts == [100, 700]
+
+
+def test_split_tall_image(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "image_split_min_aspect", 2.0)
+    monkeypatch.setattr(settings, "image_split_strip_aspect", 1.0)
+    systems = [(top, top + 400) for top in range(100, 4800, 500)]
+    path = tmp_path / "long.png"
+    score(4900, systems).save(path)
+
+    strips = split_tall_image(path, tmp_path)
+
+    assert [strip.name for strip in strips] == [f"long-strip{number}.png" for number in range(1, len(strips) + 1)]
+    heights = []
+    for strip in strips:
+        with Image.open(strip) as image:
+            assert image.width == WIDTH
+            assert image.height <= WIDTH
+            heights.append(image.height)
+    assert sum(heights) == 4900
+    profile = ink_profile(score(4900, systems))
+    cuts = [sum(heights[:index]) for index in range(1, len(heights))]
+    assert all(profile[cut] <= NOISE_FRACTION for cut in cuts)
+
+
+def test_split_skips_short_images(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "image_split_min_aspect", 2.0)
+    path = tmp_path / "page.png"
+    score(1700, [(100, 700), (900, 1600)]).save(path)
+    assert split_tall_image(path, tmp_path) is None
+
+
+def test_split_skips_tall_images_without_gaps(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "image_split_min_aspect", 2.0)
+    monkeypatch.setattr(settings, "image_split_strip_aspect", 1.0)
+    path = tmp_path / "solid.png"
+    score(3000, [(0, 3000)]).save(path)
+    assert split_tall_image(path, tmp_path) is None